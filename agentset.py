@@ -0,0 +1,99 @@
+#
+# agentset.py
+#
+# Copyright 2022 OTSUKI Takashi
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+from typing import Iterable, Iterator
+
+from aiwolf import Agent
+
+
+class AgentSet:
+    """Immutable set of agents backed by an integer bitmask indexed by agent number."""
+
+    __slots__ = ("bits",)
+
+    def __init__(self, bits: int = 0) -> None:
+        """Initialize a new instance of AgentSet.
+
+        Args:
+            bits: The bitmask whose n-th bit is set if Agent[n] is contained.
+        """
+        self.bits: int = bits
+        """The bitmask whose n-th bit is set if Agent[n] is contained."""
+
+    @staticmethod
+    def of(agents: Iterable[Agent]) -> AgentSet:
+        """Return the set of the given agents.
+
+        Args:
+            agents: The agents.
+
+        Returns:
+            A set containing agents.
+        """
+        bits: int = 0
+        for a in agents:
+            bits |= 1 << a.agent_idx
+        return AgentSet(bits)
+
+    def with_agent(self, agent: Agent) -> AgentSet:
+        """Return the set with the given agent added."""
+        return AgentSet(self.bits | 1 << agent.agent_idx)
+
+    def without_agent(self, agent: Agent) -> AgentSet:
+        """Return the set with the given agent removed."""
+        return AgentSet(self.bits & ~(1 << agent.agent_idx))
+
+    def to_list(self) -> list[Agent]:
+        """Return a list of the contained agents in order of agent number."""
+        return list(self)
+
+    def __contains__(self, agent: object) -> bool:
+        return isinstance(agent, Agent) and self.bits >> agent.agent_idx & 1 == 1
+
+    def __iter__(self) -> Iterator[Agent]:
+        bits: int = self.bits
+        while bits:
+            low: int = bits & -bits
+            yield Agent(low.bit_length() - 1)
+            bits ^= low
+
+    def __len__(self) -> int:
+        return bin(self.bits).count("1")
+
+    def __bool__(self) -> bool:
+        return self.bits != 0
+
+    def __or__(self, other: AgentSet) -> AgentSet:
+        return AgentSet(self.bits | other.bits)
+
+    def __and__(self, other: AgentSet) -> AgentSet:
+        return AgentSet(self.bits & other.bits)
+
+    def __sub__(self, other: AgentSet) -> AgentSet:
+        return AgentSet(self.bits & ~other.bits)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, AgentSet) and self.bits == other.bits
+
+    def __hash__(self) -> int:
+        return hash(self.bits)
+
+    def __repr__(self) -> str:
+        return "AgentSet(" + ", ".join(str(a) for a in self) + ")"
+
@@ -0,0 +1,77 @@
+#
+# anytime.py
+#
+# Copyright 2022 OTSUKI Takashi
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+from typing import Callable, Iterator, NamedTuple
+
+from aiwolf import Agent, Role
+from aiwolf.constant import AGENT_NONE
+
+from agentset import AgentSet
+
+Search = Callable[[float], Iterator[Agent]]
+"""Function starting an incremental search given its deadline, which yields a better answer after each step."""
+
+DEFAULT_TIME_LIMIT: int = 1000
+"""Time limit in milliseconds assumed when the game setting has none."""
+
+
+class Selection(NamedTuple):
+    """Choice made by a rule, which a search can reconsider with more time."""
+
+    candidates: AgentSet
+    """The candidates chosen from."""
+    role: Role
+    """The role whose probability the candidates are ranked by."""
+    most: bool
+    """Whether the most likely candidate is chosen instead of the least likely one."""
+
+
+def get_deadline(start: float, time_limit: int, fraction: float) -> float:
+    """Return the time by which a search must answer.
+
+    Args:
+        start: The value of time.perf_counter() when the request was received.
+        time_limit: The time limit of a request in milliseconds. DEFAULT_TIME_LIMIT is used if not positive.
+        fraction: The fraction of the time limit given to the search.
+
+    Returns:
+        The deadline in terms of time.perf_counter().
+    """
+    return start + (time_limit if time_limit > 0 else DEFAULT_TIME_LIMIT) / 1000 * fraction
+
+
+def run_anytime(search: Iterator[Agent], fallback: Agent, deadline: float) -> Agent:
+    """Step the search until the deadline and return its latest answer.
+
+    Args:
+        search: The search, which yields a better answer after each step.
+        fallback: The answer of the rule, returned if the search gives none in time.
+        deadline: The deadline in terms of time.perf_counter().
+
+    Returns:
+        The latest answer given by the search before the deadline, or fallback.
+    """
+    answer: Agent = fallback
+    if time.perf_counter() >= deadline:
+        return answer
+    for agent in search:
+        if time.perf_counter() >= deadline:  # The step overran the deadline.
+            break
+        if agent != AGENT_NONE:
+            answer = agent
+    return answer
@@ -0,0 +1,226 @@
+#
+# asyncclient.py
+#
+# Copyright 2022 OTSUKI Takashi
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import json
+import re
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+from aiwolf import AbstractPlayer, Agent, GameInfo, GameSetting, Talk, Whisper
+from aiwolf.constant import AGENT_NONE
+
+try:
+    import orjson
+    loads: Callable[[bytes], Any] = orjson.loads
+except ImportError:  # Fall back on the standard decoder.
+    loads = json.loads
+
+READ_LIMIT: int = 1 << 24
+"""Maximum length of a packet in bytes."""
+
+_TALK_LIST: re.Pattern[bytes] = re.compile(rb'"talkList"\s*:\s*\[')
+_WHISPER_LIST: re.Pattern[bytes] = re.compile(rb'"whisperList"\s*:\s*\[')
+_SEPARATOR: re.Pattern[bytes] = re.compile(rb"\}\s*,\s*\{")
+_LIST_END: re.Pattern[bytes] = re.compile(rb"\}\s*\]")
+_EMPTY_LIST: bytes = b"[]"
+
+
+def _cut_list(line: bytes, key: re.Pattern[bytes]) -> tuple[bytes, bytes]:
+    # Return the packet whose list of the key is emptied and the list in JSON.
+    # The texts of the protocol never contain braces, so the list of objects ends at the first "}" followed by "]".
+    m: Optional[re.Match[bytes]] = key.search(line)
+    if m is None:
+        return line, _EMPTY_LIST
+    start: int = m.end() - 1
+    end: int = -1
+    if line[start + 1:].lstrip().startswith(b"]"):
+        end = line.find(b"]", start)
+    else:
+        last: Optional[re.Match[bytes]] = _LIST_END.search(line, start)
+        if last is not None:
+            end = last.end() - 1
+    if end <= start:
+        return line, _EMPTY_LIST
+    return line[:start] + _EMPTY_LIST + line[end + 1:], line[start:end + 1]
+
+
+def _count_entries(entries: bytes) -> int:
+    # Return the number of the objects in the list in JSON.
+    return 0 if entries == _EMPTY_LIST or not entries.strip(b"[] \t\r\n") else len(_SEPARATOR.findall(entries)) + 1
+
+
+def _decode_tail(entries: bytes, skip: int) -> list[dict[str, Any]]:
+    # Decode the objects in the list in JSON after the first skip ones.
+    if skip == 0:
+        return loads(entries) if entries != _EMPTY_LIST else []
+    for i, m in enumerate(_SEPARATOR.finditer(entries), 1):
+        if i == skip:
+            return loads(b"[" + entries[m.end() - 1:])
+    return []
+
+
+@lru_cache(maxsize=None)  # The answers are interned as the contents of the talks are.
+def _agent_json(agent: Optional[Agent]) -> str:
+    return json.dumps({"agentIdx": agent.agent_idx if agent is not None else AGENT_NONE.agent_idx},
+                      separators=(",", ":"))
+
+
+class Connection:
+    """Protocol state of a connection to the server, which turns each packet into the player's callbacks.
+
+    The talks and the whispers are compiled only once. Those already compiled are kept and reused
+    by the later packets of the same day, which carry either the whole lists or just the new entries.
+    """
+
+    def __init__(self, player: AbstractPlayer, name: Optional[str], role: str) -> None:
+        """Initialize a new instance of Connection.
+
+        Args:
+            player: The player of the connection.
+            name: The name of the agent.
+            role: The role requested to the server.
+        """
+        self.player: AbstractPlayer = player
+        """The player of the connection."""
+        self.name: Optional[str] = name
+        """The name of the agent."""
+        self.role: str = role
+        """The role requested to the server."""
+        self.game_info: Optional[GameInfo] = None
+        """The latest game information."""
+        self.talks: list[Talk] = []
+        """Talks of the current day compiled so far."""
+        self.whispers: list[Whisper] = []
+        """Whispers of the current day compiled so far."""
+        self.raw_game_info: dict[str, Any] = {}
+        """The latest game information as decoded without the talks and the whispers."""
+
+    def _merge(self, game_info: dict[str, Any], talks: bytes, whispers: bytes) -> GameInfo:
+        # Give the game information, decoded without its talks and whispers, the lists compiled so far
+        # extended with the entries not compiled yet. The game information is built again only if
+        # something other than the lists has changed.
+        new_day: bool = self.game_info is None or game_info.get("day") != self.game_info.day
+        if new_day or _count_entries(talks) < len(self.talks):
+            self.talks = []
+        if new_day or _count_entries(whispers) < len(self.whispers):
+            self.whispers = []
+        self.talks.extend(Talk.compile(t) for t in _decode_tail(talks, len(self.talks)))  # type: ignore
+        self.whispers.extend(Whisper.compile(w) for w in _decode_tail(whispers, len(self.whispers)))  # type: ignore
+        info: GameInfo
+        if self.game_info is not None and game_info == self.raw_game_info:
+            info = self.game_info
+        else:
+            self.raw_game_info = game_info
+            info = GameInfo(dict(game_info))  # type: ignore
+        info.talk_list = self.talks
+        info.whisper_list = self.whispers
+        return info
+
+    def handle(self, line: bytes) -> Optional[str]:
+        """Process the packet and return the response.
+
+        The talk and whisper lists of the game information are cut out before decoding the packet,
+        and only their entries not compiled yet are decoded.
+
+        Args:
+            line: The packet received from the server in JSON.
+
+        Returns:
+            The response to be sent, or None if no response is needed.
+        """
+        line, talks = _cut_list(line, _TALK_LIST)
+        line, whispers = _cut_list(line, _WHISPER_LIST)
+        packet: dict[str, Any] = loads(line)
+        request: str = packet["request"]
+        if request == "NAME":
+            return self.name if self.name is not None else type(self.player).__name__
+        if request == "ROLE":
+            return self.role
+        if packet.get("gameInfo") is not None:
+            self.game_info = self._merge(packet["gameInfo"], talks, whispers)
+        if self.game_info is not None:
+            # The histories are the entries added since the last packet.
+            for t in packet.get("talkHistory") or ():
+                if t["idx"] >= len(self.talks):
+                    self.talks.append(Talk.compile(t))  # type: ignore
+            for w in packet.get("whisperHistory") or ():
+                if w["idx"] >= len(self.whispers):
+                    self.whispers.append(Whisper.compile(w))  # type: ignore
+        if request == "INITIALIZE":
+            self.player.initialize(self.game_info, GameSetting(packet["gameSetting"]))  # type: ignore
+            return None
+        self.player.update(self.game_info)  # type: ignore
+        if request == "DAILY_INITIALIZE":
+            self.player.day_start()
+        elif request == "TALK":
+            return self.player.talk().text
+        elif request == "WHISPER":
+            return self.player.whisper().text
+        elif request == "VOTE":
+            return _agent_json(self.player.vote())
+        elif request == "ATTACK":
+            return _agent_json(self.player.attack())
+        elif request == "DIVINE":
+            return _agent_json(self.player.divine())
+        elif request == "GUARD":
+            return _agent_json(self.player.guard())
+        elif request == "FINISH":
+            self.player.finish()
+            self.game_info = None
+        return None
+
+
+async def run_connection(player: AbstractPlayer, name: Optional[str], host: str, port: int, role: str) -> None:
+    """Play games over a connection to the server until it is closed.
+
+    Args:
+        player: The player of the connection.
+        name: The name of the agent.
+        host: The host name of the server.
+        port: The port number of the server.
+        role: The role requested to the server.
+    """
+    reader, writer = await asyncio.open_connection(host, port, limit=READ_LIMIT)
+    connection: Connection = Connection(player, name, role)
+    try:
+        while True:
+            line: bytes = await reader.readline()
+            if not line:
+                break
+            response: Optional[str] = connection.handle(line)
+            if response is not None:
+                writer.write(response.encode() + b"\n")
+                await writer.drain()
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def run_connections(make_agent: Callable[[], AbstractPlayer], name: Optional[str], host: str, port: int,
+                          role: str = "none", connections: int = 1) -> None:
+    """Play games over the given number of connections at once, each with its own player.
+
+    Args:
+        make_agent: The function that returns the player of a connection.
+        name: The name of the agents.
+        host: The host name of the server.
+        port: The port number of the server.
+        role: The role requested to the server.
+        connections: The number of connections.
+    """
+    await asyncio.gather(*(run_connection(make_agent(), name, host, port, role) for _ in range(connections)))
@@ -0,0 +1,393 @@
+#
+# belief.py
+#
+# Copyright 2022 OTSUKI Takashi
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+import numpy as np
+import numpy.typing as npt
+
+from aiwolf import Agent, Role, Species
+from aiwolf.constant import AGENT_NONE
+
+from agentset import AgentSet
+
+EPSILON: float = 0.02
+"""Likelihood of an event that is impossible under the assumption, kept small but positive against lies."""
+
+FAKE_CLAIM: float = 0.6
+"""Likelihood of a werewolf or a possessed claiming a role it is not."""
+
+FALSE_CLAIM: float = 0.1
+"""Likelihood of another human claiming a role it is not."""
+
+FAKE_WOLF_REPORT: float = 0.3
+"""Probability of a fake seer or medium reporting a werewolf."""
+
+SINKHORN_ITERATIONS: int = 50
+"""Maximum number of the scaling iterations to fit the probabilities to the role composition."""
+
+SINKHORN_TOLERANCE: float = 1e-3
+"""Error of the column sums under which the scaling iterations stop."""
+
+SAMPLE_BATCH: int = 64
+"""Number of the role assignments sampled at once when refining the probabilities."""
+
+MAX_EMPTY_BATCHES: int = 16
+"""Number of the batches without any possible assignment after which the sampling gives up."""
+
+
+class RoleBelief:
+    """Probability matrix of agents × roles kept consistent with the role composition of the game.
+
+    Evidences are accumulated as likelihoods in batches, and the probabilities are obtained from them
+    by scaling the rows to sum to one and the columns to sum to the number of each role.
+    """
+
+    def __init__(self) -> None:
+        """Initialize a new instance of RoleBelief."""
+        self.roles: list[Role] = []
+        """Roles of the columns."""
+        self.columns: dict[Role, int] = {}
+        """Mapping between a role and its column."""
+        self.counts: npt.NDArray[np.float64] = np.zeros(0)
+        """Number of agents of the role of each column."""
+        self.likelihood: npt.NDArray[np.float64] = np.zeros((0, 0))
+        """Prior times likelihoods of the evidences. The row n-1 is for Agent[n]."""
+        self.fake_claim_weights: dict[int, float] = {}
+        """Mapping between a row and the factor of FAKE_CLAIM learned from the history of the agent."""
+        self.executed: list[int] = []
+        """Rows of the executed agents, after whose executions the game went on."""
+        self._prob: Optional[npt.NDArray[np.float64]] = None
+        self._columns: list[list[float]] = []
+        self._ties: dict[tuple[int, Role, bool], list[Agent]] = {}
+        self._scale: npt.NDArray[np.float64] = np.zeros(0)
+
+    def reset(self, role_num_map: dict[Role, int], agent_num: int) -> None:
+        """Start a new game with uniform priors.
+
+        Args:
+            role_num_map: The number of agents of each role.
+            agent_num: The number of agents.
+        """
+        self.roles = [r for r, n in role_num_map.items() if n > 0]
+        self.columns = {r: i for i, r in enumerate(self.roles)}
+        self.counts = np.array([role_num_map[r] for r in self.roles], dtype=np.float64)
+        self.likelihood = np.ones((agent_num, len(self.roles)))
+        self.fake_claim_weights.clear()
+        self.executed.clear()
+        self._prob = None
+        self._scale = np.ones(len(self.roles))
+
+    def _mask(self, roles: Iterable[Role]) -> npt.NDArray[np.bool_]:
+        mask: npt.NDArray[np.bool_] = np.zeros(len(self.roles), dtype=np.bool_)
+        mask[[self.columns[r] for r in roles if r in self.columns]] = True
+        return mask
+
+    def set_role(self, agent: Agent, role: Role) -> None:
+        """Fix the role of the agent, such as myself or an ally werewolf."""
+        self.likelihood[agent.agent_idx - 1] *= self._mask((role,))
+        self._prob = None
+
+    def set_species(self, agent: Agent, species: Species) -> None:
+        """Fix the species of the agent, such as a divination result of mine."""
+        wolf: npt.NDArray[np.bool_] = self._mask((Role.WEREWOLF,))
+        self.likelihood[agent.agent_idx - 1] *= wolf if species == Species.WEREWOLF else ~wolf
+        self._prob = None
+
+    def set_fake_claim_weight(self, agent: Agent, weight: float) -> None:
+        """Scale the likelihood of the agent's comingouts being fake when it is a werewolf or a possessed."""
+        self.fake_claim_weights[agent.agent_idx - 1] = weight
+
+    def add_attacked(self, agents: Iterable[Agent]) -> None:
+        """Record the agents killed by the werewolves, which are not werewolves."""
+        rows: list[int] = [a.agent_idx - 1 for a in agents]
+        if rows and Role.WEREWOLF in self.columns:
+            self.likelihood[rows, self.columns[Role.WEREWOLF]] = 0.0
+            self._prob = None
+
+    def add_executed(self, agent: Agent) -> None:
+        """Record the agent executed on the previous day, after whose execution the game went on.
+
+        Thus at least one werewolf is alive other than the executed agents. This rules out the werewolf
+        for the executed agent if there is only one, and the assignments of sample() otherwise.
+        """
+        row: int = agent.agent_idx - 1
+        if not 0 <= row < len(self.likelihood) or row in self.executed:
+            return
+        self.executed.append(row)
+        column: Optional[int] = self.columns.get(Role.WEREWOLF)
+        if column is not None and self.counts[column] == 1:
+            self.likelihood[row, column] = 0.0
+            self._prob = None
+
+    def add_talks(self, me: Agent, claims: list[tuple[Agent, Role]],
+                  divinations: list[tuple[Agent, Agent, Species]],
+                  identifications: list[tuple[Agent, Agent, Species]]) -> None:
+        """Apply the evidences of the talks analyzed in an update at once.
+
+        Args:
+            me: Myself, whose species is known to be human unless the caller fixed it otherwise.
+            claims: Pairs of an agent and the role it claimed.
+            divinations: Triples of a seer, the target and the reported species.
+            identifications: Triples of a medium, the target and the reported species.
+        """
+        if not (claims or divinations or identifications):
+            return
+        rows: list[int] = []
+        factors: list[npt.NDArray[np.float64]] = []
+        liars: npt.NDArray[np.bool_] = self._mask((Role.WEREWOLF, Role.POSSESSED))
+        for agent, role in claims:
+            if role not in self.columns or role == Role.VILLAGER:
+                continue
+            row: int = agent.agent_idx - 1
+            factor: npt.NDArray[np.float64] = np.where(liars, FAKE_CLAIM * self.fake_claim_weights.get(row, 1.0),
+                                                       FALSE_CLAIM)
+            factor[self.columns[role]] = 1.0
+            rows.append(row)
+            factors.append(factor)
+        if rows:
+            # Apply the claims first, so that the reports are weighed by the reporters' claims of this batch.
+            np.multiply.at(self.likelihood, np.array(rows), np.array(factors))
+            self._prob = None
+            rows = []
+            factors = []
+        wolf: npt.NDArray[np.bool_] = self._mask((Role.WEREWOLF,))
+        for judge_role, reports in ((Role.SEER, divinations), (Role.MEDIUM, identifications)):
+            if not reports or judge_role not in self.columns:
+                continue
+            column: int = self.columns[judge_role]
+            prob: npt.NDArray[np.float64] = self.prob
+            for reporter, target, species in reports:
+                # Skip the reports about agents out of the table such as ANY and the results other than the species.
+                if not (0 < reporter.agent_idx <= len(prob) and 0 < target.agent_idx <= len(prob)) \
+                        or species not in (Species.HUMAN, Species.WEREWOLF):
+                    continue
+                # Probability that the reporter is genuine.
+                p: float = prob[reporter.agent_idx - 1, column]
+                reported_wolf: bool = species == Species.WEREWOLF
+                true: float = p + (1 - p) * (FAKE_WOLF_REPORT if reported_wolf else 1 - FAKE_WOLF_REPORT)
+                false: float = p * EPSILON + (1 - p) * (FAKE_WOLF_REPORT if reported_wolf else 1 - FAKE_WOLF_REPORT)
+                rows.append(target.agent_idx - 1)
+                factors.append(np.where(wolf == reported_wolf, true, false))
+                if target == me and reported_wolf:  # A genuine one never reports me as a werewolf.
+                    factor = np.ones(len(self.roles))
+                    factor[column] = EPSILON
+                    rows.append(reporter.agent_idx - 1)
+                    factors.append(factor)
+        if rows:
+            np.multiply.at(self.likelihood, np.array(rows), np.array(factors))
+            self._prob = None
+
+    def _normalize(self) -> npt.NDArray[np.float64]:
+        prob: npt.NDArray[np.float64] = (self.likelihood > 0).astype(np.float64)
+        # Rows with a single possible role are settled, and only the rest are scaled.
+        fixed: npt.NDArray[np.bool_] = prob.sum(axis=1) == 1
+        free: npt.NDArray[np.bool_] = ~fixed
+        counts: npt.NDArray[np.float64] = np.maximum(self.counts - prob[fixed].sum(axis=0), 0.0)
+        # Columns filled by the settled rows are impossible for the rest.
+        likelihood: npt.NDArray[np.float64] = (self.likelihood[free] + 1e-12) * (counts > 0)
+        # Start from the column scale of the last time, which changes little between updates.
+        scale: npt.NDArray[np.float64] = self._scale
+        p: npt.NDArray[np.float64] = likelihood
+        for _ in range(SINKHORN_ITERATIONS):
+            p = likelihood * scale
+            p /= p.sum(axis=1, keepdims=True)
+            column_sum: npt.NDArray[np.float64] = p.sum(axis=0)
+            if np.abs(column_sum - counts).max() < SINKHORN_TOLERANCE:
+                break
+            scale = scale * (counts / np.maximum(column_sum, 1e-12))
+        self._scale = scale
+        prob[free] = p
+        self._prob = prob
+        # Queries about a few agents are faster on lists than on the array.
+        self._columns = prob.T.tolist()
+        self._ties.clear()
+        return prob
+
+    @property
+    def prob(self) -> npt.NDArray[np.float64]:
+        """Probabilities of agents × roles, whose rows sum to one and columns to the numbers of the roles."""
+        return self._prob if self._prob is not None else self._normalize()
+
+    def column(self, role: Role) -> Optional[list[float]]:
+        """Return the probabilities of the agents having the role indexed by agent_idx - 1, or None without the role.
+
+        The list is shared until the evidences change, and must not be modified.
+        """
+        column: Optional[int] = self.columns.get(role)
+        if column is None:
+            return None
+        if self._prob is None:
+            self._normalize()
+        return self._columns[column]
+
+    def get_prob(self, agent: Agent, role: Role) -> float:
+        """Return the probability that the agent has the role."""
+        column: Optional[list[float]] = self.column(role)
+        return column[agent.agent_idx - 1] if column is not None else 0.0
+
+    def rank(self, agents: AgentSet, role: Role) -> list[Agent]:
+        """Return the agents sorted in descending order of the probability of having the role."""
+        agent_list: list[Agent] = agents.to_list()
+        column: Optional[int] = self.columns.get(role)
+        if column is None or not agent_list:
+            return agent_list
+        p: npt.NDArray[np.float64] = self.prob[[a.agent_idx - 1 for a in agent_list], column]
+        return [agent_list[i] for i in np.argsort(-p, kind="stable")]
+
+    def select(self, agents: AgentSet, role: Role, most: bool = True,
+               scores: Optional[Callable[[], npt.NDArray[Any]]] = None) -> Agent:
+        """Return the agent most (or least) likely to have the role, breaking ties randomly.
+
+        Args:
+            agents: The candidates.
+            role: The role.
+            most: Whether to choose the most likely one instead of the least likely one.
+            scores: The function returning scores indexed by agent_idx - 1, called only if there are ties.
+                Ties go to the highest scored candidates first if given.
+
+        Returns:
+            The chosen agent, or AGENT_NONE if agents is empty.
+        """
+        if not agents:
+            return AGENT_NONE
+        column: Optional[list[float]] = self.column(role)  # Clears the ties cached before the evidences changed.
+        if column is None:
+            return random.choice(agents.to_list())
+        # The candidates tied in probability are kept until the evidences change,
+        # since the same candidates are asked about again and again while talking.
+        key: tuple[int, Role, bool] = (agents.bits, role, most)
+        ties: Optional[list[Agent]] = self._ties.get(key)
+        if ties is None:
+            agent_list: list[Agent] = agents.to_list()
+            p: list[float] = [column[a.agent_idx - 1] for a in agent_list]
+            best: float = max(p) if most else min(p)
+            tolerance: float = 1e-8 + 1e-5 * abs(best)  # The same as numpy.isclose.
+            ties = self._ties[key] = [a for a, x in zip(agent_list, p) if abs(x - best) <= tolerance]
+        if scores is not None and len(ties) > 1:
+            scored: npt.NDArray[Any] = scores()
+            s: list[Any] = [scored[a.agent_idx - 1] for a in ties]
+            top: Any = max(s)
+            ties = [a for a, x in zip(ties, s) if x == top]
+        return random.choice(ties)
+
+    def _draw(self, generator: np.random.Generator) -> tuple[npt.NDArray[np.intp], npt.NDArray[np.float64]]:
+        """Draw SAMPLE_BATCH role assignments following the role composition with their importance weights.
+
+        The assignments are drawn agent by agent from the scaled probabilities restricted to the roles left,
+        and weighted by the ratio of the likelihood to the probability of being drawn.
+
+        Returns:
+            The columns of the roles of the agents in each assignment, and the weights of the assignments.
+        """
+        likelihood: npt.NDArray[np.float64] = self.likelihood
+        proposal: npt.NDArray[np.float64] = self.prob
+        agent_num, role_num = likelihood.shape
+        samples: npt.NDArray[np.intp] = np.arange(SAMPLE_BATCH)
+        remaining: npt.NDArray[np.float64] = np.tile(self.counts, (SAMPLE_BATCH, 1))
+        log_weight: npt.NDArray[np.float64] = np.zeros(SAMPLE_BATCH)
+        assignment: npt.NDArray[np.intp] = np.empty((SAMPLE_BATCH, agent_num), dtype=np.intp)
+        for row in range(agent_num):
+            q: npt.NDArray[np.float64] = proposal[row] * (remaining > 0)
+            q_sum: npt.NDArray[np.float64] = q.sum(axis=1, keepdims=True)
+            q = np.divide(q, q_sum, out=np.full_like(q, 1 / role_num), where=q_sum > 0)
+            drawn: npt.NDArray[np.intp] = np.minimum(
+                (q.cumsum(axis=1) < generator.random((SAMPLE_BATCH, 1))).sum(axis=1), role_num - 1)
+            assignment[:, row] = drawn
+            remaining[samples, drawn] -= 1
+            with np.errstate(divide="ignore"):
+                log_weight += np.log(likelihood[row, drawn]) - np.log(q[samples, drawn])
+        # Assignments exceeding the role composition are impossible.
+        possible: npt.NDArray[np.bool_] = (remaining >= 0).all(axis=1)
+        if self.executed and Role.WEREWOLF in self.columns:
+            # So are those leaving no werewolf alive, since the game went on after the executions.
+            alive: npt.NDArray[np.bool_] = np.ones(agent_num, dtype=np.bool_)
+            alive[self.executed] = False
+            possible &= (assignment[:, alive] == self.columns[Role.WEREWOLF]).any(axis=1)
+        return assignment, np.where(possible, np.exp(log_weight), 0.0)
+
+    def sample(self) -> Iterator[npt.NDArray[np.float64]]:
+        """Estimate the exact probabilities by sampling role assignments, improving them batch by batch.
+
+        The scaled probabilities approximate the marginals of the assignments following the role composition,
+        whose probability is the product of the likelihoods. They are used as the proposal of importance
+        sampling, which converges to the exact marginals.
+
+        Yields:
+            The probabilities of agents × roles estimated from the assignments sampled so far.
+            Nothing if no possible assignment is found in the first MAX_EMPTY_BATCHES batches.
+        """
+        agent_num, role_num = self.likelihood.shape
+        if agent_num == 0:
+            return
+        generator: np.random.Generator = np.random.default_rng(random.getrandbits(32))
+        rows: npt.NDArray[np.intp] = np.broadcast_to(np.arange(agent_num), (SAMPLE_BATCH, agent_num))
+        total: npt.NDArray[np.float64] = np.zeros((agent_num, role_num))
+        total_weight: float = 0.0
+        empty_batches: int = 0
+        while True:
+            assignment, weight = self._draw(generator)
+            np.add.at(total, (rows, assignment), weight[:, None])
+            total_weight += float(weight.sum())
+            if total_weight > 0:
+                yield total / total_weight
+            else:
+                # The fixed roles may contradict the role composition, leaving no assignment possible.
+                empty_batches += 1
+                if empty_batches >= MAX_EMPTY_BATCHES:
+                    return
+
+    def sample_roles(self, count: int) -> list[list[Role]]:
+        """Return role assignments drawn with the probabilities of the assignments.
+
+        Args:
+            count: The number of the assignments.
+
+        Returns:
+            The assignments, each of which lists the roles of Agent[01], Agent[02], ...
+            Empty if no assignment is possible.
+        """
+        if self.likelihood.shape[0] == 0:
+            return []
+        generator: np.random.Generator = np.random.default_rng(random.getrandbits(32))
+        assignment, weight = self._draw(generator)
+        if weight.sum() <= 0:
+            return []
+        chosen: npt.NDArray[np.intp] = generator.choice(SAMPLE_BATCH, count, p=weight / weight.sum())
+        return [[self.roles[c] for c in assignment[i]] for i in chosen]
+
+    def search(self, agents: AgentSet, role: Role, most: bool = True) -> Iterator[Agent]:
+        """Choose the agent most (or least) likely to have the role again and again
+        as the probabilities are refined by sample().
+
+        Args:
+            agents: The candidates.
+            role: The role.
+            most: Whether to choose the most likely one instead of the least likely one.
+
+        Yields:
+            The agent chosen with the probabilities estimated so far.
+        """
+        agent_list: list[Agent] = agents.to_list()
+        column: Optional[int] = self.columns.get(role)
+        if column is None or not agent_list:
+            return
+        rows: list[int] = [a.agent_idx - 1 for a in agent_list]
+        for prob in self.sample():
+            p: npt.NDArray[np.float64] = prob[rows, column]
+            yield agent_list[int(p.argmax() if most else p.argmin())]
@@ -0,0 +1,211 @@
+#!/usr/bin/env -S python -B
+#
+# bench.py
+#
+# Copyright 2022 OTSUKI Takashi
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import random
+import sys
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from typing import Callable, Iterator, NamedTuple
+
+from aiwolf import AbstractPlayer, GameInfo, GameSetting, Role, Talk
+
+from bodyguard import SampleBodyguard
+from medium import SampleMedium
+from possessed import SamplePossessed
+from seer import SampleSeer
+from simulator import GameSimulator
+from villager import SampleVillager
+from werewolf import SampleWerewolf
+
+ROLES: list[Role] = [Role.SEER, Role.MEDIUM, Role.BODYGUARD, Role.POSSESSED, Role.WEREWOLF, Role.WEREWOLF,
+                     Role.WEREWOLF] + [Role.VILLAGER] * 8
+"""Fixed roles of Agent[01] to Agent[15] in the benchmark games."""
+
+PLAYERS: dict[Role, Callable[[], AbstractPlayer]] = {
+    Role.SEER: SampleSeer,
+    Role.MEDIUM: SampleMedium,
+    Role.BODYGUARD: SampleBodyguard,
+    Role.POSSESSED: SamplePossessed,
+    Role.WEREWOLF: SampleWerewolf,
+    Role.VILLAGER: SampleVillager,
+}
+
+
+class Result(NamedTuple):
+    """Result of a benchmark."""
+
+    name: str
+    """Name of the benchmark."""
+    ns_per_op: float
+    """Nanoseconds per call."""
+    peak_bytes: int
+    """Peak of the memory traced during a call in bytes, which is not the total allocated by the call."""
+
+
+def make_talks(n: int, day: int = 2, seed: int = 0) -> list[Talk]:
+    """Return n typical talks of the 15-player regulation."""
+    rng: random.Random = random.Random(seed)
+    texts: list[str] = []
+    for i in range(n):
+        a: int = rng.randint(1, 15)
+        texts.append(rng.choice([
+            f"COMINGOUT Agent[{a:02}] {rng.choice(['SEER', 'MEDIUM', 'VILLAGER'])}",
+            f"DIVINED Agent[{a:02}] {rng.choice(['HUMAN', 'WEREWOLF'])}",
+            f"IDENTIFIED Agent[{a:02}] {rng.choice(['HUMAN', 'WEREWOLF'])}",
+            f"VOTE Agent[{a:02}]", "Skip", "Over",
+        ]))
+    return [Talk.compile({"idx": i, "day": day, "turn": i // 15, "agent": i % 15 + 1, "text": t})  # type: ignore
+            for i, t in enumerate(texts)]
+
+
+class GameState(NamedTuple):
+    """Fixed state of day 2 a player is brought to."""
+
+    game_setting: GameSetting
+    """The game setting."""
+    first: GameInfo
+    """The game information of day 0 the player is initialized with."""
+    morning: GameInfo
+    """The game information of day 2 before the talks."""
+    info: GameInfo
+    """The game information of day 2 with the talks."""
+
+
+def make_state(idx: int, talks: int = 100) -> GameState:
+    """Return the fixed state of day 2 seen by the given agent number."""
+    sim: GameSimulator = GameSimulator([PLAYERS[r]() for r in ROLES], seed=0, roles=ROLES)
+    sim.refresh()
+    first: GameInfo = sim.infos[idx]
+    sim.day = 2
+    sim.alive[15] = sim.alive[14] = False
+    sim.refresh()
+    morning: GameInfo = sim.infos[idx]
+    sim.refresh()
+    info: GameInfo = sim.infos[idx]
+    info.talk_list = make_talks(talks)
+    return GameState(sim.game_setting, first, morning, info)
+
+
+def start_player(idx: int, state: GameState) -> AbstractPlayer:
+    """Return a new player of the given agent number initialized and brought to the morning of day 2."""
+    player: AbstractPlayer = PLAYERS[ROLES[idx - 1]]()
+    player.initialize(state.first, state.game_setting)
+    player.update(state.morning)
+    player.day_start()
+    return player
+
+
+def make_player(idx: int, talks: int = 100) -> tuple[AbstractPlayer, GameInfo]:
+    """Return the player of the given agent number initialized and updated with a fixed state of day 2."""
+    state: GameState = make_state(idx, talks)
+    player: AbstractPlayer = start_player(idx, state)
+    player.update(state.info)
+    return player, state.info
+
+
+def measure(name: str, func: Callable[[], object], setup: Callable[[], object] = lambda: None,
+            number: int = 1000, repeat: int = 5) -> Result:
+    """Return the best time per call over the repeats and the peak of the memory traced during a call."""
+    best: float = float("inf")
+    for _ in range(repeat):
+        elapsed: int = 0
+        for _ in range(number):
+            setup()
+            start: int = time.perf_counter_ns()
+            func()
+            elapsed += time.perf_counter_ns() - start
+        best = min(best, elapsed / number)
+    setup()
+    tracemalloc.start()
+    func()
+    peak: int = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return Result(name, best, peak)
+
+
+def benchmarks(number: int) -> Iterator[Result]:
+    """Run all the benchmarks."""
+    for n in (15, 150, 1500):
+        state: GameState = make_state(8, n)
+        villagers: list[AbstractPlayer] = [start_player(8, state)]
+
+        def rewind() -> None:
+            # Start over from the morning, since the talks accumulate in the reports and the belief.
+            villagers[0] = start_player(8, state)
+        yield measure(f"SampleVillager.update/{n}talks", lambda: villagers[0].update(state.info), rewind, number)
+    for idx in (1, 2, 4, 8):
+        player, _ = make_player(idx)
+        name: str = type(player).__name__
+
+        def reset() -> None:
+            player.vote_candidate = player.me  # type: ignore
+            player.vote_candidate_version = -1  # type: ignore  # Not to keep the candidate as fresh.
+        yield measure(f"{name}.talk", player.talk, reset, number)
+        yield measure(f"{name}.vote", player.vote, number=number)
+    seer, _ = make_player(1)
+    yield measure("SampleSeer.divine", seer.divine, number=number)
+    bodyguard, _ = make_player(3)
+    yield measure("SampleBodyguard.guard", bodyguard.guard, number=number)
+    werewolf, _ = make_player(5)
+
+    def reset_attack() -> None:
+        werewolf.attack_vote_candidate = werewolf.me  # type: ignore
+    yield measure("SampleWerewolf.whisper", werewolf.whisper, reset_attack, number)
+    yield measure("SampleWerewolf.attack", werewolf.attack, number=number)
+
+
+if __name__ == "__main__":
+    parser: ArgumentParser = ArgumentParser(description="Benchmark the callbacks of the sample agents.")
+    parser.add_argument("-n", "--number", type=int, default=1000, help="calls per repeat")
+    parser.add_argument("-b", "--baseline", type=str, default="bench_baseline.json")
+    parser.add_argument("--save", action="store_true", help="save the results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help="fail if a benchmark gets slower than the baseline by this factor (default: 1.5),"
+                             " or if there is no baseline")
+    args = parser.parse_args()
+    baseline: dict[str, float] = {}
+    if not args.save:
+        try:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            # Timings depend on the machine, so the baseline is saved locally with --save rather than committed.
+            if args.tolerance is not None:
+                parser.error(f"no baseline {args.baseline} to check the tolerance against; save one with --save")
+            print(f"WARNING: no baseline {args.baseline}, so regressions are not checked; save one with --save",
+                  file=sys.stderr)
+    tolerance: float = args.tolerance if args.tolerance is not None else 1.5
+    results: dict[str, float] = {}
+    regressions: list[str] = []
+    print(f"{'benchmark':<36}{'ns/op':>12}{'peak B':>10}{'baseline':>12}")
+    for r in benchmarks(args.number):
+        results[r.name] = r.ns_per_op
+        base: str = ""
+        if r.name in baseline:
+            base = f"{r.ns_per_op / baseline[r.name]:>11.2f}x"
+            if r.ns_per_op > baseline[r.name] * tolerance:
+                regressions.append(r.name)
+        print(f"{r.name:<36}{r.ns_per_op:>12.0f}{r.peak_bytes:>10}{base:>12}")
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+    if regressions:
+        print("Regressions: " + ", ".join(regressions))
+        sys.exit(1)
@@ -15,9 +15,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from aiwolf import Agent, GameInfo, GameSetting, Role, Species
+from functools import partial
+from typing import Callable
+
+from aiwolf import Agent, GameInfo, GameSetting, Role
 from aiwolf.constant import AGENT_NONE
 
+from agentset import AgentSet
+from anytime import Selection
+from const import AGENT_SET_EMPTY
+from tracing import Action, Branch
 from villager import SampleVillager
 
 
@@ -29,23 +36,44 @@ class SampleBodyguard(SampleVillager):
         super().__init__()
         self.to_be_guarded: Agent = AGENT_NONE
         """Target of guard."""
+        self.register_search("guard", partial(self.search_selection, "guard"))
+        self.guard_rules: dict[str, Callable[[], tuple[AgentSet, Role]]] = {
+            # Guard one of the alive non-fake seers.
+            "SEERS": lambda: ((self.seers - self.fake_seers) & self.alive_agents, Role.SEER),
+            # Guard one of the alive mediums.
+            "MEDIUMS": lambda: (self.get_claimants(Role.MEDIUM) & self.alive_agents, Role.MEDIUM),
+        }
+        """Mapping between the name of a guard rule in params and the function choosing its candidates."""
 
     def initialize(self, game_info: GameInfo, game_setting: GameSetting) -> None:
         super().initialize(game_info, game_setting)
         self.to_be_guarded = AGENT_NONE
 
-    def guard(self) -> Agent:
-        # Guard one of the alive non-fake seers.
-        candidates: list[Agent] = self.get_alive([j.agent for j in self.divination_reports
-                                                  if j.result != Species.WEREWOLF or j.target != self.me])
-        # Guard one of the alive mediums if there are no candidates.
-        if not candidates:
-            candidates = [a for a in self.comingout_map if self.is_alive(a)
-                          and self.comingout_map[a] == Role.MEDIUM]
+    def commit(self, action: str, agent: Agent) -> Agent:
+        if action == "guard" and agent != self.me:
+            self.to_be_guarded = agent
+        return super().commit(action, agent)
+
+    def choose_guard(self) -> Agent:
+        # Try the guard rules in the order of the parameters.
+        candidates: AgentSet = AGENT_SET_EMPTY
+        role: Role = Role.SEER
+        branch: int = Branch.ALIVE_OTHERS
+        for rule in self.params.guard_rules:
+            candidates, role = self.guard_rules[rule]()
+            if candidates:
+                branch = getattr(Branch, rule)
+                break
         # Guard one of the alive sagents if there are no candidates.
         if not candidates:
-            candidates = self.get_alive_others(self.game_info.agent_list)
+            candidates = self.alive_others
+            role = Role.SEER
+            branch = Branch.ALIVE_OTHERS
+        self.selections["guard"] = Selection(candidates, role, True)
         # Update a guard candidate if the candidate is changed.
+        # Choose the candidate most likely to be genuine, preferring the one who has voted like me.
         if self.to_be_guarded == AGENT_NONE or self.to_be_guarded not in candidates:
-            self.to_be_guarded = self.random_select(candidates)
+            self.to_be_guarded = self.belief.select(
+                candidates, role, scores=lambda: self.vote_graph.similarity()[self.me.agent_idx - 1])
+        self.pending = (Action.GUARD, branch, candidates)
         return self.to_be_guarded if self.to_be_guarded != AGENT_NONE else self.me
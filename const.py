@@ -17,6 +17,10 @@
 
 from aiwolf import Content, Judge, SkipContentBuilder
 
+from agentset import AgentSet
+
 CONTENT_SKIP: Content = Content(SkipContentBuilder())
 
 JUDGE_EMPTY: Judge = Judge()
+
+AGENT_SET_EMPTY: AgentSet = AgentSet()
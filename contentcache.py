@@ -0,0 +1,150 @@
+#
+# contentcache.py
+#
+# Copyright 2022 OTSUKI Takashi
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from aiwolf import (Agent, AttackContentBuilder, ComingoutContentBuilder,
+                    Content, DivinedResultContentBuilder, IdentContentBuilder,
+                    Role, Species, VoteContentBuilder)
+
+
+class ContentCache:
+    """Bounded LRU cache of parsed contents keyed by the raw text.
+
+    The same Content object is returned for the same text,
+    so the returned contents are shared and must be treated as read-only.
+    """
+
+    def __init__(self, maxsize: int = 4096) -> None:
+        """Initialize a new instance of ContentCache.
+
+        Args:
+            maxsize: The maximum number of cached contents.
+        """
+        self.maxsize: int = maxsize
+        """The maximum number of cached contents."""
+        self.hits: int = 0
+        """The number of lookups answered from the cache."""
+        self.misses: int = 0
+        """The number of lookups that required parsing."""
+        self._cache: OrderedDict[str, Content] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def compile(self, text: str) -> Content:
+        """Return the Content parsed from the given text, parsing it only on a cache miss.
+
+        Args:
+            text: The text to be parsed.
+
+        Returns:
+            The shared Content parsed from text.
+        """
+        content: Optional[Content] = self._cache.get(text)
+        if content is not None:
+            self.hits += 1
+            self._cache.move_to_end(text)
+            return content
+        self.misses += 1
+        content = Content.compile(text)
+        self._cache[text] = content
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)  # Evict the least recently used content.
+        return content
+
+    def clear(self) -> None:
+        """Remove all cached contents and reset the counters."""
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+class ContentTable:
+    """Prebuilt contents of all the utterances possible in a regulation, indexed by agent_idx - 1.
+
+    The tables are built once per regulation and shared by all the agents,
+    so the returned contents, whose texts are already serialized, must be treated as read-only.
+    """
+
+    _tables: dict[tuple[int, tuple[Role, ...]], ContentTable] = {}
+
+    def __init__(self, agent_num: int, roles: Iterable[Role]) -> None:
+        """Initialize a new instance of ContentTable.
+
+        Args:
+            agent_num: The number of agents.
+            roles: The roles existing in the regulation.
+        """
+        agents: list[Agent] = [Agent(i + 1) for i in range(agent_num)]
+        role_list: tuple[Role, ...] = tuple(roles)
+        species: tuple[Species, ...] = (Species.HUMAN, Species.WEREWOLF)
+        self.vote_contents: list[Content] = [Content(VoteContentBuilder(a)) for a in agents]
+        """VOTE contents."""
+        self.attack_contents: list[Content] = [Content(AttackContentBuilder(a)) for a in agents]
+        """ATTACK contents."""
+        self.comingout_contents: list[dict[Role, Content]] = [
+            {r: Content(ComingoutContentBuilder(a, r)) for r in role_list} for a in agents]
+        """COMINGOUT contents per role."""
+        self.divined_contents: list[dict[Species, Content]] = [
+            {s: Content(DivinedResultContentBuilder(a, s)) for s in species} for a in agents]
+        """DIVINED contents per species."""
+        self.identified_contents: list[dict[Species, Content]] = [
+            {s: Content(IdentContentBuilder(a, s)) for s in species} for a in agents]
+        """IDENTIFIED contents per species."""
+
+    @staticmethod
+    def get(agent_num: int, roles: Iterable[Role]) -> ContentTable:
+        """Return the table of the regulation, building it on the first call.
+
+        Args:
+            agent_num: The number of agents.
+            roles: The roles existing in the regulation.
+
+        Returns:
+            The shared table.
+        """
+        key: tuple[int, tuple[Role, ...]] = (agent_num, tuple(roles))
+        table: Optional[ContentTable] = ContentTable._tables.get(key)
+        if table is None:
+            table = ContentTable._tables.setdefault(key, ContentTable(*key))
+        return table
+
+    def vote(self, target: Agent) -> Content:
+        """Return the content declaring the vote for the target."""
+        return self.vote_contents[target.agent_idx - 1]
+
+    def attack(self, target: Agent) -> Content:
+        """Return the content declaring the attack vote for the target."""
+        return self.attack_contents[target.agent_idx - 1]
+
+    def comingout(self, agent: Agent, role: Role) -> Content:
+        """Return the content of the comingout of the agent as the role."""
+        content: Optional[Content] = self.comingout_contents[agent.agent_idx - 1].get(role)
+        # A role out of the regulation is not interned.
+        return content if content is not None else Content(ComingoutContentBuilder(agent, role))
+
+    def divined(self, target: Agent, result: Species) -> Content:
+        """Return the content reporting the divination result of the target."""
+        return self.divined_contents[target.agent_idx - 1][result]
+
+    def identified(self, target: Agent, result: Species) -> Content:
+        """Return the content reporting the identification result of the target."""
+        return self.identified_contents[target.agent_idx - 1][result]
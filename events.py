@@ -0,0 +1,171 @@
+#
+# events.py
+#
+# Copyright 2022 OTSUKI Takashi
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Any, Callable, NamedTuple, TypeVar
+
+from aiwolf import Agent, Content, GameInfo, Talk, Vote, Whisper
+
+from contentcache import ContentCache
+
+
+class DayChanged(NamedTuple):
+    """A new day has started."""
+
+    day: int
+    """The new day."""
+
+
+class TalkReceived(NamedTuple):
+    """A new talk has been received."""
+
+    talk: Talk
+    """The talk."""
+    content: Content
+    """The shared content parsed from the talk."""
+
+
+class WhisperReceived(NamedTuple):
+    """A new whisper has been received."""
+
+    whisper: Whisper
+    """The whisper."""
+    content: Content
+    """The shared content parsed from the whisper."""
+
+
+class VoteCast(NamedTuple):
+    """A vote of the previous day has been disclosed."""
+
+    vote: Vote
+    """The vote."""
+
+
+class AttackVoteCast(NamedTuple):
+    """An attack vote of the previous night has been disclosed."""
+
+    vote: Vote
+    """The attack vote."""
+
+
+class AgentExecuted(NamedTuple):
+    """An agent was executed on the previous day."""
+
+    agent: Agent
+    """The executed agent."""
+    day: int
+    """The day of the execution."""
+
+
+class AgentDied(NamedTuple):
+    """An agent was killed on the previous night."""
+
+    agent: Agent
+    """The killed agent."""
+    day: int
+    """The day when the agent was found dead."""
+
+
+E = TypeVar("E")
+
+
+class EventDispatcher:
+    """Turn each game information into the events that happened since the last one,
+    and deliver them to the subscribed handlers.
+
+    Only the events having subscribers are extracted, and the talks and the whispers
+    are read from where they were read up to, so that an update costs O(delta).
+    """
+
+    def __init__(self, content_cache: ContentCache) -> None:
+        """Initialize a new instance of EventDispatcher.
+
+        Args:
+            content_cache: The cache used to parse the talks and the whispers.
+        """
+        self.content_cache: ContentCache = content_cache
+        """The cache used to parse the talks and the whispers."""
+        self.handlers: dict[type, list[Callable[[Any], None]]] = {}
+        """Mapping between an event type and its handlers."""
+        self.day: int = -1
+        """The day of the last game information."""
+        self.talk_head: int = 0
+        """Index of the talk to be read next."""
+        self.whisper_head: int = 0
+        """Index of the whisper to be read next."""
+
+    def subscribe(self, event_type: type[E], handler: Callable[[E], None]) -> None:
+        """Register the handler of the event type.
+
+        Args:
+            event_type: The type of the event.
+            handler: The function called with each event of event_type.
+        """
+        self.handlers.setdefault(event_type, []).append(handler)
+
+    def reset(self) -> None:
+        """Forget the last game information for a new game."""
+        self.day = -1
+        self.talk_head = 0
+        self.whisper_head = 0
+
+    def _emit(self, event_type: type, event: Any) -> None:
+        for handler in self.handlers[event_type]:
+            handler(event)
+
+    def dispatch(self, game_info: GameInfo) -> None:
+        """Deliver the events that happened since the last game information.
+
+        Args:
+            game_info: The current game information.
+        """
+        handlers: dict[type, list[Callable[[Any], None]]] = self.handlers
+        if game_info.day != self.day:
+            # The talks and the whispers are listed per day,
+            # and the votes and the deaths of the previous day are disclosed once on a new day.
+            self.day = game_info.day
+            self.talk_head = 0
+            self.whisper_head = 0
+            if DayChanged in handlers:
+                self._emit(DayChanged, DayChanged(game_info.day))
+            if VoteCast in handlers:
+                for vote in game_info.vote_list:
+                    self._emit(VoteCast, VoteCast(vote))
+            if AttackVoteCast in handlers:
+                for vote in game_info.attack_vote_list:
+                    self._emit(AttackVoteCast, AttackVoteCast(vote))
+            if AgentExecuted in handlers and game_info.executed_agent is not None:
+                self._emit(AgentExecuted, AgentExecuted(game_info.executed_agent, game_info.day - 1))
+            if AgentDied in handlers:
+                for agent in game_info.last_dead_agent_list:
+                    self._emit(AgentDied, AgentDied(agent, game_info.day))
+        if TalkReceived in handlers:
+            talk_list: list[Talk] = game_info.talk_list
+            # A list shorter than what was read is a new one of the same day, such as the one asyncclient rebuilds
+            # when the server sends fewer talks than before, and is read from the start.
+            if len(talk_list) < self.talk_head:
+                self.talk_head = 0
+            for i in range(self.talk_head, len(talk_list)):
+                self._emit(TalkReceived, TalkReceived(talk_list[i], self.content_cache.compile(talk_list[i].text)))
+            self.talk_head = len(talk_list)
+        if WhisperReceived in handlers:
+            whisper_list: list[Whisper] = game_info.whisper_list
+            if len(whisper_list) < self.whisper_head:
+                self.whisper_head = 0
+            for i in range(self.whisper_head, len(whisper_list)):
+                self._emit(WhisperReceived,
+                           WhisperReceived(whisper_list[i], self.content_cache.compile(whisper_list[i].text)))
+            self.whisper_head = len(whisper_list)
@@ -18,12 +18,14 @@
 from collections import deque
 from typing import Optional
 
-from aiwolf import (Agent, ComingoutContentBuilder, Content, GameInfo,
-                    GameSetting, IdentContentBuilder, Judge, Role, Species,
-                    VoteContentBuilder)
+from aiwolf import Content, GameInfo, GameSetting, Judge, Role, Species
 from aiwolf.constant import AGENT_NONE
 
+from agentset import AgentSet
+from anytime import Selection
 from const import CONTENT_SKIP
+from openingbook import Opening
+from tracing import Action, Branch
 from villager import SampleVillager
 
 
@@ -44,7 +46,7 @@ class SampleMedium(SampleVillager):
 
     def initialize(self, game_info: GameInfo, game_setting: GameSetting) -> None:
         super().initialize(game_info, game_setting)
-        self.co_date = 3
+        self.co_date = self.get_opening(Opening(Role.MEDIUM, self.params.medium_co_date)).co_date
         self.found_wolf = False
         self.has_co = False
         self.my_judge_queue.clear()
@@ -55,6 +57,7 @@ class SampleMedium(SampleVillager):
         judge: Optional[Judge] = self.game_info.medium_result
         if judge is not None:
             self.my_judge_queue.append(judge)
+            self.belief.set_species(judge.target, judge.result)
             if judge.result == Species.WEREWOLF:
                 self.found_wolf = True
 
@@ -62,32 +65,39 @@ class SampleMedium(SampleVillager):
         # Do comingout if it's on scheduled day or a werewolf is found.
         if not self.has_co and (self.game_info.day == self.co_date or self.found_wolf):
             self.has_co = True
-            return Content(ComingoutContentBuilder(self.me, Role.MEDIUM))
+            self.trace(Action.TALK, Branch.COMINGOUT)
+            return self.contents.comingout(self.me, Role.MEDIUM)
         # Report the medium result after doing comingout.
         if self.has_co and self.my_judge_queue:
             judge: Judge = self.my_judge_queue.popleft()
-            return Content(IdentContentBuilder(judge.target, judge.result))
-        # Fake seers.
-        fake_seers: list[Agent] = [j.agent for j in self.divination_reports
-                                   if j.target == self.me and j.result == Species.WEREWOLF]
+            self.trace(Action.TALK, Branch.REPORT, choice=judge.target)
+            return self.contents.identified(judge.target, judge.result)
+        # Keep the vote candidate if nothing has changed since it was chosen.
+        if self.is_vote_candidate_fresh():
+            return CONTENT_SKIP
         # Vote for one of the alive fake mediums.
-        candidates: list[Agent] = [a for a in self.comingout_map
-                                   if self.is_alive(a) and self.comingout_map[a] == Role.MEDIUM]
+        candidates: AgentSet = self.get_claimants(Role.MEDIUM) & self.alive_agents
+        branch: int = Branch.CLAIMANTS
         # Vote for one of the alive agents that were judged as werewolves by non-fake seers
         # if there are no candidates.
         if not candidates:
-            reported_wolves: list[Agent] = [j.target for j in self.divination_reports
-                                            if j.agent not in fake_seers and j.result == Species.WEREWOLF]
-            candidates = self.get_alive_others(reported_wolves)
+            candidates = self.reported_wolves & self.alive_others
+            branch = Branch.REPORTED_WOLVES
         # Vote for one of the alive fake seers if there are no candidates.
         if not candidates:
-            candidates = self.get_alive(fake_seers)
+            candidates = self.fake_seers & self.alive_agents
+            branch = Branch.FAKE_SEERS
         # Vote for one of the alive agents if there are no candidates.
         if not candidates:
-            candidates = self.get_alive_others(self.game_info.agent_list)
+            candidates = self.alive_others
+            branch = Branch.ALIVE_OTHERS
+        self.vote_candidate_version = self.version
+        self.selections["vote"] = Selection(candidates, Role.WEREWOLF, True)
         # Declare which to vote for if not declare yet or the candidate is changed.
+        # Choose the candidate most likely to be a werewolf.
         if self.vote_candidate == AGENT_NONE or self.vote_candidate not in candidates:
-            self.vote_candidate = self.random_select(candidates)
+            self.vote_candidate = self.belief.select(candidates, Role.WEREWOLF, scores=self.get_suspicion)
+            self.trace(Action.TALK, branch, candidates, self.vote_candidate)
             if self.vote_candidate != AGENT_NONE:
-                return Content(VoteContentBuilder(self.vote_candidate))
+                return self.contents.vote(self.vote_candidate)
         return CONTENT_SKIP
@@ -0,0 +1,122 @@
+#!/usr/bin/env -S python -B
+#
+# memcheck.py
+#
+# Copyright 2022 OTSUKI Takashi
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gc
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from collections import Counter
+from typing import NamedTuple
+
+from aiwolf import AbstractPlayer
+
+from sample import SamplePlayer
+from simulator import run_game
+
+
+class Sample(NamedTuple):
+    """Memory usage of the process after a game."""
+
+    game: int
+    """The number of games played."""
+    traced: int
+    """Bytes allocated by Python and still alive."""
+    objects: int
+    """The number of objects tracked by the garbage collector."""
+    rss: int
+    """Resident set size in bytes."""
+
+
+def get_rss() -> int:
+    """Return the current resident set size, or the peak one where the current one is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def measure(game: int) -> Sample:
+    """Return the memory usage left after collecting the garbage."""
+    gc.collect()
+    return Sample(game, tracemalloc.get_traced_memory()[0], len(gc.get_objects()), get_rss())
+
+
+def count_types() -> Counter[str]:
+    """Return the number of objects tracked by the garbage collector per type."""
+    gc.collect()
+    return Counter(type(o).__qualname__ for o in gc.get_objects())
+
+
+if __name__ == "__main__":
+    parser: ArgumentParser = ArgumentParser(
+        description="Play consecutive games with the same players and check that the memory usage stays flat.")
+    parser.add_argument("-g", "--games", type=int, default=2000)
+    parser.add_argument("-n", "--players", type=int, choices=(5, 15), default=15)
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("-w", "--warmup", type=int, default=200,
+                        help="games played before the baseline is taken, to fill the caches")
+    parser.add_argument("-i", "--interval", type=int, default=100, help="games between the progress lines")
+    parser.add_argument("--max-traced", type=int, default=256 * 1024,
+                        help="fail if the traced memory grows by more bytes than this after the warmup")
+    parser.add_argument("--max-objects", type=int, default=1000,
+                        help="fail if the number of objects grows by more than this after the warmup")
+    parser.add_argument("--max-rss", type=int, default=16 * 1024 * 1024,
+                        help="fail if the resident set size grows by more bytes than this after the warmup")
+    args = parser.parse_args()
+    # The players live as long as the process, as they do in a client connected for days.
+    players: list[AbstractPlayer] = [SamplePlayer() for _ in range(args.players)]
+    tracemalloc.start()
+    samples: list[Sample] = []
+    baseline: Sample = measure(0)
+    snapshot: tracemalloc.Snapshot = tracemalloc.take_snapshot()
+    types: Counter[str] = Counter()
+    start: float = time.perf_counter()
+    print(f"{'game':>8}{'traced':>12}{'objects':>10}{'rss':>12}")
+    for game in range(1, args.warmup + args.games + 1):
+        run_game(players, args.seed + game)
+        sample: Sample = measure(game)
+        samples.append(sample)
+        if game == args.warmup:
+            baseline = sample
+            snapshot = tracemalloc.take_snapshot()
+            types = count_types()
+        if game % args.interval == 0:
+            print(f"{sample.game:>8}{sample.traced:>12}{sample.objects:>10}{sample.rss:>12}")
+    elapsed: float = time.perf_counter() - start
+    last: Sample = samples[-1]
+    growth: Sample = Sample(last.game - baseline.game, last.traced - baseline.traced,
+                            last.objects - baseline.objects, last.rss - baseline.rss)
+    print(f"{len(samples)} games in {elapsed:.1f}s")
+    print(f"growth over {growth.game} games: traced {growth.traced:+} B, objects {growth.objects:+}, "
+          f"rss {growth.rss:+} B")
+    failures: list[str] = [name for name, value, limit in (("traced", growth.traced, args.max_traced),
+                                                           ("objects", growth.objects, args.max_objects),
+                                                           ("rss", growth.rss, args.max_rss)) if value > limit]
+    if failures:
+        print("Exceeded: " + ", ".join(failures))
+        print("Largest growth by line:")
+        for stat in tracemalloc.take_snapshot().compare_to(snapshot, "lineno")[:10]:
+            print(f"  {stat}")
+        print("Largest growth by type:")
+        for name, n in (count_types() - types).most_common(10):
+            print(f"  {name}: {n:+}")
+        sys.exit(1)
@@ -0,0 +1,249 @@
+#
+# metrics.py
+#
+# Copyright 2022 OTSUKI Takashi
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import bisect
+import json
+import os
+import time
+from typing import Optional
+
+from aiwolf import (AbstractPlayer, Agent, Content, GameInfo, GameSetting,
+                    Role)
+
+BUCKETS: tuple[float, ...] = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                              0.1, 0.25, 0.5, 1.0)
+"""Upper bounds in seconds of the latency histogram buckets."""
+
+
+class Histogram:
+    """Cumulative latency histogram in the Prometheus style."""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self) -> None:
+        """Initialize a new instance of Histogram."""
+        self.counts: list[int] = [0] * (len(BUCKETS) + 1)
+        """Number of observations per bucket. The last one counts those over the largest bound."""
+        self.sum: float = 0.0
+        """Sum of the observed latencies in seconds."""
+        self.count: int = 0
+        """Number of observations."""
+
+    def observe(self, seconds: float) -> None:
+        """Record the latency."""
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class Metrics:
+    """Latency histograms of the callbacks per callback, role and day,
+    and counts of the requests that came close to the time limit."""
+
+    def __init__(self, budget: Optional[float] = None, near_fraction: float = 0.8) -> None:
+        """Initialize a new instance of Metrics.
+
+        Args:
+            budget: Time limit of a request in seconds. The time limit of the game setting is used if None.
+            near_fraction: Fraction of the budget over which a request is counted as near timeout.
+        """
+        self.budget: Optional[float] = budget
+        """Time limit of a request in seconds."""
+        self.near_fraction: float = near_fraction
+        """Fraction of the budget over which a request is counted as near timeout."""
+        self.histograms: dict[tuple[str, str, int], Histogram] = {}
+        """Mapping between (callback, role, day) and its latency histogram."""
+        self.near_timeouts: dict[tuple[str, str], int] = {}
+        """Mapping between (callback, role) and the number of requests near timeout."""
+
+    def observe(self, callback: str, role: str, day: int, seconds: float) -> None:
+        """Record the latency of the callback.
+
+        Args:
+            callback: The name of the callback.
+            role: The role of the agent.
+            day: The day of the game.
+            seconds: The latency in seconds.
+        """
+        key: tuple[str, str, int] = (callback, role, day)
+        histogram: Optional[Histogram] = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(seconds)
+        if self.budget is not None and seconds > self.budget * self.near_fraction:
+            self.near_timeouts[callback, role] = self.near_timeouts.get((callback, role), 0) + 1
+
+    def to_prometheus(self) -> str:
+        """Return the snapshot in the Prometheus text exposition format."""
+        lines: list[str] = ["# TYPE aiwolf_callback_latency_seconds histogram"]
+        for (callback, role, day), h in sorted(self.histograms.items()):
+            labels: str = f'callback="{callback}",role="{role}",day="{day}"'
+            cumulative: int = 0
+            for bound, c in zip(BUCKETS, h.counts):
+                cumulative += c
+                lines.append(f'aiwolf_callback_latency_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'aiwolf_callback_latency_seconds_bucket{{{labels},le="+Inf"}} {h.count}')
+            lines.append(f"aiwolf_callback_latency_seconds_sum{{{labels}}} {h.sum}")
+            lines.append(f"aiwolf_callback_latency_seconds_count{{{labels}}} {h.count}")
+        lines.append("# TYPE aiwolf_callback_near_timeout_total counter")
+        for (callback, role), n in sorted(self.near_timeouts.items()):
+            lines.append(f'aiwolf_callback_near_timeout_total{{callback="{callback}",role="{role}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+    def to_json_lines(self) -> str:
+        """Return the snapshot as JSON lines, one per histogram, stamped with the current time."""
+        now: float = time.time()
+        lines: list[str] = [json.dumps({"time": now, "callback": c, "role": r, "day": d, "buckets": list(BUCKETS),
+                                        "counts": h.counts, "sum": h.sum, "count": h.count,
+                                        "near_timeout": self.near_timeouts.get((c, r), 0)})
+                            for (c, r, d), h in sorted(self.histograms.items())]
+        return "".join(line + "\n" for line in lines)
+
+    def export(self, path: str, format: str = "prometheus") -> None:
+        """Write the snapshot to the file.
+
+        The Prometheus text replaces the file, and JSON lines are appended to it.
+
+        Args:
+            path: The path of the file.
+            format: "prometheus" or "jsonl".
+        """
+        if format == "jsonl":
+            with open(path, "a") as f:
+                f.write(self.to_json_lines())
+        else:
+            with open(path + ".tmp", "w") as f:
+                f.write(self.to_prometheus())
+            os.replace(path + ".tmp", path)
+
+
+_process_metrics: Optional[tuple[int, Metrics]] = None
+"""The metrics shared by the players of this process, with the pid of the process."""
+
+
+def process_metrics(budget: Optional[float] = None) -> Metrics:
+    """Return the metrics shared by all the players of this process.
+
+    A forked process gets its own metrics instead of the copy of its parent's.
+
+    Args:
+        budget: Time limit of a request in seconds, used when the metrics are created.
+    """
+    global _process_metrics
+    if _process_metrics is None or _process_metrics[0] != os.getpid():
+        _process_metrics = (os.getpid(), Metrics(budget))
+    return _process_metrics[1]
+
+
+def process_path(path: str) -> str:
+    """Return the path with the pid of this process inserted before the extension,
+    so that the processes do not overwrite each other's snapshots."""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{os.getpid()}{ext}"
+
+
+class InstrumentedPlayer(AbstractPlayer):
+    """Player that forwards every request to the wrapped player and records its latency."""
+
+    def __init__(self, player: AbstractPlayer, metrics: Metrics,
+                 path: Optional[str] = None, format: str = "prometheus") -> None:
+        """Initialize a new instance of InstrumentedPlayer.
+
+        Args:
+            player: The player to be wrapped.
+            metrics: The metrics to record the latencies in.
+            path: The file the snapshot is exported to at the end of every game. Not exported if None.
+            format: "prometheus" or "jsonl".
+        """
+        self.player: AbstractPlayer = player
+        """The wrapped player."""
+        self.metrics: Metrics = metrics
+        """The metrics to record the latencies in."""
+        self.path: Optional[str] = path
+        """The file the snapshot is exported to."""
+        self.format: str = format
+        """The format of the snapshot."""
+        self.role: str = Role.UNC.value
+        """The role in the current game."""
+        self.day: int = 0
+        """The current day."""
+
+    def _observe(self, callback: str, start: float) -> None:
+        self.metrics.observe(callback, self.role, self.day, time.perf_counter() - start)
+
+    def attack(self) -> Agent:
+        start: float = time.perf_counter()
+        target: Agent = self.player.attack()
+        self._observe("attack", start)
+        return target
+
+    def day_start(self) -> None:
+        start: float = time.perf_counter()
+        self.player.day_start()
+        self._observe("day_start", start)
+
+    def divine(self) -> Agent:
+        start: float = time.perf_counter()
+        target: Agent = self.player.divine()
+        self._observe("divine", start)
+        return target
+
+    def finish(self) -> None:
+        start: float = time.perf_counter()
+        self.player.finish()
+        self._observe("finish", start)
+        if self.path is not None:
+            self.metrics.export(self.path, self.format)
+
+    def guard(self) -> Agent:
+        start: float = time.perf_counter()
+        target: Agent = self.player.guard()
+        self._observe("guard", start)
+        return target
+
+    def initialize(self, game_info: GameInfo, game_setting: GameSetting) -> None:
+        self.role = game_info.my_role.value
+        self.day = game_info.day
+        if self.metrics.budget is None:
+            self.metrics.budget = game_setting.time_limit / 1000
+        start: float = time.perf_counter()
+        self.player.initialize(game_info, game_setting)
+        self._observe("initialize", start)
+
+    def talk(self) -> Content:
+        start: float = time.perf_counter()
+        content: Content = self.player.talk()
+        self._observe("talk", start)
+        return content
+
+    def update(self, game_info: GameInfo) -> None:
+        self.day = game_info.day
+        start: float = time.perf_counter()
+        self.player.update(game_info)
+        self._observe("update", start)
+
+    def vote(self) -> Agent:
+        start: float = time.perf_counter()
+        target: Agent = self.player.vote()
+        self._observe("vote", start)
+        return target
+
+    def whisper(self) -> Content:
+        start: float = time.perf_counter()
+        content: Content = self.player.whisper()
+        self._observe("whisper", start)
+        return content
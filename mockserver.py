@@ -0,0 +1,351 @@
+#!/usr/bin/env -S python -B
+#
+# mockserver.py
+#
+# Copyright 2022 OTSUKI Takashi
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import math
+import shlex
+import socket
+import subprocess
+import threading
+import time
+from argparse import ArgumentParser
+from typing import Any, Optional
+
+from aiwolf import AbstractPlayer, Agent, Content, GameInfo, GameSetting, Role, Talk
+from aiwolf.constant import AGENT_NONE
+
+from simulator import GameResult, GameSimulator
+
+REQUESTS: tuple[str, ...] = ("NAME", "ROLE", "TALK", "WHISPER", "VOTE", "ATTACK", "DIVINE", "GUARD")
+"""Requests answered by the agents, whose round trips are measured."""
+
+
+def _talk_json(talk: Talk) -> dict[str, Any]:
+    return {"idx": talk.idx, "day": talk.day, "turn": talk.turn, "agent": talk.agent.agent_idx, "text": talk.text}
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Return the q-th percentile of the sorted values by the nearest-rank method."""
+    return values[max(0, math.ceil(q / 100 * len(values)) - 1)] if values else 0.0
+
+
+class Latencies:
+    """Round-trip times of the requests, shared by the tables running in threads."""
+
+    def __init__(self) -> None:
+        """Initialize a new instance of Latencies."""
+        self.lock: threading.Lock = threading.Lock()
+        """Lock guarding the samples."""
+        self.samples: dict[str, list[float]] = {r: [] for r in REQUESTS}
+        """Mapping between a request and its round-trip times in seconds."""
+        self.timeouts: dict[str, int] = dict.fromkeys(REQUESTS, 0)
+        """Mapping between a request and the number of the responses later than the timeout."""
+
+    def add(self, request: str, seconds: float, timed_out: bool) -> None:
+        """Record a round trip."""
+        with self.lock:
+            self.samples[request].append(seconds)
+            self.timeouts[request] += timed_out
+
+    def report(self) -> list[tuple[str, int, float, float, float, int]]:
+        """Return the statistics per request.
+
+        Returns:
+            A list of (request, count, p50, p99, max, timeouts) in seconds.
+            The request "ALL" aggregates all the requests.
+        """
+        with self.lock:
+            rows: list[tuple[str, list[float], int]] = [(r, sorted(s), self.timeouts[r])
+                                                        for r, s in self.samples.items() if s]
+        rows.append(("ALL", sorted(v for _, s, _ in rows for v in s), sum(t for _, _, t in rows)))
+        return [(r, len(s), percentile(s, 50), percentile(s, 99), s[-1] if s else 0.0, t) for r, s, t in rows]
+
+
+class Connection:
+    """Connection to an agent, which sends packets and measures the round trips of the answers."""
+
+    def __init__(self, sock: socket.socket, latencies: Latencies, timeout: float) -> None:
+        """Initialize a new instance of Connection.
+
+        Args:
+            sock: The accepted socket.
+            latencies: The recorder of the round trips.
+            timeout: Seconds after which an answer is counted as a timeout.
+        """
+        self.sock: socket.socket = sock
+        """The socket."""
+        self.latencies: Latencies = latencies
+        """The recorder of the round trips."""
+        self.timeout: float = timeout
+        """Seconds after which an answer is counted as a timeout."""
+        self.buffer: bytes = b""
+        """Bytes received after the last line."""
+
+    @staticmethod
+    def encode(request: str, **fields: Any) -> bytes:
+        """Return the packet in JSON ending with a newline."""
+        packet: dict[str, Any] = {"request": request, "gameInfo": None, "gameSetting": None,
+                                  "talkHistory": None, "whisperHistory": None}
+        packet.update(fields)
+        return json.dumps(packet, separators=(",", ":")).encode() + b"\n"
+
+    def send(self, request: str, **fields: Any) -> None:
+        """Send a packet that needs no answer."""
+        self.sock.sendall(self.encode(request, **fields))
+
+    def ask(self, request: str, **fields: Any) -> Optional[str]:
+        """Send a packet and return the answer, or None if it is later than the timeout.
+
+        A late answer is still read, so that the next packet is answered in order,
+        but it is discarded as the server does.
+        """
+        packet: bytes = self.encode(request, **fields)  # Not measured as the agent's time.
+        start: float = time.perf_counter()
+        self.sock.sendall(packet)
+        while b"\n" not in self.buffer:
+            data: bytes = self.sock.recv(65536)
+            if not data:
+                raise ConnectionError("the agent closed the connection")
+            self.buffer += data
+        line, _, self.buffer = self.buffer.partition(b"\n")
+        seconds: float = time.perf_counter() - start
+        timed_out: bool = seconds > self.timeout
+        self.latencies.add(request, seconds, timed_out)
+        return None if timed_out else line.decode().strip()
+
+    def close(self) -> None:
+        """Close the socket."""
+        self.sock.close()
+
+
+class RemotePlayer(AbstractPlayer):
+    """Player of the simulator that forwards each callback to an agent over its connection."""
+
+    def __init__(self, connection: Connection, interval: float) -> None:
+        """Initialize a new instance of RemotePlayer.
+
+        Args:
+            connection: The connection to the agent.
+            interval: Seconds to wait before each request.
+        """
+        self.connection: Connection = connection
+        """The connection to the agent."""
+        self.interval: float = interval
+        """Seconds to wait before each request."""
+        self.simulator: GameSimulator = None  # type: ignore
+        """The simulator of the current game."""
+        self.idx: int = 0
+        """The agent number in the current game."""
+        self.talk_head: int = 0
+        """The number of the talks of the day already sent."""
+        self.whisper_head: int = 0
+        """The number of the whispers of the day already sent."""
+
+    def bind(self, simulator: GameSimulator, idx: int) -> None:
+        """Take the seat of the agent number in the game."""
+        self.simulator = simulator
+        self.idx = idx
+
+    def _game_info(self, reveal: bool = False) -> dict[str, Any]:
+        game_info: dict[str, Any] = self.simulator.make_game_info(self.idx, reveal)
+        game_info["talkList"] = [_talk_json(t) for t in self.simulator.talks]
+        game_info["whisperList"] = [_talk_json(w) for w in self.simulator.whispers] \
+            if self.simulator.roles[self.idx] == Role.WEREWOLF else []
+        self.talk_head = len(self.simulator.talks)
+        self.whisper_head = len(game_info["whisperList"])
+        return game_info
+
+    def _histories(self) -> dict[str, Any]:
+        talks: list[dict[str, Any]] = [_talk_json(t) for t in self.simulator.talks[self.talk_head:]]
+        whispers: list[dict[str, Any]] = [_talk_json(w) for w in self.simulator.whispers[self.whisper_head:]] \
+            if self.simulator.roles[self.idx] == Role.WEREWOLF else []
+        self.talk_head = len(self.simulator.talks)
+        self.whisper_head += len(whispers)
+        return {"talkHistory": talks, "whisperHistory": whispers}
+
+    def _fields(self) -> dict[str, Any]:
+        # Send the current game information with the histories as the server does,
+        # so that the agent sees the execution and the attack before it acts.
+        fields: dict[str, Any] = self._histories()
+        fields["gameInfo"] = self._game_info()
+        return fields
+
+    def _ask(self, request: str) -> Optional[str]:
+        if self.interval > 0:
+            time.sleep(self.interval)
+        return self.connection.ask(request, **self._fields())
+
+    def _ask_agent(self, request: str) -> Agent:
+        answer: Optional[str] = self._ask(request)
+        return Agent(int(json.loads(answer)["agentIdx"])) if answer else AGENT_NONE
+
+    def initialize(self, game_info: GameInfo, game_setting: GameSetting) -> None:
+        self.connection.send("INITIALIZE", gameInfo=self._game_info(), gameSetting=self.simulator.setting_json)
+
+    def update(self, game_info: GameInfo) -> None:
+        pass  # The packets of the requests carry the updates.
+
+    def day_finish(self) -> None:
+        """Tell the agent that the talks of the day are over."""
+        self.connection.send("DAILY_FINISH", **self._fields())
+
+    def day_start(self) -> None:
+        self.talk_head = self.whisper_head = 0
+        self.connection.send("DAILY_INITIALIZE", gameInfo=self._game_info())
+
+    def talk(self) -> Content:
+        answer: Optional[str] = self._ask("TALK")
+        return Content.compile(answer) if answer else None  # type: ignore
+
+    def whisper(self) -> Content:
+        answer: Optional[str] = self._ask("WHISPER")
+        return Content.compile(answer) if answer else None  # type: ignore
+
+    def vote(self) -> Agent:
+        return self._ask_agent("VOTE")
+
+    def attack(self) -> Agent:
+        return self._ask_agent("ATTACK")
+
+    def divine(self) -> Agent:
+        return self._ask_agent("DIVINE")
+
+    def guard(self) -> Agent:
+        return self._ask_agent("GUARD")
+
+    def finish(self) -> None:
+        self.connection.send("FINISH", gameInfo=self._game_info(True))
+
+
+class RemoteSimulator(GameSimulator):
+    """Game simulator that also sends DAILY_FINISH to the remote players."""
+
+    def __init__(self, players: list[RemotePlayer], seed: int, **settings: Any) -> None:
+        """Initialize a new instance of RemoteSimulator.
+
+        Args:
+            players: The players. The n-th player plays Agent[n+1].
+            seed: The random seed.
+            **settings: Values overriding the default game setting.
+        """
+        super().__init__(players, seed, **settings)
+        self.remote_players: list[RemotePlayer] = players
+        """The players."""
+
+    def day_finish(self) -> None:
+        super().day_finish()
+        for player in self.remote_players:
+            player.day_finish()
+
+
+def run_table(players: list[RemotePlayer], games: int, seed: int, settings: dict[str, Any],
+              results: list[GameResult], verbose: bool = False) -> None:
+    """Play the games in turn among the players of a table.
+
+    Args:
+        players: The players seated at the table.
+        games: The number of games.
+        seed: The seed of the first game. The game n is played with the seed (seed + n).
+        settings: Values overriding the default game setting.
+        results: The list the results are appended to.
+        verbose: Whether to print the result of each game.
+    """
+    for g in range(games):
+        simulator: GameSimulator = RemoteSimulator(players, seed + g, **settings)
+        for i, p in enumerate(players):
+            p.bind(simulator, i + 1)
+        result: GameResult = simulator.run()
+        results.append(result)
+        if verbose:
+            print(f"game {seed + g}: {result.winner.value} won on day {result.day}", flush=True)
+
+
+if __name__ == "__main__":
+    parser: ArgumentParser = ArgumentParser(
+        description="Serve scripted games to agents as the AIWolf server does and measure their latencies.")
+    parser.add_argument("-H", "--host", type=str, default="127.0.0.1")
+    parser.add_argument("-p", "--port", type=int, default=10000)
+    parser.add_argument("-n", "--players", type=int, choices=(5, 15), default=15)
+    parser.add_argument("-t", "--tables", type=int, default=1, help="number of games played at the same time")
+    parser.add_argument("-g", "--games", type=int, default=10, help="number of games per table")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=1.0, help="seconds after which an answer is a timeout")
+    parser.add_argument("--interval", type=float, default=0.0, help="seconds to wait before each request")
+    parser.add_argument("--max-talk", type=int, default=10, help="number of talks per agent per day")
+    parser.add_argument("--max-talk-turn", type=int, default=20, help="number of talk turns per day")
+    parser.add_argument("-c", "--command", type=str,
+                        help="command starting the agents after listening, such as "
+                             "\"python start.py -h {host} -p {port} --connections 15\"")
+    parser.add_argument("--processes", type=int, default=1, help="number of the commands started")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+    latencies: Latencies = Latencies()
+    settings: dict[str, Any] = {"maxTalk": args.max_talk, "maxTalkTurn": args.max_talk_turn,
+                                "maxWhisper": args.max_talk, "maxWhisperTurn": args.max_talk_turn,
+                                "timeLimit": int(args.timeout * 1000)}
+    server: socket.socket = socket.create_server((args.host, args.port))
+    server.listen()
+    agents: list[subprocess.Popen] = []
+    if args.command is not None:
+        agents = [subprocess.Popen(shlex.split(args.command.format(host=args.host, port=args.port)))
+                  for _ in range(args.processes)]
+    connections: list[Connection] = []
+    tables: list[list[RemotePlayer]] = []
+    try:
+        print(f"waiting for {args.tables * args.players} agents on {args.host}:{args.port}", flush=True)
+        server.settimeout(1.0)
+        while len(connections) < args.tables * args.players:
+            try:
+                sock, _ = server.accept()
+            except socket.timeout:
+                if agents and all(a.poll() is not None for a in agents):
+                    raise SystemExit("the agents exited before connecting")
+                continue
+            sock.settimeout(None)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            connection: Connection = Connection(sock, latencies, args.timeout)
+            connections.append(connection)
+            connection.ask("NAME")
+            connection.ask("ROLE")
+        tables = [[RemotePlayer(c, args.interval) for c in connections[i:i + args.players]]
+                  for i in range(0, len(connections), args.players)]
+        results: list[GameResult] = []
+        start: float = time.perf_counter()
+        threads: list[threading.Thread] = [
+            threading.Thread(target=run_table,
+                             args=(table, args.games, args.seed + t * args.games, settings, results, args.verbose))
+            for t, table in enumerate(tables)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed: float = time.perf_counter() - start
+    finally:
+        for c in connections:
+            c.close()
+        server.close()
+        for agent in agents:
+            try:  # The agents end when the connections are closed.
+                agent.wait(10)
+            except subprocess.TimeoutExpired:
+                agent.terminate()
+    print(f"{len(results)} games on {len(tables)} tables in {elapsed:.1f}s "
+          f"({len(results) / elapsed * 60:.0f} games/min)")
+    print(f"{'request':<10}{'count':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'timeouts':>10}")
+    for request, count, p50, p99, longest, timeouts in latencies.report():
+        print(f"{request:<10}{count:>10}{p50 * 1000:>10.2f}{p99 * 1000:>10.2f}{longest * 1000:>10.2f}{timeouts:>10}")
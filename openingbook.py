@@ -0,0 +1,204 @@
+#!/usr/bin/env -S python -B
+#
+# openingbook.py
+#
+# Copyright 2022 OTSUKI Takashi
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mmap
+import os
+import random
+import struct
+import time
+from argparse import ArgumentParser
+from multiprocessing import Pool
+from typing import Iterable, NamedTuple, Optional, Sequence, Union
+
+from aiwolf import AbstractPlayer, Role, Species
+
+from records import ROLE_CODES
+from simulator import REGULATIONS, WEREWOLF_TEAM, GameResult, run_game
+
+MAGIC: bytes = b"AWOB"
+"""Magic number at the head of an opening book."""
+
+VERSION: int = 1
+"""Version of the format of an opening book."""
+
+
+class Opening(NamedTuple):
+    """Opening decisions of an agent."""
+
+    claim: Role
+    """The role to claim, which is the agent's own role for a seer or a medium. VILLAGER not to claim any."""
+    co_date: int
+    """The day of the comingout."""
+
+
+OPENINGS: list[Opening] = [Opening(r, d) for r in (Role.VILLAGER, Role.SEER, Role.MEDIUM) for d in (1, 2, 3)]
+"""Openings whose weights are stored in each entry, in the order of the weights."""
+
+HEADER: struct.Struct = struct.Struct("<4sHH")
+"""Magic number, version and the number of entries."""
+
+ENTRY: struct.Struct = struct.Struct("<BHB" + "H" * len(OPENINGS))
+"""Number of players, mask of the existing roles, role, and the weights of the openings."""
+
+Key = tuple[int, tuple[Role, ...], Role]
+"""Number of players, existing roles and role, which an entry is looked up with."""
+
+
+def pack_key(player_num: int, existing_roles: Iterable[Role], role: Role) -> tuple[int, int, int]:
+    """Return the fields of an entry identifying the regulation and the role."""
+    mask: int = 0
+    for r in existing_roles:
+        mask |= 1 << ROLE_CODES[r]
+    return player_num, mask, ROLE_CODES[role]
+
+
+def pack_book(entries: dict[Key, Sequence[int]]) -> bytes:
+    """Return an opening book in the binary format.
+
+    Args:
+        entries: Mapping between a key and the weights of OPENINGS.
+
+    Returns:
+        The opening book.
+    """
+    return HEADER.pack(MAGIC, VERSION, len(entries)) + b"".join(
+        ENTRY.pack(*pack_key(*key), *weights) for key, weights in entries.items())
+
+
+def write_book(path: str, entries: dict[Key, Sequence[int]]) -> None:
+    """Write an opening book to the file atomically."""
+    temp: str = f"{path}.tmp"
+    with open(temp, "wb") as f:
+        f.write(pack_book(entries))
+    os.replace(temp, path)
+
+
+class OpeningBook:
+    """Table of the weights of the openings per regulation and role, read from a buffer in place."""
+
+    def __init__(self, buffer: Union[bytes, mmap.mmap]) -> None:
+        """Initialize a new instance of OpeningBook.
+
+        Args:
+            buffer: The opening book in the binary format.
+
+        Raises:
+            ValueError: If the buffer is not an opening book of this version.
+        """
+        magic, version, count = HEADER.unpack_from(buffer)
+        if magic != MAGIC or version != VERSION or len(buffer) != HEADER.size + count * ENTRY.size:
+            raise ValueError(f"not an opening book of version {VERSION}")
+        self.buffer: Union[bytes, mmap.mmap] = buffer
+        """The opening book in the binary format."""
+        self.offsets: dict[tuple[int, int, int], int] = {}
+        """Mapping between the key fields and the offset of the entry."""
+        for offset in range(HEADER.size, len(buffer), ENTRY.size):
+            self.offsets[ENTRY.unpack_from(buffer, offset)[:3]] = offset
+
+    @classmethod
+    def open(cls, path: str) -> "OpeningBook":
+        """Return the opening book memory-mapped from the file."""
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def get_weights(self, player_num: int, existing_roles: Iterable[Role], role: Role) -> Optional[tuple[int, ...]]:
+        """Return the weights of OPENINGS for the role in the regulation, or None if not in the book."""
+        offset: Optional[int] = self.offsets.get(pack_key(player_num, existing_roles, role))
+        return ENTRY.unpack_from(self.buffer, offset)[3:] if offset is not None else None
+
+    def choose(self, player_num: int, existing_roles: Iterable[Role], role: Role) -> Optional[Opening]:
+        """Return an opening for the role in the regulation chosen with the weights in the book.
+
+        Args:
+            player_num: The number of players.
+            existing_roles: The roles in the game.
+            role: The role.
+
+        Returns:
+            The opening, or None if the book has no entry.
+        """
+        weights: Optional[tuple[int, ...]] = self.get_weights(player_num, existing_roles, role)
+        if weights is None or not any(weights):
+            return None
+        return random.choices(OPENINGS, weights)[0]
+
+
+def get_candidates(player_num: int, role: Role) -> list[Opening]:
+    """Return the openings worth evaluating for the role in the regulation."""
+    if role in (Role.SEER, Role.MEDIUM):
+        return [o for o in OPENINGS if o.claim == role]
+    # Claiming villager means no comingout, whose date does not matter.
+    return [OPENINGS[0]] + [o for o in OPENINGS if o.claim != Role.VILLAGER and REGULATIONS[player_num].get(o.claim)]
+
+
+_players: list[AbstractPlayer] = []
+
+
+def _init_worker(player_num: int) -> None:
+    global _players
+    from sample import SamplePlayer
+    _players = [SamplePlayer() for _ in range(player_num)]
+
+
+def _evaluate(job: tuple[int, Role, Opening, int, int]) -> int:
+    # Every agent of the role plays the opening, and the others play the default ones.
+    player_num, role, opening, seed, games = job
+    from villager import SampleVillager
+    weights: list[int] = [int(o == opening) for o in OPENINGS]
+    SampleVillager.opening_book = OpeningBook(pack_book({(player_num, tuple(REGULATIONS[player_num]), role): weights}))
+    wins: int = 0
+    for s in range(seed, seed + games):
+        result: GameResult = run_game(_players, s)
+        wins += (role in WEREWOLF_TEAM) == (result.winner == Species.WEREWOLF)
+    return wins
+
+
+if __name__ == "__main__":
+    parser: ArgumentParser = ArgumentParser(description="Build an opening book by self-play.")
+    parser.add_argument("-g", "--games", type=int, default=2000, help="games per opening")
+    parser.add_argument("-n", "--players", type=int, choices=(5, 15), nargs="+", default=[5, 15])
+    parser.add_argument("-j", "--processes", type=int, default=None)
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("-m", "--margin", type=float, default=0.01,
+                        help="keep the openings whose win rates are within this from the best one")
+    parser.add_argument("-o", "--output", type=str, default="opening.book")
+    args = parser.parse_args()
+    entries: dict[Key, Sequence[int]] = {}
+    start: float = time.perf_counter()
+    for player_num in args.players:
+        jobs: list[tuple[int, Role, Opening, int, int]] = []
+        batch: int = 100
+        for role in (Role.SEER, Role.MEDIUM, Role.POSSESSED, Role.WEREWOLF):
+            if not REGULATIONS[player_num].get(role):
+                continue
+            # The same seeds for all the openings make the comparison paired.
+            jobs += [(player_num, role, o, args.seed + b, min(batch, args.games - b))
+                     for o in get_candidates(player_num, role) for b in range(0, args.games, batch)]
+        wins: dict[tuple[Role, Opening], int] = {}
+        with Pool(args.processes, _init_worker, (player_num,)) as pool:
+            for job, w in zip(jobs, pool.imap(_evaluate, jobs)):
+                wins[job[1], job[2]] = wins.get((job[1], job[2]), 0) + w
+        for role in dict.fromkeys(r for r, _ in wins):
+            rates: dict[Opening, float] = {o: w / args.games for (r, o), w in wins.items() if r == role}
+            best: float = max(rates.values())
+            entries[player_num, tuple(REGULATIONS[player_num]), role] = [
+                round(rates[o] * 1000) if o in rates and rates[o] >= best - args.margin else 0 for o in OPENINGS]
+            for o, rate in sorted(rates.items(), key=lambda x: -x[1]):
+                print(f"{player_num:>3} {role.value:<10} {o.claim.value:<9} day {o.co_date}  {rate:.3f}")
+    write_book(args.output, entries)
+    print(f"{len(entries)} entries written to {args.output} in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,101 @@
+#
+# params.py
+#
+# Copyright 2022 OTSUKI Takashi
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+from typing import Any, NamedTuple
+
+VOTE_RULES: tuple[str, ...] = ("REPORTED_WOLVES", "FAKE_SEERS")
+"""Rules choosing the vote candidates of a villager before falling back to all the alive agents."""
+
+GUARD_RULES: tuple[str, ...] = ("SEERS", "MEDIUMS")
+"""Rules choosing the guard candidates of a bodyguard before falling back to all the alive agents."""
+
+
+class Params(NamedTuple):
+    """Strategy parameters, whose defaults are the behavior of the sample agent."""
+
+    seer_co_date: int = 3
+    """Day a seer comes out unless it finds a werewolf earlier."""
+    medium_co_date: int = 3
+    """Day a medium comes out unless it finds a werewolf earlier."""
+    possessed_co_date: int = 1
+    """Day a possessed comes out as a fake seer."""
+    werewolf_co_date_min: int = 1
+    """First day a werewolf may come out as its fake role, chosen uniformly up to werewolf_co_date_max."""
+    werewolf_co_date_max: int = 3
+    """Last day a werewolf may come out as its fake role."""
+    possessed_fake_wolf_prob: float = 0.5
+    """Probability that a possessed reports a fake werewolf judgment."""
+    werewolf_fake_wolf_prob: float = 0.3
+    """Probability that a werewolf reports a fake werewolf judgment."""
+    vote_rules: tuple[str, ...] = VOTE_RULES
+    """Vote rules of a villager in the order they are tried. Some of VOTE_RULES."""
+    guard_rules: tuple[str, ...] = GUARD_RULES
+    """Guard rules of a bodyguard in the order they are tried. Some of GUARD_RULES."""
+
+    @staticmethod
+    def from_dict(values: dict[str, Any]) -> "Params":
+        """Return the parameters given by the mapping, whose missing keys take the defaults.
+
+        Args:
+            values: Mapping between a parameter name and its value, which is a list for the rules.
+
+        Returns:
+            The validated parameters.
+
+        Raises:
+            ValueError: If a name is unknown or a value is out of its range.
+        """
+        unknown: set[str] = set(values) - set(Params._fields)
+        if unknown:
+            raise ValueError(f"unknown parameters: {', '.join(sorted(unknown))}")
+        kwargs: dict[str, Any] = {}
+        for name, value in values.items():
+            default: Any = Params._field_defaults[name]
+            kwargs[name] = tuple(str(v) for v in value) if isinstance(default, tuple) else type(default)(value)
+        params: Params = Params(**kwargs)
+        params.validate()
+        return params
+
+    @staticmethod
+    def load(path: str) -> "Params":
+        """Return the parameters read from the JSON file."""
+        with open(path, encoding="utf-8") as f:
+            return Params.from_dict(json.load(f))
+
+    def validate(self) -> None:
+        """Check the ranges of the parameters.
+
+        Raises:
+            ValueError: If a value is out of its range.
+        """
+        for name in ("seer_co_date", "medium_co_date", "possessed_co_date", "werewolf_co_date_min"):
+            if getattr(self, name) < 1:
+                raise ValueError(f"{name} must be positive")
+        if self.werewolf_co_date_max < self.werewolf_co_date_min:
+            raise ValueError("werewolf_co_date_max must not be less than werewolf_co_date_min")
+        for name in ("possessed_fake_wolf_prob", "werewolf_fake_wolf_prob"):
+            if not 0.0 <= getattr(self, name) <= 1.0:
+                raise ValueError(f"{name} must be between 0 and 1")
+        for name, rules in (("vote_rules", VOTE_RULES), ("guard_rules", GUARD_RULES)):
+            value: tuple[str, ...] = getattr(self, name)
+            if not set(value) <= set(rules) or len(set(value)) != len(value):
+                raise ValueError(f"{name} must be distinct ones of {', '.join(rules)}")
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the mapping to be written as JSON."""
+        return {k: list(v) if isinstance(v, tuple) else v for k, v in self._asdict().items()}
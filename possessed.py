@@ -18,13 +18,14 @@
 import random
 from collections import deque
 
-from aiwolf import (Agent, ComingoutContentBuilder, Content,
-                    DivinedResultContentBuilder, GameInfo, GameSetting,
-                    IdentContentBuilder, Judge, Role, Species,
-                    VoteContentBuilder)
+from aiwolf import Agent, Content, GameInfo, GameSetting, Judge, Role, Species
 from aiwolf.constant import AGENT_NONE
 
-from const import CONTENT_SKIP, JUDGE_EMPTY
+from agentset import AgentSet
+from anytime import Selection
+from const import AGENT_SET_EMPTY, CONTENT_SKIP, JUDGE_EMPTY
+from openingbook import Opening
+from tracing import Action, Branch
 from villager import SampleVillager
 
 
@@ -42,29 +43,28 @@ class SamplePossessed(SampleVillager):
         """Whether or not comingout has done."""
         self.my_judgee_queue: deque[Judge] = deque()
         """Queue of fake judgements."""
-        self.not_judged_agents: list[Agent] = []
+        self.not_judged_agents: AgentSet = AGENT_SET_EMPTY
         """Agents that have not been judged."""
         self.num_wolves: int = 0
         """The number of werewolves."""
-        self.werewolves: list[Agent] = []
+        self.werewolves: AgentSet = AGENT_SET_EMPTY
         """Fake werewolves."""
 
     def initialize(self, game_info: GameInfo, game_setting: GameSetting) -> None:
         super().initialize(game_info, game_setting)
-        self.fake_role = Role.SEER
-        self.co_date = 1
+        self.fake_role, self.co_date = self.get_opening(Opening(Role.SEER, self.params.possessed_co_date))
         self.has_co = False
         self.my_judgee_queue.clear()
-        self.not_judged_agents = self.get_others(self.game_info.agent_list)
+        self.not_judged_agents = self.others
         self.num_wolves = game_setting.role_num_map.get(Role.WEREWOLF, 0)
-        self.werewolves.clear()
+        self.werewolves = AGENT_SET_EMPTY
 
     def get_fake_judge(self) -> Judge:
         """Generate a fake judgement."""
         target: Agent = AGENT_NONE
         if self.fake_role == Role.SEER:  # Fake seer chooses a target randomly.
             if self.game_info.day != 0:
-                target = self.random_select(self.get_alive(self.not_judged_agents))
+                target = self.random_select(self.not_judged_agents & self.alive_agents)
         elif self.fake_role == Role.MEDIUM:
             target = self.game_info.executed_agent \
                 if self.game_info.executed_agent is not None \
@@ -73,9 +73,9 @@ class SamplePossessed(SampleVillager):
             return JUDGE_EMPTY
         # Determine a fake result.
         # If the number of werewolves found is less than the total number of werewolves,
-        # judge as a werewolf with a probability of 0.5.
+        # judge as a werewolf with a probability of possessed_fake_wolf_prob.
         result: Species = Species.WEREWOLF \
-            if len(self.werewolves) < self.num_wolves and random.random() < 0.5 \
+            if len(self.werewolves) < self.num_wolves and random.random() < self.params.possessed_fake_wolf_prob \
             else Species.HUMAN
         return Judge(self.me, self.game_info.day, target, result)
 
@@ -85,37 +85,47 @@ class SamplePossessed(SampleVillager):
         judge: Judge = self.get_fake_judge()
         if judge != JUDGE_EMPTY:
             self.my_judgee_queue.append(judge)
-            if judge.target in self.not_judged_agents:
-                self.not_judged_agents.remove(judge.target)
+            self.not_judged_agents = self.not_judged_agents.without_agent(judge.target)
             if judge.result == Species.WEREWOLF:
-                self.werewolves.append(judge.target)
+                self.werewolves = self.werewolves.with_agent(judge.target)
 
     def talk(self) -> Content:
         # Do comingout if it's on scheduled day or a werewolf is found.
         if self.fake_role != Role.VILLAGER and not self.has_co \
                 and (self.game_info.day == self.co_date or self.werewolves):
             self.has_co = True
-            return Content(ComingoutContentBuilder(self.me, self.fake_role))
+            self.trace(Action.TALK, Branch.COMINGOUT)
+            return self.contents.comingout(self.me, self.fake_role)
         # Report the judgement after doing comingout.
         if self.has_co and self.my_judgee_queue:
             judge: Judge = self.my_judgee_queue.popleft()
+            self.trace(Action.TALK, Branch.REPORT, choice=judge.target)
             if self.fake_role == Role.SEER:
-                return Content(DivinedResultContentBuilder(judge.target, judge.result))
+                return self.contents.divined(judge.target, judge.result)
             elif self.fake_role == Role.MEDIUM:
-                return Content(IdentContentBuilder(judge.target, judge.result))
+                return self.contents.identified(judge.target, judge.result)
+        # Keep the vote candidate if nothing has changed since it was chosen.
+        if self.is_vote_candidate_fresh():
+            return CONTENT_SKIP
         # Vote for one of the alive fake werewolves.
-        candidates: list[Agent] = self.get_alive(self.werewolves)
+        candidates: AgentSet = self.werewolves & self.alive_agents
+        branch: int = Branch.WEREWOLVES
         # Vote for one of the alive agent that declared itself the same role of Possessed
         # if there are no candidates.
         if not candidates:
-            candidates = self.get_alive([a for a in self.comingout_map
-                                         if self.comingout_map[a] == self.fake_role])
+            candidates = self.get_claimants(self.fake_role) & self.alive_agents
+            branch = Branch.CLAIMANTS
         # Vite for one of the alive agents if there are no candidates.
         if not candidates:
-            candidates = self.get_alive_others(self.game_info.agent_list)
+            candidates = self.alive_others
+            branch = Branch.ALIVE_OTHERS
+        self.vote_candidate_version = self.version
+        self.selections["vote"] = Selection(candidates, Role.WEREWOLF, False)
         # Declare which to vote for if not declare yet or the candidate is changed.
+        # Choose the candidate least likely to be a werewolf.
         if self.vote_candidate == AGENT_NONE or self.vote_candidate not in candidates:
-            self.vote_candidate = self.random_select(candidates)
+            self.vote_candidate = self.belief.select(candidates, Role.WEREWOLF, most=False)
+            self.trace(Action.TALK, branch, candidates, self.vote_candidate)
             if self.vote_candidate != AGENT_NONE:
-                return Content(VoteContentBuilder(self.vote_candidate))
+                return self.contents.vote(self.vote_candidate)
         return CONTENT_SKIP
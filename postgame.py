@@ -0,0 +1,103 @@
+#
+# postgame.py
+#
+# Copyright 2022 OTSUKI Takashi
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import queue
+import threading
+import traceback
+from typing import Callable, Optional
+
+Task = Callable[[], None]
+
+
+class PostGameWorker:
+    """Background thread that runs the work handed over at the end of a game,
+    so that finish() returns at once and the next game is not delayed.
+
+    The queue is bounded. When it is full, submit() waits for a short time and then drops the task
+    rather than blocking the game, since post-game work must never cost a timeout.
+    """
+
+    def __init__(self, maxsize: int = 16, put_timeout: float = 0.05) -> None:
+        """Initialize a new instance of PostGameWorker and start its thread.
+
+        Args:
+            maxsize: The maximum number of the tasks waiting.
+            put_timeout: Seconds submit() waits for room in the queue before dropping the task.
+        """
+        self.tasks: queue.Queue[Optional[Task]] = queue.Queue(maxsize)
+        """Tasks waiting, followed by None when closed."""
+        self.put_timeout: float = put_timeout
+        """Seconds submit() waits for room in the queue before dropping the task."""
+        self.dropped: int = 0
+        """The number of the tasks dropped because the queue was full."""
+        self.failed: int = 0
+        """The number of the tasks that raised an exception."""
+        self.closed: bool = False
+        """Whether the worker no longer accepts tasks."""
+        self.thread: threading.Thread = threading.Thread(target=self._run, name="post-game", daemon=True)
+        """The thread running the tasks."""
+        self.thread.start()
+
+    def _run(self) -> None:
+        while True:
+            task: Optional[Task] = self.tasks.get()
+            if task is None:
+                return
+            try:
+                task()
+            except Exception:
+                self.failed += 1
+                traceback.print_exc()
+
+    def submit(self, task: Task) -> bool:
+        """Hand the task over to the worker.
+
+        Args:
+            task: The function to be called in the background.
+
+        Returns:
+            True if the task is queued, otherwise false.
+        """
+        if self.closed:
+            return False
+        try:
+            self.tasks.put(task, timeout=self.put_timeout)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Stop accepting tasks, and wait for the queued ones to finish.
+
+        Args:
+            timeout: Seconds to wait for the queued tasks. Wait forever if None.
+
+        Returns:
+            True if all the tasks finished, otherwise false.
+        """
+        if not self.closed:
+            self.closed = True
+            self.tasks.put(None)
+        self.thread.join(timeout)
+        return not self.thread.is_alive()
+
+    def __enter__(self) -> "PostGameWorker":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
@@ -0,0 +1,135 @@
+#
+# profiles.py
+#
+# Copyright 2022 OTSUKI Takashi
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sqlite3
+import threading
+from typing import Iterable, Optional
+
+COUNTERS: tuple[str, ...] = ("games", "claims", "fake_claims", "votes", "contradicting_votes",
+                             "divinations", "correct_divinations")
+"""Counters of a profile, which are also the columns of the table."""
+
+
+class OpponentProfile:
+    """Counts of the behaviors of an agent accumulated over games."""
+
+    __slots__ = COUNTERS
+
+    def __init__(self, games: int = 0, claims: int = 0, fake_claims: int = 0, votes: int = 0,
+                 contradicting_votes: int = 0, divinations: int = 0, correct_divinations: int = 0) -> None:
+        """Initialize a new instance of OpponentProfile."""
+        self.games: int = games
+        """The number of games played."""
+        self.claims: int = claims
+        """The number of comingouts as a role other than villager."""
+        self.fake_claims: int = fake_claims
+        """The number of comingouts as a role that was not the agent's."""
+        self.votes: int = votes
+        """The number of votes."""
+        self.contradicting_votes: int = contradicting_votes
+        """The number of votes for an agent the voter had reported as human."""
+        self.divinations: int = divinations
+        """The number of divination results reported."""
+        self.correct_divinations: int = correct_divinations
+        """The number of divination results reported that were true."""
+
+    def add(self, other: "OpponentProfile") -> None:
+        """Add the counts of the other profile."""
+        for name in COUNTERS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    @property
+    def fake_claim_rate(self) -> float:
+        """Ratio of the fake comingouts, smoothed toward 0.5."""
+        return (self.fake_claims + 1) / (self.claims + 2)
+
+    @property
+    def contradicting_vote_rate(self) -> float:
+        """Ratio of the votes against the agent's own reports, smoothed toward 0.5."""
+        return (self.contradicting_votes + 1) / (self.votes + 2)
+
+    @property
+    def divination_accuracy(self) -> float:
+        """Ratio of the true divination results, smoothed toward 0.5."""
+        return (self.correct_divinations + 1) / (self.divinations + 2)
+
+
+class ProfileStore:
+    """Opponent profiles kept in an SQLite database keyed by agent name, with an in-memory cache.
+
+    Profiles are read from the database only by load(), so that get() never touches the disk.
+    The cache is not refreshed with updates made by other processes sharing the database.
+    The methods may be called from different threads, such as a post-game worker.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize a new instance of ProfileStore.
+
+        Args:
+            path: The path of the database file.
+        """
+        self.connection: sqlite3.Connection = sqlite3.connect(path, check_same_thread=False)
+        """Connection to the database."""
+        self.cache: dict[str, OpponentProfile] = {}
+        """Mapping between an agent name and its profile."""
+        self.lock: threading.Lock = threading.Lock()
+        """Lock serializing the updates of the cache and the use of the connection."""
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS profiles (name TEXT PRIMARY KEY, "
+                                    + ", ".join(f"{c} INTEGER NOT NULL DEFAULT 0" for c in COUNTERS) + ")")
+
+    def load(self, names: Iterable[str]) -> None:
+        """Read the profiles of the given agents into the cache unless they are cached already."""
+        missing: list[str] = [n for n in names if n not in self.cache]
+        if not missing:
+            return
+        with self.lock:
+            missing = [n for n in missing if n not in self.cache]  # Loaded while waiting for the lock.
+            if not missing:
+                return
+            rows: list[tuple] = self.connection.execute(
+                f"SELECT name, {', '.join(COUNTERS)} FROM profiles WHERE name IN ({', '.join('?' * len(missing))})",
+                missing).fetchall()
+            for name in missing:
+                self.cache[name] = OpponentProfile()
+            for name, *counts in rows:
+                self.cache[name] = OpponentProfile(*counts)
+
+    def get(self, name: str) -> Optional[OpponentProfile]:
+        """Return the cached profile of the agent, or None if it is not loaded."""
+        return self.cache.get(name)
+
+    def record(self, results: dict[str, OpponentProfile]) -> None:
+        """Add the counts of a game to the profiles in the cache and in the database.
+
+        Args:
+            results: Mapping between an agent name and its counts in the game.
+        """
+        with self.lock:
+            for name, counts in results.items():
+                if name in self.cache:  # Otherwise read with the counts by load() later.
+                    self.cache[name].add(counts)
+            with self.connection:
+                self.connection.executemany(
+                    f"INSERT INTO profiles (name, {', '.join(COUNTERS)}) VALUES (?{', ?' * len(COUNTERS)}) "
+                    "ON CONFLICT(name) DO UPDATE SET " + ", ".join(f"{c} = {c} + excluded.{c}" for c in COUNTERS),
+                    [(name, *(getattr(counts, c) for c in COUNTERS)) for name, counts in results.items()])
+
+    def close(self) -> None:
+        """Close the database."""
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,179 @@
+#
+# records.py
+#
+# Copyright 2022 OTSUKI Takashi
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from array import array
+from typing import Iterator, NamedTuple, Optional
+
+from aiwolf import Agent, Role, Species
+
+ROLES: list[Role] = list(Role)
+"""Roles indexed by their codes in the tables."""
+
+ROLE_CODES: dict[Role, int] = {r: i for i, r in enumerate(ROLES)}
+"""Mapping between a role and its code in the tables."""
+
+SPECIES: list[Species] = list(Species)
+"""Species indexed by their codes in the tables."""
+
+SPECIES_CODES: dict[Species, int] = {s: i for i, s in enumerate(SPECIES)}
+"""Mapping between a species and its code in the tables."""
+
+
+class Report(NamedTuple):
+    """A reported judgement."""
+
+    agent: Agent
+    """The reporter."""
+    day: int
+    """The day of the report."""
+    target: Agent
+    """The judged agent."""
+    result: Species
+    """The reported species."""
+
+
+class ReportLog:
+    """Time series of reported judgements stored in parallel array columns.
+
+    The columns are kept between games and overwritten from the beginning after reset(),
+    so that a long-running process does not allocate them again for every game.
+    """
+
+    __slots__ = ("agents", "days", "targets", "results", "length", "generation")
+
+    def __init__(self) -> None:
+        """Initialize a new instance of ReportLog."""
+        self.agents: array[int] = array("h")
+        """Agent numbers of the reporters."""
+        self.days: array[int] = array("h")
+        """Days of the reports."""
+        self.targets: array[int] = array("h")
+        """Agent numbers of the judged agents."""
+        self.results: array[int] = array("b")
+        """Codes of the reported species, which may be other than HUMAN and WEREWOLF in a malformed report."""
+        self.length: int = 0
+        """The number of the reports in the current game."""
+        self.generation: int = 0
+        """The number of the resets, which tells a new game from the last one."""
+
+    def append(self, agent: Agent, day: int, target: Agent, result: Species) -> None:
+        """Add the report.
+
+        Args:
+            agent: The reporter.
+            day: The day of the report.
+            target: The judged agent.
+            result: The reported species.
+        """
+        i: int = self.length
+        code: int = SPECIES_CODES[result]
+        if i < len(self.agents):
+            self.agents[i] = agent.agent_idx
+            self.days[i] = day
+            self.targets[i] = target.agent_idx
+            self.results[i] = code
+        else:
+            self.agents.append(agent.agent_idx)
+            self.days.append(day)
+            self.targets.append(target.agent_idx)
+            self.results.append(code)
+        self.length = i + 1
+
+    def reset(self) -> None:
+        """Forget the reports for a new game, keeping the storage."""
+        self.length = 0
+        self.generation += 1
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, i: int) -> Report:
+        if not -self.length <= i < self.length:
+            raise IndexError("report index out of range")
+        i %= self.length
+        return Report(Agent(self.agents[i]), self.days[i], Agent(self.targets[i]), SPECIES[self.results[i]])
+
+    def __iter__(self) -> Iterator[Report]:
+        for i in range(self.length):
+            yield self[i]
+
+
+class ComingoutTable:
+    """Mapping between an agent and the role it claims, stored in arrays indexed by agent number.
+
+    An entry is valid only if it was written in the current generation,
+    so that clear() takes O(1) time and no storage is reallocated between games.
+    """
+
+    __slots__ = ("roles", "generations", "generation", "length")
+
+    def __init__(self) -> None:
+        """Initialize a new instance of ComingoutTable."""
+        self.roles: array[int] = array("b")
+        """Codes of the claimed roles indexed by agent number."""
+        self.generations: array[int] = array("L")
+        """Generations in which the entries were written, indexed by agent number."""
+        self.generation: int = 1
+        """The current generation."""
+        self.length: int = 0
+        """The number of the valid entries."""
+
+    def clear(self) -> None:
+        """Invalidate all the entries."""
+        self.generation += 1
+        self.length = 0
+
+    def get(self, agent: Agent, default: Optional[Role] = None) -> Optional[Role]:
+        """Return the role claimed by the agent, or default if it has not done comingout."""
+        i: int = agent.agent_idx
+        if i < len(self.generations) and self.generations[i] == self.generation:
+            return ROLES[self.roles[i]]
+        return default
+
+    def __getitem__(self, agent: Agent) -> Role:
+        role: Optional[Role] = self.get(agent)
+        if role is None:
+            raise KeyError(agent)
+        return role
+
+    def __setitem__(self, agent: Agent, role: Role) -> None:
+        i: int = agent.agent_idx
+        if i >= len(self.generations):
+            grow: int = i + 1 - len(self.generations)
+            self.roles.extend([0] * grow)
+            self.generations.extend([0] * grow)
+        if self.generations[i] != self.generation:
+            self.generations[i] = self.generation
+            self.length += 1
+        self.roles[i] = ROLE_CODES[role]
+
+    def __contains__(self, agent: object) -> bool:
+        return isinstance(agent, Agent) and self.get(agent) is not None
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator[Agent]:
+        for i, g in enumerate(self.generations):
+            if g == self.generation:
+                yield Agent(i)
+
+    def items(self) -> Iterator[tuple[Agent, Role]]:
+        """Yield the pairs of an agent and the role it claims in order of agent number."""
+        for i, g in enumerate(self.generations):
+            if g == self.generation:
+                yield Agent(i), ROLES[self.roles[i]]
@@ -0,0 +1,228 @@
+#!/usr/bin/env -S python -B
+#
+# replay.py
+#
+# Copyright 2022 OTSUKI Takashi
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gzip
+import itertools
+import json
+import os
+import sys
+from argparse import ArgumentParser
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Optional, TextIO
+
+from aiwolf import AbstractPlayer, Agent, Content, Role, Talk, Whisper
+
+from simulator import GameSimulator
+from tournament import load_player_class
+
+
+class LogRecord(NamedTuple):
+    """A line of the server log, such as "1,vote,3,5"."""
+
+    day: int
+    """The day."""
+    kind: str
+    """The kind of the line, such as status, talk, vote or attack."""
+    fields: list[str]
+    """The rest of the fields."""
+
+
+class Decision(NamedTuple):
+    """A decision made by an agent during the replay."""
+
+    game: str
+    """The file name of the game log."""
+    day: int
+    """The day of the decision."""
+    kind: str
+    """The callback, one of talk, whisper, vote, divine, guard and attack."""
+    agent: int
+    """The number of the agent."""
+    value: str
+    """The text of the talk or the target of the action."""
+
+
+_FIELDS: dict[str, int] = {"talk": 4, "whisper": 4}
+"""Number of fields to split for the kinds whose last field is a free text."""
+
+
+def read_log(path: str) -> Iterator[LogRecord]:
+    """Yield the lines of the server log one by one without loading the whole file.
+
+    Args:
+        path: The path of the log. Gzipped if it ends with .gz.
+
+    Yields:
+        The parsed lines.
+    """
+    f: TextIO
+    with (gzip.open(path, "rt", encoding="utf-8") if path.endswith(".gz")
+          else open(path, encoding="utf-8")) as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            if not line:
+                continue
+            day, kind, rest = line.split(",", 2)
+            yield LogRecord(int(day), kind, rest.split(",", _FIELDS.get(kind, -1)))
+
+
+def _target(agent: Optional[Agent]) -> str:
+    return str(agent.agent_idx) if agent is not None else "-1"
+
+
+def replay(path: str, make_player: Callable[[], AbstractPlayer], seed: int = 0) -> Iterator[Decision]:
+    """Feed the game in the server log to the players, one per agent, and yield their decisions.
+
+    The game proceeds as logged whatever the players decide,
+    so the decisions of all the agents are those made in the same situations as the logged ones.
+
+    Args:
+        path: The path of the log.
+        make_player: The function that returns a player.
+        seed: The random seed set before the game.
+
+    Yields:
+        The decisions in order.
+    """
+    records: Iterator[LogRecord] = read_log(path)
+    days: Iterator[tuple[int, Iterator[LogRecord]]] = itertools.groupby(records, lambda r: r.day)
+    sim: Optional[GameSimulator] = None
+    for day, group in days:
+        statuses: list[LogRecord] = []
+        for r in group:
+            if r.kind != "status":
+                group = itertools.chain((r,), group)
+                break
+            statuses.append(r)
+        if sim is None:
+            roles: list[Role] = [Role[r.fields[1]] for r in sorted(statuses, key=lambda r: int(r.fields[0]))]
+            sim = GameSimulator([make_player() for _ in roles], seed, roles)
+            sim.initialize()
+        sim.day = day
+        for r in statuses:
+            sim.alive[int(r.fields[0])] = r.fields[2] == "ALIVE"
+        sim.talks = []
+        sim.whispers = []
+        sim.refresh()
+        for i in sim.players:
+            sim.update(i).day_start()
+        yield from _day(sim, os.path.basename(path), group)
+    if sim is not None:
+        sim.finish()
+
+
+def _day(sim: GameSimulator, game: str, records: Iterable[LogRecord]) -> Iterator[Decision]:
+    votes: list[dict[str, int]] = []
+    attack_votes: list[dict[str, int]] = []
+    sim.divine_result = None
+    sim.medium_result = None
+    sim.guarded = -1
+    sim.attacked = -1
+    sim.dead = []
+    for r in records:
+        f: list[str] = r.fields
+        if r.kind in ("talk", "whisper"):
+            agent: int = int(f[2])
+            player: AbstractPlayer = sim.update(agent)
+            content: Content = player.talk() if r.kind == "talk" else player.whisper()
+            yield Decision(game, r.day, r.kind, agent, content.text if content is not None else "")
+            utterance: dict[str, Any] = {"idx": int(f[0]), "day": r.day, "turn": int(f[1]), "agent": agent,
+                                         "text": f[3]}
+            if r.kind == "talk":
+                sim.talks.append(Talk.compile(utterance))  # type: ignore
+            else:
+                sim.whispers.append(Whisper.compile(utterance))  # type: ignore
+        elif r.kind in ("vote", "attackVote"):
+            agent = int(f[0])
+            if r.kind == "vote":
+                yield Decision(game, r.day, "vote", agent, _target(sim.update(agent).vote()))
+                votes.append({"agent": agent, "day": r.day, "target": int(f[1])})
+            else:
+                yield Decision(game, r.day, "attack", agent, _target(sim.update(agent).attack()))
+                attack_votes.append({"agent": agent, "day": r.day, "target": int(f[1])})
+        elif r.kind == "execute":
+            sim.votes = votes
+            sim.executed = int(f[0])
+            sim.medium_result = {"agent": 0, "day": r.day, "target": sim.executed,
+                                 "result": sim.species(sim.executed).value}
+            # Show the execution to the players before the night as the server does.
+            sim.alive[sim.executed] = False
+            sim.refresh()
+        elif r.kind == "divine":
+            agent = int(f[0])
+            yield Decision(game, r.day, "divine", agent, _target(sim.update(agent).divine()))
+            sim.divine_result = {"agent": agent, "day": r.day, "target": int(f[1]), "result": f[2]}
+        elif r.kind == "guard":
+            agent = int(f[0])
+            yield Decision(game, r.day, "guard", agent, _target(sim.update(agent).guard()))
+            sim.guarded = int(f[1])
+        elif r.kind == "attack":
+            sim.attack_votes = attack_votes
+            sim.attacked = int(f[0])
+            if f[1] == "true":
+                sim.dead = [sim.attacked]
+                sim.alive[sim.attacked] = False
+            sim.refresh()
+    for i in sim.players:
+        sim.update(i)
+
+
+def write_trace(decisions: Iterable[Decision], f: TextIO) -> int:
+    """Write the decisions as JSON lines and return the number of them."""
+    n: int = 0
+    for d in decisions:
+        f.write(json.dumps(d._asdict(), separators=(",", ":")) + "\n")
+        n += 1
+    return n
+
+
+def compare_trace(decisions: Iterable[Decision], f: TextIO) -> list[tuple[Optional[Decision], Optional[Decision]]]:
+    """Compare the decisions with the golden trace line by line.
+
+    Returns:
+        A list of pairs of the decision and the golden one that differ.
+    """
+    mismatches: list[tuple[Optional[Decision], Optional[Decision]]] = []
+    for d, line in itertools.zip_longest(decisions, f):
+        golden: Optional[Decision] = Decision(**json.loads(line)) if line is not None else None
+        if d != golden:
+            mismatches.append((d, golden))
+    return mismatches
+
+
+if __name__ == "__main__":
+    parser: ArgumentParser = ArgumentParser(description="Replay server logs and record or check the decisions.")
+    parser.add_argument("logs", nargs="+", help="server logs, optionally gzipped")
+    parser.add_argument("--player", type=str, default="sample:SamplePlayer")
+    parser.add_argument("--seed", type=int, default=0)
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--record", type=str, help="write the decisions to this golden trace")
+    group.add_argument("--check", type=str, help="compare the decisions with this golden trace")
+    args = parser.parse_args()
+    player_class: type = load_player_class(args.player)
+    decisions: Iterator[Decision] = itertools.chain.from_iterable(
+        replay(path, player_class, args.seed) for path in args.logs)
+    if args.record is not None:
+        with open(args.record, "w") as f:
+            print(f"{write_trace(decisions, f)} decisions recorded")
+    else:
+        with open(args.check) as f:
+            mismatches = compare_trace(decisions, f)
+        for d, golden in mismatches[:20]:
+            print(f"expected {golden}, got {d}")
+        print(f"{len(mismatches)} mismatches")
+        sys.exit(1 if mismatches else 0)
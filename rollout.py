@@ -0,0 +1,133 @@
+#
+# rollout.py
+#
+# Copyright 2022 OTSUKI Takashi
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import itertools
+import multiprocessing
+import random
+import time
+from collections import deque
+from multiprocessing.pool import AsyncResult, Pool
+from typing import Iterator, Optional, Sequence
+
+from aiwolf import AbstractPlayer, Agent, Role, Species
+
+from simulator import GameSimulator
+
+_players: dict[int, list[AbstractPlayer]] = {}
+
+
+def _init_worker() -> None:
+    # The players of the rollouts must neither search nor record anything themselves.
+    from sample import SamplePlayer
+    from villager import SampleVillager
+    from werewolf import SampleWerewolf
+    SamplePlayer.deadline_fraction = 0.0
+    SampleWerewolf.rollout_search = None
+    SampleVillager.profile_store = None
+    SampleVillager.post_game = None
+
+
+def _rollout(roles: Sequence[Role], day: int, dead: Sequence[int], attacked: int, seed: int) -> bool:
+    # Players are created once per worker and reused across rollouts as a client process does.
+    from sample import SamplePlayer
+    players: list[AbstractPlayer] = _players.setdefault(len(roles), [SamplePlayer() for _ in roles])
+    return GameSimulator(players, seed, roles).resume(day, [*dead, attacked], attacked).winner == Species.WEREWOLF
+
+
+class RolloutSearch:
+    """Monte Carlo search of the attack target of the werewolves.
+
+    Each rollout draws an assignment of the roles from the belief, kills a candidate,
+    and plays the rest of the game with the sample agents in a worker process.
+    The candidate with the best win rate of the werewolves over the rollouts so far is the answer.
+    """
+
+    def __init__(self, fraction: float = 0.5, processes: Optional[int] = None) -> None:
+        """Initialize a new instance of RolloutSearch and start its worker processes.
+
+        Create it before opening files or connections, which the forked workers would inherit.
+
+        Args:
+            fraction: The fraction of the time limit the search may use when choosing the target in whisper().
+            processes: The number of worker processes. The number of CPUs if None.
+        """
+        self.fraction: float = fraction
+        """The fraction of the time limit the search may use when choosing the target in whisper()."""
+        self.processes: int = processes if processes is not None else multiprocessing.cpu_count()
+        """The number of worker processes."""
+        self.pool: Pool = multiprocessing.get_context("fork").Pool(self.processes, _init_worker)
+        """The worker processes."""
+        self.running: list[AsyncResult] = []
+        """Rollouts not known to have ended, including those left by the searches abandoned at their deadlines."""
+        self.duration: float = 0.0
+        """Moving average of the seconds a rollout takes."""
+
+    def search(self, roles: Sequence[Sequence[Role]], day: int, dead: Sequence[int],
+               candidates: Sequence[Agent], deadline: float) -> Iterator[Agent]:
+        """Roll out the candidates in turn over the assignments and yield the best one after each rollout.
+
+        A rollout is started only on an idle worker and only if it is expected to end by the deadline,
+        since a rollout once started cannot be cancelled. Thus a search abandoned at its deadline leaves
+        little work behind, whose results the next search discards.
+
+        Args:
+            roles: The assignments of the roles to be rolled out, which are cycled.
+            day: The day whose night the target is attacked on.
+            dead: The numbers of the agents already dead.
+            candidates: The candidates of the target.
+            deadline: The deadline in terms of time.perf_counter(). The search ends when it passes.
+
+        Yields:
+            The candidate with the best win rate so far.
+        """
+        if not roles or not candidates:
+            return
+        wins: dict[Agent, int] = dict.fromkeys(candidates, 0)
+        games: dict[Agent, int] = dict.fromkeys(candidates, 0)
+        # The candidates are rolled out with the same assignment in a row for a paired comparison.
+        jobs: Iterator[tuple[Sequence[Role], Agent]] = ((r, c) for r in itertools.cycle(roles) for c in candidates)
+        pending: deque[tuple[Agent, AsyncResult, float]] = deque()
+        while True:
+            now: float = time.perf_counter()
+            self.running = [r for r in self.running if not r.ready()]
+            while len(self.running) < self.processes and now + self.duration < deadline:
+                assignment, candidate = next(jobs)
+                result: AsyncResult = self.pool.apply_async(
+                    _rollout, (assignment, day + 1, dead, candidate.agent_idx, random.getrandbits(32)))
+                self.running.append(result)
+                pending.append((candidate, result, now))
+            if not pending:
+                if not self.running or now + self.duration >= deadline:
+                    return
+                # Wait for a worker busy with a rollout of an earlier search.
+                self.running[0].wait(deadline - now)
+                continue
+            candidate, result, start = pending.popleft()
+            try:
+                win: bool = result.get(max(0.0, deadline - time.perf_counter()))
+            except multiprocessing.TimeoutError:
+                return
+            elapsed: float = time.perf_counter() - start
+            self.duration = elapsed if self.duration == 0.0 else 0.8 * self.duration + 0.2 * elapsed
+            wins[candidate] += win
+            games[candidate] += 1
+            yield max(candidates, key=lambda c: wins[c] / games[c] if games[c] else -1.0)
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        self.pool.terminate()
+        self.pool.join()
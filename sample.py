@@ -15,10 +15,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import time
+from typing import Callable, Optional
+
 from aiwolf import AbstractPlayer, Agent, Content, GameInfo, GameSetting, Role
 
+from anytime import Search, get_deadline, run_anytime
 from bodyguard import SampleBodyguard
 from medium import SampleMedium
+from params import Params
 from possessed import SamplePossessed
 from seer import SampleSeer
 from villager import SampleVillager
@@ -27,29 +32,63 @@ from werewolf import SampleWerewolf
 
 class SamplePlayer(AbstractPlayer):
 
-    def __init__(self) -> None:
-        self.villager: AbstractPlayer = SampleVillager()
-        self.bodyguard: AbstractPlayer = SampleBodyguard()
-        self.medium: AbstractPlayer = SampleMedium()
-        self.seer: AbstractPlayer = SampleSeer()
-        self.possessed: AbstractPlayer = SamplePossessed()
-        self.werewolf: AbstractPlayer = SampleWerewolf()
-        self.player: AbstractPlayer = self.villager
+    deadline_fraction: float = 0.0
+    """Fraction of the time limit the searches may use to improve the choices, or 0 to use the rules only."""
+
+    def __init__(self, params: Optional[Params] = None) -> None:
+        """Initialize a new instance of SamplePlayer.
+
+        Args:
+            params: The strategy parameters of this player, or None to use SampleVillager.params.
+        """
+        self.villager: SampleVillager = SampleVillager()
+        self.bodyguard: SampleVillager = SampleBodyguard()
+        self.medium: SampleVillager = SampleMedium()
+        self.seer: SampleVillager = SampleSeer()
+        self.possessed: SampleVillager = SamplePossessed()
+        self.werewolf: SampleVillager = SampleWerewolf()
+        self.player: SampleVillager = self.villager
+        if params is not None:
+            for player in (self.villager, self.bodyguard, self.medium, self.seer, self.possessed, self.werewolf):
+                player.params = params
+
+    def set_agent_names(self, names: dict[Agent, str]) -> None:
+        """Tell who plays each agent in the next game, so that the opponents are profiled under their names.
+
+        Args:
+            names: Mapping between an agent and its name.
+        """
+        for player in (self.villager, self.bodyguard, self.medium, self.seer, self.possessed, self.werewolf):
+            player.agent_names = names
+
+    def decide(self, action: str, choose: Callable[[], Agent]) -> Agent:
+        """Return the choice of the rule for the action,
+        improved by the search registered for it until the deadline if any.
+
+        The role player adopts and records only the final choice, so that its state and decision trace
+        agree with the answer."""
+        start: float = time.perf_counter()
+        agent: Agent = choose()
+        search: Optional[Search] = self.player.searches.get(action)
+        if search is not None and self.deadline_fraction > 0:
+            deadline: float = get_deadline(start, self.player.game_setting.time_limit, self.deadline_fraction)
+            agent = run_anytime(search(deadline), agent, deadline)
+        return self.player.commit(action, agent)
 
     def attack(self) -> Agent:
-        return self.player.attack()
+        return self.decide("attack", self.player.choose_attack)
 
     def day_start(self) -> None:
         self.player.day_start()
 
     def divine(self) -> Agent:
-        return self.player.divine()
+        return self.decide("divine", self.player.choose_divine)
 
     def finish(self) -> None:
         self.player.finish()
 
     def guard(self) -> Agent:
-        return self.player.guard()
+        return self.decide("guard", self.player.choose_guard)
 
     def initialize(self, game_info: GameInfo, game_setting: GameSetting) -> None:
         role: Role = game_info.my_role
@@ -74,7 +113,7 @@ class SamplePlayer(AbstractPlayer):
         self.player.update(game_info)
 
     def vote(self) -> Agent:
-        return self.player.vote()
+        return self.decide("vote", self.player.choose_vote)
 
     def whisper(self) -> Content:
         return self.player.whisper()
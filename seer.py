@@ -16,14 +16,17 @@
 # limitations under the License.
 
 from collections import deque
+from functools import partial
 from typing import Optional
 
-from aiwolf import (Agent, ComingoutContentBuilder, Content,
-                    DivinedResultContentBuilder, GameInfo, GameSetting, Judge,
-                    Role, Species, VoteContentBuilder)
+from aiwolf import Agent, Content, GameInfo, GameSetting, Judge, Role, Species
 from aiwolf.constant import AGENT_NONE
 
-from const import CONTENT_SKIP
+from agentset import AgentSet
+from anytime import Selection
+from const import AGENT_SET_EMPTY, CONTENT_SKIP
+from openingbook import Opening
+from tracing import Action, Branch
 from villager import SampleVillager
 
 
@@ -39,18 +42,19 @@ class SampleSeer(SampleVillager):
         """Whether or not comingout has done."""
         self.my_judge_queue: deque[Judge] = deque()
         """Queue of divination results."""
-        self.not_divined_agents: list[Agent] = []
+        self.not_divined_agents: AgentSet = AGENT_SET_EMPTY
         """Agents that have not been divined."""
-        self.werewolves: list[Agent] = []
+        self.werewolves: AgentSet = AGENT_SET_EMPTY
         """Found werewolves."""
+        self.register_search("divine", partial(self.search_selection, "divine"))
 
     def initialize(self, game_info: GameInfo, game_setting: GameSetting) -> None:
         super().initialize(game_info, game_setting)
-        self.co_date = 3
+        self.co_date = self.get_opening(Opening(Role.SEER, self.params.seer_co_date)).co_date
         self.has_co = False
         self.my_judge_queue.clear()
-        self.not_divined_agents = self.get_others(self.game_info.agent_list)
-        self.werewolves.clear()
+        self.not_divined_agents = self.others
+        self.werewolves = AGENT_SET_EMPTY
 
     def day_start(self) -> None:
         super().day_start()
@@ -58,37 +62,51 @@ class SampleSeer(SampleVillager):
         judge: Optional[Judge] = self.game_info.divine_result
         if judge is not None:
             self.my_judge_queue.append(judge)
-            if judge.target in self.not_divined_agents:
-                self.not_divined_agents.remove(judge.target)
+            self.not_divined_agents = self.not_divined_agents.without_agent(judge.target)
+            self.belief.set_species(judge.target, judge.result)
             if judge.result == Species.WEREWOLF:
-                self.werewolves.append(judge.target)
+                self.werewolves = self.werewolves.with_agent(judge.target)
 
     def talk(self) -> Content:
         # Do comingout if it's on scheduled day or a werewolf is found.
         if not self.has_co and (self.game_info.day == self.co_date or self.werewolves):
             self.has_co = True
-            return Content(ComingoutContentBuilder(self.me, Role.SEER))
+            self.trace(Action.TALK, Branch.COMINGOUT)
+            return self.contents.comingout(self.me, Role.SEER)
         # Report the divination result after doing comingout.
         if self.has_co and self.my_judge_queue:
             judge: Judge = self.my_judge_queue.popleft()
-            return Content(DivinedResultContentBuilder(judge.target, judge.result))
+            self.trace(Action.TALK, Branch.REPORT, choice=judge.target)
+            return self.contents.divined(judge.target, judge.result)
+        # Keep the vote candidate if nothing has changed since it was chosen.
+        if self.is_vote_candidate_fresh():
+            return CONTENT_SKIP
         # Vote for one of the alive werewolves.
-        candidates: list[Agent] = self.get_alive(self.werewolves)
+        candidates: AgentSet = self.werewolves & self.alive_agents
+        branch: int = Branch.WEREWOLVES
         # Vote for one of the alive fake seers if there are no candidates.
         if not candidates:
-            candidates = self.get_alive([a for a in self.comingout_map
-                                         if self.comingout_map[a] == Role.SEER])
+            candidates = self.get_claimants(Role.SEER) & self.alive_agents
+            branch = Branch.CLAIMANTS
         # Vote for one of the alive agents if there are no candidates.
         if not candidates:
-            candidates = self.get_alive_others(self.game_info.agent_list)
+            candidates = self.alive_others
+            branch = Branch.ALIVE_OTHERS
+        self.vote_candidate_version = self.version
+        self.selections["vote"] = Selection(candidates, Role.WEREWOLF, True)
         # Declare which to vote for if not declare yet or the candidate is changed.
+        # Choose the candidate most likely to be a werewolf.
         if self.vote_candidate == AGENT_NONE or self.vote_candidate not in candidates:
-            self.vote_candidate = self.random_select(candidates)
+            self.vote_candidate = self.belief.select(candidates, Role.WEREWOLF, scores=self.get_suspicion)
+            self.trace(Action.TALK, branch, candidates, self.vote_candidate)
             if self.vote_candidate != AGENT_NONE:
-                return Content(VoteContentBuilder(self.vote_candidate))
+                return self.contents.vote(self.vote_candidate)
         return CONTENT_SKIP
 
-    def divine(self) -> Agent:
-        # Divine a agent randomly chosen from undivined agents.
-        target: Agent = self.random_select(self.not_divined_agents)
+    def choose_divine(self) -> Agent:
+        # Divine the alive undivined agent most likely to be a werewolf.
+        candidates: AgentSet = self.not_divined_agents & self.alive_agents
+        self.selections["divine"] = Selection(candidates, Role.WEREWOLF, True)
+        target: Agent = self.belief.select(candidates, Role.WEREWOLF)
+        self.pending = (Action.DIVINE, Branch.UNDIVINED, candidates)
         return target if target != AGENT_NONE else self.me
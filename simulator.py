@@ -0,0 +1,437 @@
+#
+# simulator.py
+#
+# Copyright 2022 OTSUKI Takashi
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+from typing import Any, NamedTuple, Optional, Sequence
+
+from aiwolf import (AbstractPlayer, Agent, Content, GameInfo, GameSetting,
+                    Role, Species, Talk, Whisper)
+from aiwolf.constant import AGENT_NONE
+
+REGULATIONS: dict[int, dict[Role, int]] = {
+    5: {Role.VILLAGER: 2, Role.SEER: 1, Role.POSSESSED: 1, Role.WEREWOLF: 1},
+    15: {Role.VILLAGER: 8, Role.SEER: 1, Role.MEDIUM: 1, Role.BODYGUARD: 1, Role.POSSESSED: 1, Role.WEREWOLF: 3},
+}
+"""Role compositions of the 5- and 15-player regulations."""
+
+WEREWOLF_TEAM: tuple[Role, ...] = (Role.WEREWOLF, Role.POSSESSED)
+"""Roles that win when the werewolves win."""
+
+SKIP: str = "Skip"
+OVER: str = "Over"
+
+
+def make_game_setting(player_num: int, seed: int = 0, **kwargs: Any) -> dict[str, Any]:
+    """Return the game setting of the given regulation in the format sent by the server.
+
+    Args:
+        player_num: The number of players, 5 or 15.
+        seed: The random seed of the game.
+        **kwargs: Values overriding the defaults, keyed by the names used in the protocol.
+
+    Returns:
+        The game setting to be passed to GameSetting.
+    """
+    setting: dict[str, Any] = {
+        "enableNoAttack": False,
+        "enableNoExecution": False,
+        "enableRoleRequest": True,
+        "maxAttackRevote": 1,
+        "maxRevote": 1,
+        "maxSkip": 2,
+        "maxTalk": 10,
+        "maxTalkTurn": 20,
+        "maxWhisper": 10,
+        "maxWhisperTurn": 20,
+        "playerNum": player_num,
+        "randomSeed": seed,
+        "roleNumMap": {r.value: REGULATIONS[player_num].get(r, 0) for r in Role
+                       if r not in (Role.UNC, Role.ANY)},
+        "talkOnFirstDay": False,
+        "timeLimit": 1000,
+        "validateUtterance": True,
+        "votableInFirstDay": False,
+        "voteVisible": True,
+        "whisperBeforeRevote": False,
+    }
+    setting.update(kwargs)
+    return setting
+
+
+class GameResult(NamedTuple):
+    """Result of a simulated game."""
+
+    winner: Species
+    """Species of the winning team, HUMAN or WEREWOLF."""
+    day: int
+    """The last day of the game."""
+    roles: dict[int, Role]
+    """Mapping between an agent number and its role."""
+    alive: dict[int, bool]
+    """Mapping between an agent number and whether it survived."""
+
+    def is_winner(self, idx: int) -> bool:
+        """Return whether the agent of the given number is on the winning team."""
+        return (self.roles[idx] in WEREWOLF_TEAM) == (self.winner == Species.WEREWOLF)
+
+
+class GameSimulator:
+    """In-process game engine that calls the players' callbacks directly
+    in the same order as the AIWolf server does."""
+
+    def __init__(self, players: Sequence[AbstractPlayer], seed: Optional[int] = None,
+                 roles: Optional[Sequence[Role]] = None, **settings: Any) -> None:
+        """Initialize a new instance of GameSimulator.
+
+        Args:
+            players: The players. The n-th player plays Agent[n+1].
+            seed: The random seed. The global random module used by the players is also seeded with it.
+            roles: The roles of the players. Assigned randomly according to the regulation if omitted.
+            **settings: Values overriding the default game setting.
+        """
+        n: int = len(players)
+        self.rng: random.Random = random.Random(seed)
+        """Random number generator of the game."""
+        if seed is not None:
+            random.seed(seed)
+        self.players: dict[int, AbstractPlayer] = {i + 1: p for i, p in enumerate(players)}
+        """Mapping between an agent number and its player."""
+        self.setting_json: dict[str, Any] = make_game_setting(n, seed if seed is not None else 0, **settings)
+        """Game setting in the format sent by the server."""
+        self.game_setting: GameSetting = GameSetting(self.setting_json)  # type: ignore
+        """Settings of the game."""
+        if roles is None:
+            role_list: list[Role] = [r for r, num in REGULATIONS[n].items() for _ in range(num)]
+            self.rng.shuffle(role_list)
+            roles = role_list
+        self.roles: dict[int, Role] = {i + 1: r for i, r in enumerate(roles)}
+        """Mapping between an agent number and its role."""
+        self.existing_roles: list[str] = [r.value for r in Role if r in self.roles.values()]
+        self.alive: dict[int, bool] = {i: True for i in self.players}
+        """Mapping between an agent number and whether it is alive."""
+        self.day: int = 0
+        """Current day."""
+        self.talks: list[Talk] = []
+        """Talks of the current day."""
+        self.whispers: list[Whisper] = []
+        """Whispers of the current day."""
+        self.votes: list[dict[str, int]] = []
+        """Votes of the previous day."""
+        self.attack_votes: list[dict[str, int]] = []
+        """Attack votes of the previous night."""
+        self.executed: int = -1
+        """Agent executed on the previous day."""
+        self.attacked: int = -1
+        """Agent attacked on the previous night."""
+        self.guarded: int = -1
+        """Agent guarded on the previous night."""
+        self.dead: list[int] = []
+        """Agents killed on the previous night."""
+        self.divine_result: Optional[dict[str, Any]] = None
+        """Divination result of the previous night."""
+        self.medium_result: Optional[dict[str, Any]] = None
+        """Identification result of the agent executed on the previous day."""
+        self.infos: dict[int, GameInfo] = {}
+        """Game information currently shown to each agent."""
+
+    def alive_agents(self) -> list[int]:
+        """Return the numbers of the alive agents."""
+        return [i for i, a in self.alive.items() if a]
+
+    def alive_with(self, roles: Sequence[Role]) -> list[int]:
+        """Return the numbers of the alive agents having one of the given roles."""
+        return [i for i, a in self.alive.items() if a and self.roles[i] in roles]
+
+    def get_winner(self) -> Optional[Species]:
+        """Return the winning species if the game is over, otherwise None."""
+        wolves: int = len(self.alive_with((Role.WEREWOLF,)))
+        if wolves == 0:
+            return Species.HUMAN
+        if wolves >= len(self.alive_agents()) - wolves:
+            return Species.WEREWOLF
+        return None
+
+    def make_game_info(self, idx: int, reveal: bool = False) -> dict[str, Any]:
+        """Return the game information shown to the agent in the format sent by the server.
+
+        Args:
+            idx: The agent number of the viewer.
+            reveal: Whether to reveal all the roles, which the server does at the end of the game.
+
+        Returns:
+            The game information to be passed to GameInfo.
+        """
+        role: Role = self.roles[idx]
+        wolf: bool = role == Role.WEREWOLF
+        role_map: dict[str, str]
+        if reveal:
+            role_map = {str(i): r.value for i, r in self.roles.items()}
+        elif wolf:
+            role_map = {str(i): r.value for i, r in self.roles.items() if r == Role.WEREWOLF}
+        else:
+            role_map = {str(idx): role.value}
+        return {
+            "agent": idx,
+            "attackVoteList": self.attack_votes if wolf else [],
+            "attackedAgent": self.attacked if wolf else -1,
+            "cursedFox": -1,
+            "day": self.day,
+            "divineResult": self.divine_result if role == Role.SEER else None,
+            "executedAgent": self.executed,
+            "existingRoleList": self.existing_roles,
+            "guardedAgent": self.guarded if role == Role.BODYGUARD else -1,
+            "lastDeadAgentList": self.dead,
+            "latestAttackVoteList": [],
+            "latestExecutedAgent": self.executed,
+            "latestVoteList": [],
+            "mediumResult": dict(self.medium_result, agent=idx)
+            if role == Role.MEDIUM and self.medium_result is not None else None,
+            "remainTalkMap": {},
+            "remainWhisperMap": {},
+            "roleMap": role_map,
+            "statusMap": {str(i): "ALIVE" if a else "DEAD" for i, a in self.alive.items()},
+            "talkList": [],
+            "voteList": self.votes,
+            "whisperList": [],
+        }
+
+    def refresh(self, reveal: bool = False) -> None:
+        """Rebuild the game information shown to each agent.
+
+        The talk and whisper lists are shared with the simulator,
+        so that the talks of the day are seen without rebuilding.
+        """
+        for i in self.players:
+            info: GameInfo = GameInfo(self.make_game_info(i, reveal))  # type: ignore
+            info.talk_list = self.talks
+            if self.roles[i] == Role.WEREWOLF:
+                info.whisper_list = self.whispers
+            self.infos[i] = info
+
+    def update(self, idx: int) -> AbstractPlayer:
+        """Send the current game information to the agent and return its player."""
+        player: AbstractPlayer = self.players[idx]
+        player.update(self.infos[idx])
+        return player
+
+    def run(self) -> GameResult:
+        """Play a whole game and return its result."""
+        self.initialize()
+        return self.play()
+
+    def resume(self, day: int, dead: Sequence[int], attacked: int = -1) -> GameResult:
+        """Play the rest of a game from the morning of the given day and return its result.
+
+        The players start without knowing what happened before the day.
+
+        Args:
+            day: The day to start from.
+            dead: The numbers of the agents already dead, including the attacked one.
+            attacked: The number of the agent killed on the previous night, if any.
+
+        Returns:
+            The result of the game.
+        """
+        self.initialize()
+        self.day = day
+        for i in dead:
+            self.alive[i] = False
+        self.dead = [attacked] if attacked > 0 else []
+        winner: Optional[Species] = self.get_winner()
+        if winner is not None:
+            self.finish()
+            return GameResult(winner, self.day, dict(self.roles), dict(self.alive))
+        return self.play()
+
+    def play(self) -> GameResult:
+        """Play the days from the current one until the game is over and return the result."""
+        winner: Optional[Species] = None
+        while winner is None:
+            self.day_phase()
+            winner = self.get_winner()
+            if winner is not None:
+                break
+            self.night_phase()
+            winner = self.get_winner()
+        self.finish()
+        return GameResult(winner, self.day, dict(self.roles), dict(self.alive))
+
+    def initialize(self) -> None:
+        """Initialize all the players."""
+        self.refresh()
+        for i, player in self.players.items():
+            player.initialize(self.infos[i], self.game_setting)
+
+    def day_phase(self) -> None:
+        """Run the daily initialization, the talks and the vote of the current day."""
+        self.talks = []
+        self.whispers = []
+        self.refresh()
+        for i in self.players:
+            self.update(i).day_start()
+        if self.day > 0 or self.game_setting.talk_on_first_day:
+            self.conversation(self.alive_agents(), self.talks, Talk, False)
+        self.day_finish()
+        self.executed = -1
+        self.medium_result = None
+        if self.day > 0 or self.game_setting.votable_on_first_day:
+            self.execute()
+        # Show the execution to the players before the night.
+        self.refresh()
+        for i in self.players:
+            self.update(i)
+
+    def day_finish(self) -> None:
+        """Show the talks of the day to all the players before the night, as the server does by DAILY_FINISH."""
+        self.refresh()
+        for i in self.players:
+            self.update(i)
+
+    def conversation(self, speakers: list[int], utterances: list, cls: type, whisper: bool) -> None:
+        """Run the talk or whisper turns among the given speakers."""
+        if not speakers:
+            return
+        max_turn: int = self.game_setting.max_whisper_turn if whisper else self.game_setting.max_talk_turn
+        remain: dict[int, int] = dict.fromkeys(
+            speakers, self.game_setting.max_whisper if whisper else self.game_setting.max_talk)
+        skips: dict[int, int] = dict.fromkeys(speakers, 0)
+        over: set[int] = set()
+        for turn in range(max_turn):
+            order: list[int] = [i for i in speakers if i not in over]
+            if not order:
+                break
+            self.rng.shuffle(order)
+            for i in order:
+                player: AbstractPlayer = self.update(i)
+                content: Optional[Content] = player.whisper() if whisper else player.talk()
+                text: str = content.text if content is not None else SKIP
+                if remain[i] == 0:
+                    text = OVER
+                if text == SKIP:
+                    skips[i] += 1
+                    if skips[i] > self.game_setting.max_skip:
+                        text = OVER
+                elif text != OVER:
+                    skips[i] = 0
+                    remain[i] -= 1
+                if text == OVER:
+                    over.add(i)
+                utterances.append(cls.compile({"idx": len(utterances), "day": self.day, "turn": turn,
+                                               "agent": i, "text": text}))
+
+    def collect_votes(self, voters: list[int], candidates: list[int], attack: bool) -> list[dict[str, int]]:
+        """Ask the voters for their targets, replacing invalid ones with random candidates."""
+        votes: list[dict[str, int]] = []
+        for i in voters:
+            player: AbstractPlayer = self.update(i)
+            target: Optional[Agent] = player.attack() if attack else player.vote()
+            t: int = target.agent_idx if target is not None and target != AGENT_NONE else -1
+            if t not in candidates:
+                t = self.rng.choice(candidates)
+            votes.append({"agent": i, "day": self.day, "target": t})
+        return votes
+
+    def tally(self, votes: list[dict[str, int]]) -> list[int]:
+        """Return the agents that got the most votes."""
+        counts: dict[int, int] = {}
+        for v in votes:
+            counts[v["target"]] = counts.get(v["target"], 0) + 1
+        top: int = max(counts.values())
+        return [t for t, c in counts.items() if c == top]
+
+    def execute(self) -> None:
+        """Run the vote and execute the most voted agent."""
+        voters: list[int] = self.alive_agents()
+        top: list[int] = voters
+        for _ in range(self.game_setting.max_revote + 1):
+            self.votes = self.collect_votes(voters, voters, False)
+            top = self.tally(self.votes)
+            if len(top) == 1:
+                break
+            self.refresh()
+        self.executed = self.rng.choice(top)
+        self.alive[self.executed] = False
+        self.medium_result = {"agent": 0, "day": self.day, "target": self.executed,
+                              "result": self.species(self.executed).value}
+
+    def species(self, idx: int) -> Species:
+        """Return the species of the agent."""
+        return Species.WEREWOLF if self.roles[idx] == Role.WEREWOLF else Species.HUMAN
+
+    def night_phase(self) -> None:
+        """Run the whispers, the divination, the guard and the attack, then advance to the next day."""
+        # The werewolves whisper after the execution as the server does, and only if two or more are alive.
+        wolves: list[int] = self.alive_with((Role.WEREWOLF,))
+        if len(wolves) > 1:
+            self.conversation(wolves, self.whispers, Whisper, True)
+        self.divine_result = None
+        self.guarded = -1
+        self.attacked = -1
+        self.dead = []
+        for seer in self.alive_with((Role.SEER,)):
+            target: Agent = self.update(seer).divine()
+            if target is not None and target.agent_idx in self.players:
+                self.divine_result = {"agent": seer, "day": self.day, "target": target.agent_idx,
+                                      "result": self.species(target.agent_idx).value}
+        if self.day > 0:
+            for bodyguard in self.alive_with((Role.BODYGUARD,)):
+                target = self.update(bodyguard).guard()
+                if target is not None and target.agent_idx != bodyguard and self.alive.get(target.agent_idx):
+                    self.guarded = target.agent_idx
+            self.attack()
+            self.refresh()
+        self.day += 1
+
+    def attack(self) -> None:
+        """Run the attack vote of the werewolves and kill the target unless it is guarded."""
+        wolves: list[int] = self.alive_with((Role.WEREWOLF,))
+        humans: list[int] = [i for i in self.alive_agents() if i not in wolves]
+        if not wolves or not humans:
+            return
+        top: list[int] = humans
+        for _ in range(self.game_setting.max_attack_revote + 1):
+            self.attack_votes = self.collect_votes(wolves, humans, True)
+            top = self.tally(self.attack_votes)
+            if len(top) == 1:
+                break
+            self.refresh()
+        self.attacked = self.rng.choice(top)
+        if self.attacked != self.guarded:
+            self.alive[self.attacked] = False
+            self.dead = [self.attacked]
+
+    def finish(self) -> None:
+        """Reveal the roles and finish all the players."""
+        self.refresh(reveal=True)
+        for i in self.players:
+            self.update(i).finish()
+
+
+def run_game(players: Sequence[AbstractPlayer], seed: Optional[int] = None,
+             roles: Optional[Sequence[Role]] = None, **settings: Any) -> GameResult:
+    """Play a game among the given players in process.
+
+    Args:
+        players: The players. The n-th player plays Agent[n+1].
+        seed: The random seed.
+        roles: The roles of the players. Assigned randomly according to the regulation if omitted.
+        **settings: Values overriding the default game setting.
+
+    Returns:
+        The result of the game.
+    """
+    return GameSimulator(players, seed, roles, **settings).run()
@@ -16,18 +16,99 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import os
 from argparse import ArgumentParser
+from typing import Optional
 
 from aiwolf import AbstractPlayer, TcpipClient
 
+from asyncclient import run_connections
+from metrics import InstrumentedPlayer, process_metrics, process_path
+from openingbook import OpeningBook
+from params import Params
+from postgame import PostGameWorker
+from rollout import RolloutSearch
 from sample import SamplePlayer
+from supervisor import supervise
+from villager import SampleVillager
+from werewolf import SampleWerewolf
 
 if __name__ == "__main__":
-    agent: AbstractPlayer = SamplePlayer()
     parser: ArgumentParser = ArgumentParser(add_help=False)
     parser.add_argument("-p", type=int, action="store", dest="port", required=True)
     parser.add_argument("-h", type=str, action="store", dest="hostname", required=True)
     parser.add_argument("-r", type=str, action="store", dest="role", default="none")
     parser.add_argument("-n", type=str, action="store", dest="name")
+    parser.add_argument("--metrics", type=str, action="store", dest="metrics",
+                        help="file the latencies of all the agents of the process are exported to,"
+                             " with the pid inserted before the extension when --workers is given")
+    parser.add_argument("--metrics-format", type=str, action="store", dest="metrics_format",
+                        choices=("prometheus", "jsonl"), default="prometheus")
+    parser.add_argument("--metrics-budget", type=float, action="store", dest="metrics_budget")
+    parser.add_argument("--connections", type=int, action="store", dest="connections")
+    parser.add_argument("--workers", type=int, action="store", dest="workers")
+    parser.add_argument("--slots", type=int, action="store", dest="slots")
+    parser.add_argument("--games", type=int, action="store", dest="games")
+    parser.add_argument("--rollouts", type=float, action="store", dest="rollouts",
+                        help="fraction of the time limit used to choose the attack target by rollouts")
+    parser.add_argument("--rollout-processes", type=int, action="store", dest="rollout_processes",
+                        help="processes of the rollouts per worker, at most the CPUs divided by the workers playing"
+                             " at once (--slots or --workers), which is also the default")
+    parser.add_argument("--opening-book", type=str, action="store", dest="opening_book")
+    parser.add_argument("--deadline-fraction", type=float, action="store", dest="deadline_fraction", default=0.0)
+    parser.add_argument("--params", type=str, action="store", dest="params",
+                        help="JSON file of the strategy parameters such as the one written by tuner.py")
     input_args = parser.parse_args()
-    TcpipClient(agent, input_args.name, input_args.hostname, input_args.port, input_args.role).connect()
+    if input_args.connections is not None and (input_args.deadline_fraction > 0 or input_args.rollouts is not None):
+        # A search of a connection would block all the others on the event loop until its deadline.
+        parser.error("--connections cannot be used with --deadline-fraction or --rollouts")
+    rollout_processes: Optional[int] = input_args.rollout_processes
+    if input_args.workers is not None and input_args.rollouts is not None:
+        # Every worker starts its own pool of rollouts, so the CPUs are shared among the workers playing at once.
+        limit: int = max(1, (os.cpu_count() or 1) // (input_args.slots or input_args.workers))
+        rollout_processes = min(rollout_processes, limit) if rollout_processes is not None else limit
+    SamplePlayer.deadline_fraction = input_args.deadline_fraction
+    if input_args.params is not None:
+        SampleVillager.params = Params.load(input_args.params)
+    if input_args.opening_book is not None:
+        # Mapped once here, so that the forked workers share the pages.
+        SampleVillager.opening_book = OpeningBook.open(input_args.opening_book)
+
+    def make_agent() -> AbstractPlayer:
+        # Fork the rollout workers first, and open the database in the process playing the game,
+        # since a connection must not cross a fork.
+        if input_args.rollouts is not None and SampleWerewolf.rollout_search is None:
+            SampleWerewolf.rollout_search = RolloutSearch(input_args.rollouts, rollout_processes)
+        if SampleVillager.post_game is None:
+            SampleVillager.post_game = PostGameWorker()
+        agent: AbstractPlayer = SamplePlayer()
+        if input_args.metrics is not None:
+            # The forked workers run concurrently, so each writes its own file.
+            path: str = process_path(input_args.metrics) if input_args.workers is not None else input_args.metrics
+            agent = InstrumentedPlayer(agent, process_metrics(input_args.metrics_budget), path,
+                                       input_args.metrics_format)
+        return agent
+
+    def shutdown() -> None:
+        # Let the post-game work of the last game finish before the process exits.
+        if SampleVillager.post_game is not None:
+            SampleVillager.post_game.close()
+        if SampleWerewolf.rollout_search is not None:
+            SampleWerewolf.rollout_search.close()
+
+    if input_args.connections is not None:
+        try:
+            asyncio.run(run_connections(make_agent, input_args.name, input_args.hostname, input_args.port,
+                                        input_args.role, input_args.connections))
+        finally:
+            shutdown()
+    elif input_args.workers is not None:
+        supervise(make_agent, input_args.name, input_args.hostname, input_args.port, input_args.role,
+                  input_args.workers, input_args.slots, input_args.games, shutdown)
+    else:
+        try:
+            TcpipClient(make_agent(), input_args.name, input_args.hostname, input_args.port,
+                        input_args.role).connect()
+        finally:
+            shutdown()
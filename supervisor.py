@@ -0,0 +1,100 @@
+#
+# supervisor.py
+#
+# Copyright 2022 OTSUKI Takashi
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import multiprocessing
+import time
+from multiprocessing.connection import wait
+from multiprocessing.context import ForkContext, ForkProcess
+from multiprocessing.synchronize import Semaphore
+from typing import Callable, Optional
+
+from aiwolf import AbstractPlayer, TcpipClient
+
+BACKOFF_MIN: float = 0.1
+"""Seconds to wait before replacing a worker that failed, doubled for each failure in a row."""
+
+BACKOFF_MAX: float = 30.0
+"""Maximum seconds to wait before replacing a worker that failed."""
+
+
+def _work(make_agent: Callable[[], AbstractPlayer], slots: Semaphore, name: Optional[str], hostname: str,
+          port: int, role: str, shutdown: Optional[Callable[[], None]]) -> None:
+    # Build the player before a slot is free so that the game starts with a warm worker.
+    agent: AbstractPlayer = make_agent()
+    try:
+        with slots:
+            TcpipClient(agent, name, hostname, port, role).connect()
+    finally:
+        if shutdown is not None:
+            shutdown()
+
+
+def supervise(make_agent: Callable[[], AbstractPlayer], name: Optional[str], hostname: str, port: int,
+              role: str = "none", workers: int = 1, slots: Optional[int] = None,
+              games: Optional[int] = None, shutdown: Optional[Callable[[], None]] = None) -> None:
+    """Keep workers forked from this process ready to connect to the server,
+    and replace each worker as soon as its game ends.
+
+    A worker that failed, for example because the server is down, is replaced after a delay
+    growing exponentially while the failures continue.
+
+    The workers share the modules already imported by this process,
+    so that they start without importing aiwolf and the role modules again.
+
+    Args:
+        make_agent: The function that returns the player of a worker.
+        name: The name of the agents.
+        hostname: The host name of the server.
+        port: The port number of the server.
+        role: The role requested to the server.
+        workers: The number of workers kept ready.
+        slots: The maximum number of workers connected at once. The same as workers if None.
+        games: The total number of connections after which no worker is replaced. Unlimited if None.
+        shutdown: The function each worker calls after its connection is closed.
+    """
+    context: ForkContext = multiprocessing.get_context("fork")
+    semaphore: Semaphore = context.Semaphore(slots if slots is not None else workers)
+    running: list[ForkProcess] = []
+    started: int = 0
+    delay: float = 0.0
+    try:
+        while True:
+            if delay > 0 and len(running) < workers and (games is None or started < games):
+                time.sleep(delay)
+            while len(running) < workers and (games is None or started < games):
+                # Not daemonic so that a worker can have its own processes, which are stopped in the end anyway.
+                process: ForkProcess = context.Process(target=_work,
+                                                       args=(make_agent, semaphore, name, hostname, port, role,
+                                                             shutdown))
+                process.start()
+                running.append(process)
+                started += 1
+            if not running:
+                break
+            ended = wait([p.sentinel for p in running])
+            for p in [p for p in running if p.sentinel in ended]:
+                p.join()
+                running.remove(p)
+                if p.exitcode == 0:
+                    delay = 0.0
+                else:  # Back off not to fork in a tight loop.
+                    delay = min(max(2 * delay, BACKOFF_MIN), BACKOFF_MAX)
+    finally:
+        for p in running:
+            p.terminate()
+        for p in running:
+            p.join()
@@ -0,0 +1,67 @@
+#
+# test_agentset.py
+#
+# Copyright 2022 OTSUKI Takashi
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from aiwolf import Agent
+
+from agentset import AgentSet
+
+
+class AgentSetTest(unittest.TestCase):
+    """Tests of AgentSet."""
+
+    def test_of_and_to_list(self) -> None:
+        agents: list[Agent] = [Agent(15), Agent(1), Agent(7), Agent(1)]
+        s: AgentSet = AgentSet.of(agents)
+        self.assertEqual(s.to_list(), [Agent(1), Agent(7), Agent(15)])
+        self.assertEqual(list(s), s.to_list())
+        self.assertEqual(len(s), 3)
+        self.assertEqual(AgentSet.of(s.to_list()), s)
+
+    def test_empty(self) -> None:
+        s: AgentSet = AgentSet()
+        self.assertFalse(s)
+        self.assertEqual(len(s), 0)
+        self.assertEqual(s.to_list(), [])
+        self.assertEqual(AgentSet.of([]), s)
+
+    def test_with_and_without_agent(self) -> None:
+        s: AgentSet = AgentSet.of([Agent(2)])
+        t: AgentSet = s.with_agent(Agent(5))
+        self.assertEqual(s, AgentSet.of([Agent(2)]))  # Immutable.
+        self.assertIn(Agent(5), t)
+        self.assertEqual(t.with_agent(Agent(5)), t)
+        self.assertEqual(t.without_agent(Agent(2)), AgentSet.of([Agent(5)]))
+        self.assertEqual(t.without_agent(Agent(9)), t)
+        self.assertNotIn(Agent(9), t)
+        self.assertNotIn("Agent[02]", t)
+
+    def test_operators(self) -> None:
+        a: AgentSet = AgentSet.of([Agent(1), Agent(2), Agent(3)])
+        b: AgentSet = AgentSet.of([Agent(3), Agent(4)])
+        self.assertEqual(a | b, AgentSet.of([Agent(1), Agent(2), Agent(3), Agent(4)]))
+        self.assertEqual(a & b, AgentSet.of([Agent(3)]))
+        self.assertEqual(a - b, AgentSet.of([Agent(1), Agent(2)]))
+        self.assertEqual(b - a, AgentSet.of([Agent(4)]))
+
+    def test_hash(self) -> None:
+        self.assertEqual(len({AgentSet.of([Agent(1), Agent(2)]), AgentSet.of([Agent(2), Agent(1)])}), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
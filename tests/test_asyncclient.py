@@ -0,0 +1,85 @@
+#
+# test_asyncclient.py
+#
+# Copyright 2022 OTSUKI Takashi
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import unittest
+
+from asyncclient import _TALK_LIST, _WHISPER_LIST, _count_entries, _cut_list, _decode_tail
+
+TALKS: bytes = b'[{"idx":0,"text":"Over"},{"idx":1,"text":"Skip"} , {"idx":2,"text":"Over"}]'
+"""A list of three talks in JSON."""
+
+
+class CutListTest(unittest.TestCase):
+    """Tests of _cut_list."""
+
+    def test_list(self) -> None:
+        line: bytes = b'{"request":"TALK","talkList":' + TALKS + b',"whisperList":[]}'
+        rest, talks = _cut_list(line, _TALK_LIST)
+        self.assertEqual(talks, TALKS)
+        self.assertEqual(json.loads(rest), {"request": "TALK", "talkList": [], "whisperList": []})
+
+    def test_empty_list(self) -> None:
+        line: bytes = b'{"talkList":[],"whisperList":' + TALKS + b'}'
+        rest, talks = _cut_list(line, _TALK_LIST)
+        self.assertEqual(talks, b"[]")
+        self.assertEqual(json.loads(rest), json.loads(line))
+        rest, whispers = _cut_list(line, _WHISPER_LIST)
+        self.assertEqual(whispers, TALKS)
+        self.assertEqual(json.loads(rest), {"talkList": [], "whisperList": []})
+
+    def test_whitespace_padded_list(self) -> None:
+        for line in (b'{"talkList" : [ ] ,"day":1}', b'{"talkList":[\n\t],"day":1}'):
+            rest, talks = _cut_list(line, _TALK_LIST)
+            self.assertEqual(json.loads(talks), [])
+            self.assertEqual(json.loads(rest), {"talkList": [], "day": 1})
+        padded: bytes = b'[ ' + TALKS[1:-1] + b' ]'
+        rest, talks = _cut_list(b'{"talkList" : ' + padded + b' ,"day":1}', _TALK_LIST)
+        self.assertEqual(json.loads(talks), json.loads(TALKS))
+        self.assertEqual(json.loads(rest), {"talkList": [], "day": 1})
+
+    def test_missing_list(self) -> None:
+        for line in (b'{"request":"DAILY_INITIALIZE","talkList":null}', b'{"request":"NAME"}', b""):
+            self.assertEqual(_cut_list(line, _TALK_LIST), (line, b"[]"))
+
+    def test_unterminated_list(self) -> None:
+        line: bytes = b'{"talkList":[{"idx":0'
+        self.assertEqual(_cut_list(line, _TALK_LIST), (line, b"[]"))
+
+
+class EntriesTest(unittest.TestCase):
+    """Tests of _count_entries and _decode_tail."""
+
+    def test_count_entries(self) -> None:
+        self.assertEqual(_count_entries(b"[]"), 0)
+        self.assertEqual(_count_entries(b"[ \t]"), 0)
+        self.assertEqual(_count_entries(b"[\r\n]"), 0)
+        self.assertEqual(_count_entries(b'[{"idx":0}]'), 1)
+        self.assertEqual(_count_entries(TALKS), 3)
+
+    def test_decode_tail(self) -> None:
+        talks: list[dict] = json.loads(TALKS)
+        self.assertEqual(_decode_tail(b"[]", 0), [])
+        self.assertEqual(_decode_tail(TALKS, 0), talks)
+        self.assertEqual(_decode_tail(TALKS, 1), talks[1:])
+        self.assertEqual(_decode_tail(TALKS, 2), talks[2:])
+        self.assertEqual(_decode_tail(TALKS, 3), [])
+        self.assertEqual(_decode_tail(TALKS, 5), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
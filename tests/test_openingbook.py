@@ -0,0 +1,67 @@
+#
+# test_openingbook.py
+#
+# Copyright 2022 OTSUKI Takashi
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from aiwolf import Role
+
+from openingbook import ENTRY, HEADER, OPENINGS, Key, OpeningBook, pack_book
+
+ROLES: tuple[Role, ...] = (Role.VILLAGER, Role.SEER, Role.MEDIUM, Role.BODYGUARD, Role.POSSESSED, Role.WEREWOLF)
+"""Existing roles of the 15-player regulation."""
+
+
+class OpeningBookTest(unittest.TestCase):
+    """Tests of pack_book and OpeningBook."""
+
+    def setUp(self) -> None:
+        self.weights: list[int] = list(range(1, len(OPENINGS) + 1))
+        self.entries: dict[Key, list[int]] = {
+            (15, ROLES, Role.POSSESSED): self.weights,
+            (5, (Role.VILLAGER, Role.SEER, Role.POSSESSED, Role.WEREWOLF), Role.WEREWOLF): [0] * len(OPENINGS),
+            (15, ROLES, Role.WEREWOLF): [0] * (len(OPENINGS) - 1) + [1],
+        }
+        self.book: OpeningBook = OpeningBook(pack_book(self.entries))
+
+    def test_get_weights(self) -> None:
+        self.assertEqual(self.book.get_weights(15, ROLES, Role.POSSESSED), tuple(self.weights))
+        self.assertEqual(self.book.get_weights(15, reversed(ROLES), Role.POSSESSED), tuple(self.weights))
+        self.assertIsNone(self.book.get_weights(15, ROLES, Role.VILLAGER))
+        self.assertIsNone(self.book.get_weights(5, ROLES, Role.POSSESSED))
+
+    def test_choose(self) -> None:
+        self.assertEqual(self.book.choose(15, ROLES, Role.WEREWOLF), OPENINGS[-1])
+        self.assertIn(self.book.choose(15, ROLES, Role.POSSESSED), OPENINGS)
+        self.assertIsNone(self.book.choose(5, (Role.VILLAGER, Role.SEER, Role.POSSESSED, Role.WEREWOLF),
+                                           Role.WEREWOLF))
+        self.assertIsNone(self.book.choose(15, ROLES, Role.SEER))
+
+    def test_empty_book(self) -> None:
+        buffer: bytes = pack_book({})
+        self.assertEqual(len(buffer), HEADER.size)
+        self.assertIsNone(OpeningBook(buffer).get_weights(15, ROLES, Role.POSSESSED))
+
+    def test_bad_buffer(self) -> None:
+        buffer: bytes = pack_book(self.entries)
+        self.assertEqual(len(buffer), HEADER.size + len(self.entries) * ENTRY.size)
+        for bad in (b"XXXX" + buffer[4:], buffer[:-1], buffer + b"\0", buffer[:4] + b"\x63\0" + buffer[6:]):
+            with self.assertRaises(ValueError):
+                OpeningBook(bad)
+
+
+if __name__ == "__main__":
+    unittest.main()
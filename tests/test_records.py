@@ -0,0 +1,94 @@
+#
+# test_records.py
+#
+# Copyright 2022 OTSUKI Takashi
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from aiwolf import Agent, Role, Species
+
+from records import ComingoutTable, Report, ReportLog
+
+
+class ReportLogTest(unittest.TestCase):
+    """Tests of ReportLog."""
+
+    def test_round_trip(self) -> None:
+        log: ReportLog = ReportLog()
+        reports: list[Report] = [Report(Agent(1), 1, Agent(3), Species.WEREWOLF),
+                                 Report(Agent(2), 1, Agent(4), Species.HUMAN),
+                                 Report(Agent(12), 2, Agent(15), Species.UNC),
+                                 Report(Agent(1), 3, Agent(5), Species.ANY)]
+        for r in reports:
+            log.append(*r)
+        self.assertEqual(len(log), 4)
+        self.assertEqual(list(log), reports)
+        self.assertEqual(log[-1], reports[-1])
+        with self.assertRaises(IndexError):
+            log[4]
+        with self.assertRaises(IndexError):
+            log[-5]
+
+    def test_reset_reuses_storage(self) -> None:
+        log: ReportLog = ReportLog()
+        log.append(Agent(1), 1, Agent(3), Species.WEREWOLF)
+        log.append(Agent(2), 1, Agent(4), Species.HUMAN)
+        log.reset()
+        self.assertEqual(len(log), 0)
+        self.assertEqual(list(log), [])
+        self.assertEqual(log.generation, 1)
+        log.append(Agent(5), 2, Agent(6), Species.HUMAN)
+        self.assertEqual(list(log), [Report(Agent(5), 2, Agent(6), Species.HUMAN)])
+        self.assertEqual(len(log.agents), 2)
+        log.append(Agent(7), 2, Agent(8), Species.WEREWOLF)
+        log.append(Agent(9), 3, Agent(10), Species.WEREWOLF)
+        self.assertEqual([r.agent for r in log], [Agent(5), Agent(7), Agent(9)])
+        self.assertEqual(len(log.results), 3)
+
+
+class ComingoutTableTest(unittest.TestCase):
+    """Tests of ComingoutTable."""
+
+    def test_set_and_get(self) -> None:
+        table: ComingoutTable = ComingoutTable()
+        table[Agent(5)] = Role.SEER
+        table[Agent(2)] = Role.MEDIUM
+        table[Agent(5)] = Role.VILLAGER
+        self.assertEqual(len(table), 2)
+        self.assertEqual(table[Agent(5)], Role.VILLAGER)
+        self.assertEqual(table.get(Agent(3)), None)
+        self.assertEqual(table.get(Agent(30), Role.UNC), Role.UNC)
+        self.assertIn(Agent(2), table)
+        self.assertNotIn(Agent(3), table)
+        self.assertNotIn(2, table)
+        self.assertEqual(list(table), [Agent(2), Agent(5)])
+        self.assertEqual(list(table.items()), [(Agent(2), Role.MEDIUM), (Agent(5), Role.VILLAGER)])
+        with self.assertRaises(KeyError):
+            table[Agent(3)]
+
+    def test_clear(self) -> None:
+        table: ComingoutTable = ComingoutTable()
+        table[Agent(1)] = Role.SEER
+        table.clear()
+        self.assertEqual(len(table), 0)
+        self.assertNotIn(Agent(1), table)
+        self.assertEqual(list(table.items()), [])
+        table[Agent(1)] = Role.WEREWOLF
+        self.assertEqual(len(table), 1)
+        self.assertEqual(table[Agent(1)], Role.WEREWOLF)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+#
+# test_villager.py
+#
+# Copyright 2022 OTSUKI Takashi
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from aiwolf import Agent, Role, Talk
+
+from agentset import AgentSet
+from bodyguard import SampleBodyguard
+from simulator import GameSimulator
+from villager import SampleVillager
+
+ROLES: list[Role] = [Role.SEER, Role.MEDIUM, Role.BODYGUARD, Role.POSSESSED, Role.WEREWOLF, Role.WEREWOLF,
+                     Role.WEREWOLF] + [Role.VILLAGER] * 8
+"""Fixed roles of Agent[01] to Agent[15]. The bodyguard under test is Agent[03]."""
+
+
+class CandidateTest(unittest.TestCase):
+    """Tests of the candidates chosen from the indexes of the reports."""
+
+    def setUp(self) -> None:
+        self.bodyguard: SampleBodyguard = SampleBodyguard()
+        players: list[SampleVillager] = [SampleVillager() for _ in ROLES]
+        players[2] = self.bodyguard
+        self.sim: GameSimulator = GameSimulator(players, 0, ROLES)
+        self.sim.initialize()
+        self.sim.day = 1
+        self.sim.refresh()
+        self.sim.update(3).day_start()
+
+    def tell(self, *talks: tuple[int, str]) -> None:
+        """Show the talks of the agents to the bodyguard."""
+        for agent, text in talks:
+            self.sim.talks.append(Talk.compile({"idx": len(self.sim.talks), "day": 1, "turn": 0,  # type: ignore
+                                                "agent": agent, "text": text}))
+        self.sim.update(3)
+
+    def test_fake_seer_is_not_guarded(self) -> None:
+        self.tell((1, "DIVINED Agent[05] HUMAN"), (4, "DIVINED Agent[03] WEREWOLF"))
+        self.assertEqual(self.bodyguard.fake_seers, AgentSet.of([Agent(4)]))
+        candidates, role = self.bodyguard.guard_rules["SEERS"]()
+        self.assertEqual(candidates, AgentSet.of([Agent(1)]))
+        self.assertEqual(role, Role.SEER)
+        self.assertEqual(self.bodyguard.guard(), Agent(1))
+
+    def test_reports_of_fake_seer_are_withdrawn(self) -> None:
+        self.tell((4, "DIVINED Agent[06] WEREWOLF"))
+        self.assertEqual(self.bodyguard.reported_wolves, AgentSet.of([Agent(6)]))
+        self.tell((4, "DIVINED Agent[03] WEREWOLF"))
+        self.assertEqual(self.bodyguard.reported_wolves, AgentSet())
+        self.assertEqual(self.bodyguard.vote_rules["REPORTED_WOLVES"](), AgentSet())
+
+    def test_candidates_are_deduplicated(self) -> None:
+        self.tell((1, "DIVINED Agent[06] WEREWOLF"), (1, "DIVINED Agent[06] WEREWOLF"),
+                  (2, "DIVINED Agent[06] WEREWOLF"))
+        self.assertEqual(self.bodyguard.vote_rules["REPORTED_WOLVES"](), AgentSet.of([Agent(6)]))
+        self.assertEqual(self.bodyguard.reported_wolf_counts, {Agent(6): 2})
+        self.assertEqual(self.bodyguard.wolf_accusers[Agent(6)], AgentSet.of([Agent(1), Agent(2)]))
+        self.assertEqual(self.bodyguard.seers, AgentSet.of([Agent(1), Agent(2)]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+#
+# test_votegraph.py
+#
+# Copyright 2022 OTSUKI Takashi
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+import numpy as np
+from aiwolf import Agent
+
+from agentset import AgentSet
+from votegraph import VoteGraph
+
+ANY: Agent = Agent(0xff)
+"""The agent standing for any agent, which is out of the game."""
+
+
+class VoteGraphTest(unittest.TestCase):
+    """Tests of VoteGraph."""
+
+    def setUp(self) -> None:
+        self.graph: VoteGraph = VoteGraph()
+        self.graph.reset(5, days=2)
+
+    def test_out_of_range_agents_are_ignored(self) -> None:
+        self.graph.declare(1, Agent(1), ANY)
+        self.graph.add_vote(1, Agent(0), Agent(2))
+        self.graph.add_vote(1, Agent(6), Agent(2))
+        self.graph.add_vote(-1, Agent(1), Agent(2))
+        self.assertEqual(self.graph.days, 0)
+        self.assertFalse(self.graph.votes.any())
+        self.assertFalse(self.graph.declared.any())
+
+    def test_revote_replaces_vote(self) -> None:
+        self.graph.add_vote(1, Agent(1), Agent(2))
+        self.graph.add_vote(1, Agent(1), Agent(3))
+        self.assertEqual(self.graph.total[0].tolist(), [0, 0, 1, 0, 0])
+
+    def test_broken_declarations(self) -> None:
+        self.graph.declare(1, Agent(1), Agent(2))
+        self.graph.add_vote(1, Agent(1), Agent(3))
+        self.graph.declare(1, Agent(2), Agent(3))
+        self.graph.declare(1, Agent(2), Agent(1))
+        self.graph.add_vote(1, Agent(2), Agent(1))
+        self.graph.add_vote(1, Agent(3), Agent(1))  # No declaration.
+        self.graph.declare(1, Agent(4), Agent(1))  # No vote.
+        self.assertEqual(self.graph.broken_declarations().tolist(), [1, 0, 0, 0, 0])
+
+    def test_votes_against(self) -> None:
+        self.graph.add_vote(1, Agent(1), Agent(2))
+        self.graph.add_vote(2, Agent(1), Agent(3))
+        self.graph.add_vote(2, Agent(4), Agent(5))
+        self.assertEqual(self.graph.votes_against(AgentSet.of([Agent(2), Agent(3)])).tolist(), [2, 0, 0, 0, 0])
+        self.assertEqual(self.graph.votes_against(AgentSet()).tolist(), [0] * 5)
+
+    def test_similarity(self) -> None:
+        self.graph.add_vote(1, Agent(1), Agent(5))
+        self.graph.add_vote(1, Agent(2), Agent(5))
+        self.graph.add_vote(2, Agent(1), Agent(4))
+        self.graph.add_vote(2, Agent(2), Agent(3))
+        similarity: np.ndarray = self.graph.similarity()
+        self.assertEqual(similarity[0, 1], 0.5)
+        self.assertEqual(similarity[0, 0], 1.0)
+        self.assertEqual(similarity[0, 2], 0.0)  # Agent[03] never voted.
+        self.assertTrue((similarity == similarity.T).all())
+
+    def test_storage_grows(self) -> None:
+        self.graph.add_vote(6, Agent(1), Agent(2))
+        self.assertEqual(self.graph.days, 7)
+        self.assertGreaterEqual(len(self.graph.votes), 7)
+        self.assertEqual(len(self.graph.declared), len(self.graph.votes))
+        self.graph.declare(9, Agent(2), Agent(1))
+        self.assertEqual(self.graph.days, 10)
+        self.assertEqual(len(self.graph.declared), len(self.graph.votes))
+        self.assertEqual(self.graph.total[0].tolist(), [0, 1, 0, 0, 0])
+
+    def test_reset_reuses_storage(self) -> None:
+        self.graph.add_vote(1, Agent(1), Agent(2))
+        votes: np.ndarray = self.graph.votes
+        self.graph.reset(5)
+        self.assertIs(self.graph.votes, votes)
+        self.assertEqual(self.graph.days, 0)
+        self.assertFalse(self.graph.votes.any())
+        self.graph.reset(15)
+        self.assertEqual(self.graph.votes.shape[1:], (15, 15))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env -S python -B
+#
+# tournament.py
+#
+# Copyright 2022 OTSUKI Takashi
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gzip
+import importlib
+import json
+import math
+import random
+import time
+from argparse import ArgumentParser
+from multiprocessing import Pool
+from typing import Any, Iterator, Optional
+
+from aiwolf import AbstractPlayer, Agent
+
+from profiles import ProfileStore
+from simulator import GameResult, run_game
+from villager import SampleVillager
+
+COLUMNS: tuple[str, ...] = ("game", "seed", "agent", "strategy", "role", "win", "alive", "day")
+"""Columns of the results file."""
+
+_strategies: list[str] = []
+_players: dict[str, list[AbstractPlayer]] = {}
+
+
+def load_player_class(path: str) -> type:
+    """Return the player class given by the import path.
+
+    Args:
+        path: The import path in the form of "module:Class" or "module.Class",
+            optionally followed by "#label" to tell apart the strategies of the same class.
+
+    Returns:
+        The class of AbstractPlayer.
+    """
+    module_name, _, class_name = path.partition("#")[0].replace(":", ".").rpartition(".")
+    cls: Any = getattr(importlib.import_module(module_name), class_name)
+    if not (isinstance(cls, type) and issubclass(cls, AbstractPlayer)):
+        raise TypeError(f"{path} is not a subclass of AbstractPlayer")
+    return cls
+
+
+def _init_worker(strategies: list[str], player_num: int, options: dict[str, dict[str, Any]],
+                 profiles: Optional[str]) -> None:
+    # Players are created once per worker and reused across games as a client process does.
+    global _strategies, _players
+    _strategies = strategies
+    if profiles is not None:
+        SampleVillager.profile_store = ProfileStore(profiles)
+    _players = {s: [load_player_class(s)(**options.get(s, {})) for _ in range(player_num)]
+                for s in dict.fromkeys(strategies)}
+
+
+def _play(job: tuple[int, int, int]) -> list[tuple[Any, ...]]:
+    game, seed, player_num = job
+    # Seat the strategies in turn from where the last game stopped, so that all of them play
+    # even if they outnumber the seats, and shuffle the seats independently of the role assignment.
+    seats: list[str] = [_strategies[(game * player_num + i) % len(_strategies)] for i in range(player_num)]
+    random.Random(f"seats-{seed}").shuffle(seats)
+    players: list[AbstractPlayer] = [_players[s][i] for i, s in enumerate(seats)]
+    if SampleVillager.profile_store is not None:
+        # Unlike the server, the tournament knows who plays each agent, so the opponents are profiled by strategy.
+        names: dict[Agent, str] = {Agent(i + 1): s for i, s in enumerate(seats)}
+        for player in players:
+            if hasattr(player, "set_agent_names"):
+                player.set_agent_names(names)
+    result: GameResult = run_game(players, seed)
+    return [(game, seed, i, seats[i - 1], result.roles[i].value, result.is_winner(i), result.alive[i], result.day)
+            for i in sorted(result.roles)]
+
+
+def run_tournament(strategies: list[str], games: int, player_num: int = 15, seed: int = 0,
+                   processes: Optional[int] = None, chunksize: int = 16,
+                   options: Optional[dict[str, dict[str, Any]]] = None,
+                   profiles: Optional[str] = None) -> Iterator[tuple[Any, ...]]:
+    """Play games in a process pool and yield a row per agent per game as soon as the game ends.
+
+    Args:
+        strategies: The import paths of the players. They are seated in turn.
+        games: The number of games.
+        player_num: The number of players, 5 or 15.
+        seed: The base seed. The game n is played with the seed (seed + n).
+        processes: The number of worker processes. The number of CPUs if None.
+        chunksize: The number of games sent to a worker at once.
+        options: Mapping between a strategy and the keyword arguments its players are created with.
+        profiles: SQLite file the players profile the opponents in by their strategies, or None not to profile.
+
+    Yields:
+        Rows whose fields are given by COLUMNS.
+    """
+    jobs: Iterator[tuple[int, int, int]] = ((g, seed + g, player_num) for g in range(games))
+    with Pool(processes, _init_worker, (strategies, player_num, options or {}, profiles)) as pool:
+        for rows in pool.imap_unordered(_play, jobs, chunksize):
+            yield from rows
+
+
+def wilson_interval(wins: int, n: int, z: float = 1.96) -> tuple[float, float]:
+    """Return the Wilson score interval of the win rate.
+
+    Args:
+        wins: The number of wins.
+        n: The number of games.
+        z: The quantile of the standard normal distribution. 1.96 for 95%.
+
+    Returns:
+        The lower and upper bounds.
+    """
+    if n == 0:
+        return 0.0, 1.0
+    p: float = wins / n
+    center: float = (p + z * z / (2 * n)) / (1 + z * z / n)
+    margin: float = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    return center - margin, center + margin
+
+
+def summarize(columns: dict[str, list[Any]]) -> list[tuple[str, str, int, int]]:
+    """Return the numbers of games and wins per strategy and role.
+
+    Args:
+        columns: The results in columns.
+
+    Returns:
+        A list of (strategy, role, games, wins). The role "ALL" aggregates all the roles.
+    """
+    counts: dict[tuple[str, str], list[int]] = {}
+    for strategy, role, win in zip(columns["strategy"], columns["role"], columns["win"]):
+        for key in ((strategy, role), (strategy, "ALL")):
+            c: list[int] = counts.setdefault(key, [0, 0])
+            c[0] += 1
+            c[1] += win
+    return [(s, r, c[0], c[1]) for (s, r), c in sorted(counts.items())]
+
+
+def write_results(path: str, columns: dict[str, list[Any]]) -> None:
+    """Write the results to a gzipped JSON file holding a list per column."""
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(columns, f, separators=(",", ":"))
+
+
+if __name__ == "__main__":
+    parser: ArgumentParser = ArgumentParser(description="Play a tournament among players in process.")
+    parser.add_argument("-g", "--games", type=int, default=1000)
+    parser.add_argument("-n", "--players", type=int, choices=(5, 15), default=15)
+    parser.add_argument("-j", "--processes", type=int, default=None)
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", type=str, default="results.json.gz")
+    parser.add_argument("--profiles", type=str, default=None,
+                        help="SQLite file of the opponent profiles, kept by strategy across tournaments")
+    parser.add_argument("strategies", nargs="*", default=["sample:SamplePlayer"],
+                        help="import paths of AbstractPlayer subclasses such as sample:SamplePlayer")
+    args = parser.parse_args()
+    columns: dict[str, list[Any]] = {c: [] for c in COLUMNS}
+    start: float = time.perf_counter()
+    for row in run_tournament(args.strategies, args.games, args.players, args.seed, args.processes,
+                               profiles=args.profiles):
+        for c, v in zip(COLUMNS, row):
+            columns[c].append(v)
+    elapsed: float = time.perf_counter() - start
+    write_results(args.output, columns)
+    print(f"{args.games} games in {elapsed:.1f}s ({args.games / elapsed * 60:.0f} games/min)")
+    print(f"{'strategy':<32}{'role':<12}{'games':>8}{'win rate':>10}  95% CI")
+    for strategy, role, n, wins in summarize(columns):
+        low, high = wilson_interval(wins, n)
+        print(f"{strategy:<32}{role:<12}{n:>8}{wins / n:>10.3f}  [{low:.3f}, {high:.3f}]")
@@ -0,0 +1,216 @@
+#
+# tracing.py
+#
+# Copyright 2022 OTSUKI Takashi
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import struct
+import sys
+from array import array
+from typing import BinaryIO, Iterator, NamedTuple
+
+from aiwolf import Role
+
+from records import ROLE_CODES, ROLES
+
+
+class Action:
+    """Codes of the callbacks making decisions.
+
+    They are plain integers rather than an enum, whose members take several times longer to look up.
+    """
+
+    TALK: int = 0
+    WHISPER: int = 1
+    VOTE: int = 2
+    DIVINE: int = 3
+    GUARD: int = 4
+    ATTACK: int = 5
+
+
+class Branch:
+    """Codes of the rules making decisions."""
+
+    COMINGOUT: int = 0
+    """Comingout as the role, real or fake."""
+    REPORT: int = 1
+    """Report of a judgement, real or fake."""
+    REPORTED_WOLVES: int = 2
+    """Agents reported as werewolves by non-fake seers."""
+    FAKE_SEERS: int = 3
+    """Seers that reported me as a werewolf."""
+    WEREWOLVES: int = 4
+    """Werewolves found by my judgements, real or fake."""
+    CLAIMANTS: int = 5
+    """Agents claiming the same role as me."""
+    SEERS: int = 6
+    """Non-fake seers."""
+    MEDIUMS: int = 7
+    """Agents claiming medium."""
+    HUMANS: int = 8
+    """Humans, who may be attacked."""
+    COMINGOUT_HUMANS: int = 9
+    """Humans that did comingout."""
+    UNDIVINED: int = 10
+    """Agents not divined yet."""
+    ALIVE_OTHERS: int = 11
+    """Any alive agents, when no rule above applies."""
+    CANDIDATE: int = 12
+    """The candidate chosen while talking or whispering."""
+    MYSELF: int = 13
+    """Myself, when there is no candidate."""
+
+
+ACTION_NAMES: dict[int, str] = {v: k for k, v in vars(Action).items() if k.isupper()}
+"""Mapping between the code of an action and its name."""
+
+BRANCH_NAMES: dict[int, str] = {v: k for k, v in vars(Branch).items() if k.isupper()}
+"""Mapping between the code of a rule and its name."""
+
+
+MAGIC: bytes = b"AWDT"
+"""Magic number at the head of a block of a decision trace."""
+
+VERSION: int = 1
+"""Version of the format of a decision trace."""
+
+HEADER: struct.Struct = struct.Struct("<4sHHBB")
+"""Magic number, version, the number of the decisions, my agent number and my role code."""
+
+UINT32: str = next(c for c in "IL" if array(c).itemsize == 4)
+"""Type code of the 32-bit unsigned integers, whose letter depends on the platform."""
+
+COLUMNS: tuple[tuple[str, str], ...] = (("actions", "B"), ("branches", "B"), ("days", "B"), ("turns", "B"),
+                                        ("candidates", UINT32), ("choices", "B"))
+"""Names and type codes of the columns, in the order of a block. Each code has the same size on any platform."""
+
+
+class DecisionTrace:
+    """Fixed-size ring buffer of the decisions in a game, stored in preallocated parallel arrays.
+
+    Only the latest decisions up to the capacity are kept.
+    """
+
+    __slots__ = ("capacity", "count") + tuple(name for name, _ in COLUMNS)
+
+    def __init__(self, capacity: int = 1024) -> None:
+        """Initialize a new instance of DecisionTrace.
+
+        Args:
+            capacity: The maximum number of the decisions kept.
+        """
+        self.capacity: int = capacity
+        """The maximum number of the decisions kept."""
+        self.count: int = 0
+        """The number of the decisions recorded in the current game."""
+        self.actions: array[int] = array("B", bytes(capacity))
+        """Actions of the decisions."""
+        self.branches: array[int] = array("B", bytes(capacity))
+        """Rules that made the decisions."""
+        self.days: array[int] = array("B", bytes(capacity))
+        """Days of the decisions."""
+        self.turns: array[int] = array("B", bytes(capacity))
+        """Turns of the last talks before the decisions."""
+        self.candidates: array[int] = array(UINT32, bytes(4 * capacity))
+        """Bitmasks of the agent numbers of the candidates."""
+        self.choices: array[int] = array("B", bytes(capacity))
+        """Agent numbers of the chosen agents, 0 if none."""
+
+    def record(self, action: int, branch: int, day: int, turn: int, candidates: int, choice: int) -> None:
+        """Record the decision, overwriting the oldest one if full.
+
+        Args:
+            action: The action.
+            branch: The rule.
+            day: The day.
+            turn: The turn of the last talk.
+            candidates: The bitmask of the candidates.
+            choice: The agent number of the chosen agent, 0 if none.
+        """
+        i: int = self.count % self.capacity
+        self.actions[i] = action
+        self.branches[i] = branch
+        self.days[i] = day
+        self.turns[i] = turn
+        self.candidates[i] = candidates
+        self.choices[i] = choice
+        self.count += 1
+
+    def reset(self) -> None:
+        """Forget the decisions for a new game, keeping the storage."""
+        self.count = 0
+
+    def to_bytes(self, agent_idx: int, role: Role) -> bytes:
+        """Return the decisions of the game as a block of columns in chronological order.
+
+        Args:
+            agent_idx: My agent number.
+            role: My role.
+
+        Returns:
+            The block, whose columns are little-endian.
+        """
+        n: int = min(self.count, self.capacity)
+        start: int = self.count % self.capacity if self.count > self.capacity else 0
+        chunks: list[bytes] = [HEADER.pack(MAGIC, VERSION, n, agent_idx, ROLE_CODES[role])]
+        for name, _ in COLUMNS:
+            column: array[int] = getattr(self, name)
+            ordered: array[int] = column[start:n] + column[:start]
+            if sys.byteorder == "big":
+                ordered.byteswap()
+            chunks.append(ordered.tobytes())
+        return b"".join(chunks)
+
+
+def append_trace(path: str, block: bytes) -> None:
+    """Append the block to the file of decision traces with a single write, which appends atomically."""
+    with open(path, "ab") as f:
+        f.write(block)
+
+
+class TraceBlock(NamedTuple):
+    """Decisions of an agent in a game read from a decision trace."""
+
+    agent_idx: int
+    """The agent number."""
+    role: Role
+    """The role."""
+    columns: dict[str, array]
+    """Mapping between the name of a column and its values."""
+
+
+def read_traces(f: BinaryIO) -> Iterator[TraceBlock]:
+    """Read the blocks of decision traces from the file.
+
+    Args:
+        f: The file opened in binary mode.
+
+    Yields:
+        The blocks in the order they were written.
+
+    Raises:
+        ValueError: If the file is not a decision trace of this version.
+    """
+    while header := f.read(HEADER.size):
+        magic, version, n, agent_idx, role_code = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"not a decision trace of version {VERSION}")
+        columns: dict[str, array] = {}
+        for name, code in COLUMNS:
+            column: array[int] = array(code)
+            column.frombytes(f.read(n * column.itemsize))
+            if sys.byteorder == "big":
+                column.byteswap()
+            columns[name] = column
+        yield TraceBlock(agent_idx, ROLES[role_code], columns)
@@ -0,0 +1,145 @@
+#!/usr/bin/env -S python -B
+#
+# tuner.py
+#
+# Copyright 2022 OTSUKI Takashi
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import itertools
+import json
+import math
+import random
+import time
+from argparse import ArgumentParser
+from typing import Any, Iterator, NamedTuple, Optional
+
+from params import GUARD_RULES, VOTE_RULES, Params
+from tournament import run_tournament, wilson_interval
+
+PLAYER: str = "sample:SamplePlayer"
+"""Import path of the player whose parameters are tuned."""
+
+
+def get_orders(rules: tuple[str, ...]) -> tuple[tuple[str, ...], ...]:
+    """Return all the orders of all the subsets of the rules."""
+    return tuple(o for n in range(len(rules) + 1) for o in itertools.permutations(rules, n))
+
+
+SPACE: dict[str, tuple[Any, ...]] = {
+    "seer_co_date": (1, 2, 3),
+    "medium_co_date": (1, 2, 3),
+    "possessed_co_date": (1, 2, 3),
+    "werewolf_co_date_min": (1, 2, 3),
+    "werewolf_co_date_max": (1, 2, 3),
+    "possessed_fake_wolf_prob": (0.1, 0.3, 0.5, 0.7, 0.9),
+    "werewolf_fake_wolf_prob": (0.1, 0.3, 0.5, 0.7),
+    "vote_rules": get_orders(VOTE_RULES),
+    "guard_rules": get_orders(GUARD_RULES),
+}
+"""Mapping between a parameter name and the values it is tuned over."""
+
+
+class Standing(NamedTuple):
+    """Results of a configuration so far."""
+
+    index: int
+    """The index of the configuration. 0 is the default parameters."""
+    params: Params
+    """The parameters."""
+    seats: int
+    """The number of the seats it has played."""
+    wins: int
+    """The number of the seats it has won."""
+
+    @property
+    def win_rate(self) -> float:
+        """The win rate."""
+        return self.wins / self.seats if self.seats > 0 else 0.0
+
+
+def sample_params(rng: random.Random) -> Params:
+    """Return parameters drawn uniformly from SPACE among the valid ones."""
+    while True:
+        try:
+            return Params.from_dict({k: rng.choice(v) for k, v in SPACE.items()})
+        except ValueError:  # For example, werewolf_co_date_max is less than werewolf_co_date_min.
+            continue
+
+
+def successive_halving(configs: list[Params], min_seats: int, eta: int = 2, player_num: int = 15,
+                       seed: int = 0, processes: Optional[int] = None) -> Iterator[list[Standing]]:
+    """Play the configurations against each other and keep the best 1/eta of them after each rung.
+
+    Every rung costs about the same number of games, since the survivors play eta times more seats each.
+    The rungs stop early when the best configuration is better than all the others beyond doubt.
+
+    Args:
+        configs: The configurations.
+        min_seats: The number of the seats each configuration plays in the first rung.
+        eta: The reduction factor.
+        player_num: The number of players, 5 or 15.
+        seed: The base seed.
+        processes: The number of worker processes. The number of CPUs if None.
+
+    Yields:
+        The standings of the survivors after each rung, the best first.
+    """
+    results: dict[int, list[int]] = {i: [0, 0] for i in range(len(configs))}
+    survivors: list[int] = list(results)
+    seats: int = min_seats
+    offset: int = seed
+    while True:
+        labels: dict[str, int] = {f"{PLAYER}#{i}": i for i in survivors}
+        games: int = math.ceil(seats * len(survivors) / player_num)
+        for row in run_tournament(list(labels), games, player_num, offset, processes,
+                                  options={s: {"params": configs[i]} for s, i in labels.items()}):
+            r: list[int] = results[labels[row[3]]]
+            r[0] += 1
+            r[1] += row[5]
+        offset += games
+        standings: list[Standing] = sorted((Standing(i, configs[i], *results[i]) for i in survivors),
+                                           key=lambda s: s.win_rate, reverse=True)
+        yield standings
+        best_low: float = wilson_interval(standings[0].wins, standings[0].seats)[0]
+        if len(standings) == 1 or all(wilson_interval(s.wins, s.seats)[1] < best_low for s in standings[1:]):
+            return
+        survivors = [s.index for s in standings[:max(1, len(standings) // eta)]]
+        seats *= eta
+
+
+if __name__ == "__main__":
+    parser: ArgumentParser = ArgumentParser(description="Tune the strategy parameters by successive halving.")
+    parser.add_argument("-c", "--configs", type=int, default=16, help="number of configurations including the default")
+    parser.add_argument("-m", "--min-seats", type=int, default=60, help="seats per configuration in the first rung")
+    parser.add_argument("-e", "--eta", type=int, default=2)
+    parser.add_argument("-n", "--players", type=int, choices=(5, 15), default=15)
+    parser.add_argument("-j", "--processes", type=int, default=None)
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", type=str, default="params.json")
+    args = parser.parse_args()
+    rng: random.Random = random.Random(args.seed)
+    configs: list[Params] = [Params()] + [sample_params(rng) for _ in range(args.configs - 1)]
+    start: float = time.perf_counter()
+    standings: list[Standing] = []
+    for rung, standings in enumerate(successive_halving(configs, args.min_seats, args.eta, args.players,
+                                                        args.seed, args.processes)):
+        print(f"rung {rung}: {time.perf_counter() - start:.1f}s")
+        for s in standings:
+            low, high = wilson_interval(s.wins, s.seats)
+            print(f"  #{s.index:<4}{s.seats:>8}{s.win_rate:>8.3f}  [{low:.3f}, {high:.3f}]")
+    best: Standing = standings[0]
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(best.params.to_dict(), f, indent=2)
+        f.write("\n")
+    print(f"#{best.index} written to {args.output}")
@@ -16,18 +16,47 @@
 # limitations under the License.
 
 import random
+from functools import partial
+from typing import Callable, Iterator, Optional, Union
+
+import numpy as np
+import numpy.typing as npt
 
 from aiwolf import (AbstractPlayer, Agent, Content, GameInfo, GameSetting,
-                    Judge, Role, Species, Status, Talk, Topic,
-                    VoteContentBuilder)
+                    Role, Species, Status, Talk, Topic, Vote)
 from aiwolf.constant import AGENT_NONE
 
-from const import CONTENT_SKIP
+from agentset import AgentSet
+from anytime import Search, Selection
+from belief import RoleBelief
+from const import AGENT_SET_EMPTY, CONTENT_SKIP
+from contentcache import ContentCache, ContentTable
+from events import AgentDied, AgentExecuted, EventDispatcher, TalkReceived, VoteCast
+from openingbook import Opening, OpeningBook
+from params import Params
+from postgame import PostGameWorker, Task
+from profiles import OpponentProfile, ProfileStore
+from records import ComingoutTable, ReportLog
+from tracing import Action, Branch, DecisionTrace, append_trace
+from votegraph import VoteGraph
 
 
 class SampleVillager(AbstractPlayer):
     """Sample villager agent."""
 
+    content_cache: ContentCache = ContentCache()
+    """Parse cache of talk texts shared by all the agents."""
+    profile_store: Optional[ProfileStore] = None
+    """Store of the opponent profiles shared by all the agents, or None not to profile the opponents."""
+    post_game: Optional[PostGameWorker] = None
+    """Worker running the post-game work in the background, or None to run it in finish()."""
+    opening_book: Optional[OpeningBook] = None
+    """Opening book shared by all the agents, or None to use the default openings."""
+    trace_path: Optional[str] = None
+    """File the decision trace is appended to at the end of each game, or None not to write it."""
+    params: Params = Params()
+    """Strategy parameters shared by all the agents unless a player gives its own."""
+
     def __init__(self) -> None:
         """Initialize a new instance of SampleVillager."""
         self.me: Agent = AGENT_NONE
@@ -38,14 +67,78 @@ class SampleVillager(AbstractPlayer):
         """Information about current game."""
         self.game_setting: GameSetting = None  # type: ignore
         """Settings of current game."""
-        self.comingout_map: dict[Agent, Role] = {}
+        self.contents: ContentTable = None  # type: ignore
+        """Prebuilt contents of the utterances in the regulation of current game."""
+        self.comingout_map: ComingoutTable = ComingoutTable()
         """Mapping between an agent and the role it claims that it is."""
-        self.divination_reports: list[Judge] = []
+        self.divination_reports: ReportLog = ReportLog()
         """Time series of divination reports."""
-        self.identification_reports: list[Judge] = []
+        self.identification_reports: ReportLog = ReportLog()
         """Time series of identification reports."""
-        self.talk_list_head: int = 0
-        """Index of the talk to be analysed next."""
+        self.events: EventDispatcher = EventDispatcher(self.content_cache)
+        """Dispatcher of the events extracted from the game information."""
+        self.others: AgentSet = AGENT_SET_EMPTY
+        """Agents excluding myself."""
+        self.alive_agents: AgentSet = AGENT_SET_EMPTY
+        """Alive agents."""
+        self.alive_others: AgentSet = AGENT_SET_EMPTY
+        """Alive agents excluding myself."""
+        self.claimants: dict[Role, AgentSet] = {}
+        """Mapping between a role and the agents claiming it."""
+        self.comingout_agents: AgentSet = AGENT_SET_EMPTY
+        """Agents that did comingout."""
+        self.seers: AgentSet = AGENT_SET_EMPTY
+        """Agents that reported divination results."""
+        self.wolf_targets: dict[Agent, AgentSet] = {}
+        """Mapping between a seer and the agents it reported as werewolves."""
+        self.wolf_accusers: dict[Agent, AgentSet] = {}
+        """Mapping between an agent and the seers that reported it as a werewolf."""
+        self.fake_seers: AgentSet = AGENT_SET_EMPTY
+        """Seers that reported me as a werewolf."""
+        self.reported_wolves: AgentSet = AGENT_SET_EMPTY
+        """Agents reported as werewolves by non-fake seers."""
+        self.reported_wolf_counts: dict[Agent, int] = {}
+        """Mapping between an agent in reported_wolves and the number of non-fake seers reporting it."""
+        self.belief: RoleBelief = RoleBelief()
+        """Probabilities of the roles of the agents."""
+        self.claims: list[tuple[Agent, Role]] = []
+        """Comingouts received in the current update."""
+        self.divinations: list[tuple[Agent, Agent, Species]] = []
+        """Divination reports received in the current update."""
+        self.identifications: list[tuple[Agent, Agent, Species]] = []
+        """Identification reports received in the current update."""
+        self.searches: dict[str, Search] = {}
+        """Mapping between an action and the incremental search that improves its choice."""
+        self.selections: dict[str, Selection] = {}
+        """Mapping between an action and the latest choice made by the rule for it."""
+        self.decision_trace: DecisionTrace = DecisionTrace()
+        """Decisions made in the current game."""
+        self.pending: tuple[int, int, AgentSet] = (Action.VOTE, Branch.MYSELF, AGENT_SET_EMPTY)
+        """Action code, rule code and candidates of the latest choice of a rule, recorded by commit()."""
+        self.agent_names: dict[Agent, str] = {}
+        """Mapping between an agent and its name, given by a runner that knows who plays which agent."""
+        self.profiling: bool = False
+        """Whether the opponents are profiled in current game."""
+        self.vote_log: list[Vote] = []
+        """Votes disclosed in the current game, collected only when profiling the opponents."""
+        self.vote_graph: VoteGraph = VoteGraph()
+        """Votes and declarations of votes in the current game."""
+        self.version: int = 0
+        """Version of the state the candidates are chosen from, incremented whenever it changes."""
+        self.vote_candidate_version: int = -1
+        """Version of the state when the vote candidate was checked last."""
+        self.events.subscribe(TalkReceived, self.on_talk)
+        self.events.subscribe(AgentDied, self.on_death)
+        self.events.subscribe(AgentExecuted, self.on_execution)
+        self.events.subscribe(VoteCast, self.on_vote)
+        self.register_search("vote", partial(self.search_selection, "vote"))
+        self.vote_rules: dict[str, Callable[[], AgentSet]] = {
+            # Vote for one of the alive agents that were judged as werewolves by non-fake seers.
+            "REPORTED_WOLVES": lambda: self.reported_wolves & self.alive_others,
+            # Vote for one of the alive fake seers that reported me as a werewolf.
+            "FAKE_SEERS": lambda: self.fake_seers & self.alive_agents,
+        }
+        """Mapping between the name of a vote rule in params and the function choosing its candidates."""
 
     def is_alive(self, agent: Agent) -> bool:
         """Return whether the agent is alive.
@@ -56,7 +149,7 @@ class SampleVillager(AbstractPlayer):
         Returns:
             True if the agent is alive, otherwise false.
         """
-        return self.game_info.status_map[agent] == Status.ALIVE
+        return agent in self.alive_agents
 
     def get_others(self, agent_list: list[Agent]) -> list[Agent]:
         """Return a list of agents excluding myself from the given list of agents.
@@ -78,7 +171,7 @@ class SampleVillager(AbstractPlayer):
         Returns:
             A list of alive agents contained in agent_list.
         """
-        return [a for a in agent_list if self.is_alive(a)]
+        return [a for a in agent_list if a in self.alive_agents]
 
     def get_alive_others(self, agent_list: list[Agent]) -> list[Agent]:
         """Return a list of alive agents that is contained in the given list of agents
@@ -93,83 +186,433 @@ class SampleVillager(AbstractPlayer):
         """
         return self.get_alive(self.get_others(agent_list))
 
-    def random_select(self, agent_list: list[Agent]) -> Agent:
-        """Return one agent randomly chosen from the given list of agents.
+    def random_select(self, agent_list: Union[list[Agent], AgentSet]) -> Agent:
+        """Return one agent randomly chosen from the given list or set of agents.
 
         Args:
-            agent_list: The list of agents.
+            agent_list: The list or set of agents.
 
         Returns:
             A agent randomly chosen from agent_list.
         """
-        return random.choice(agent_list) if agent_list else AGENT_NONE
+        if not agent_list:
+            return AGENT_NONE
+        return random.choice(agent_list.to_list() if isinstance(agent_list, AgentSet) else agent_list)
+
+    def get_claimants(self, role: Role) -> AgentSet:
+        """Return the set of agents that claim the given role.
+
+        Args:
+            role: The role.
+
+        Returns:
+            The set of agents whose latest comingout is role.
+        """
+        return self.claimants.get(role, AGENT_SET_EMPTY)
+
+    def update_status(self) -> None:
+        """Refresh the sets of alive agents from the current game information,
+        and increment the version only if they have changed."""
+        alive_agents: AgentSet = AgentSet.of(a for a, s in self.game_info.status_map.items() if s == Status.ALIVE)
+        if alive_agents == self.alive_agents:
+            return
+        self.alive_agents = alive_agents
+        self.alive_others = self.alive_agents.without_agent(self.me)
+        self.version += 1
+
+    def is_vote_candidate_fresh(self) -> bool:
+        """Return whether the vote candidate was checked against the current state,
+        in which case the candidates need not be computed again.
+
+        Returns:
+            True if the vote candidate is chosen and nothing has changed since it was checked.
+        """
+        return self.vote_candidate != AGENT_NONE and self.vote_candidate_version == self.version
+
+    def add_comingout(self, agent: Agent, role: Role) -> None:
+        """Record the comingout and update the claimant index.
+
+        Args:
+            agent: The agent that did comingout.
+            role: The role claimed by agent.
+        """
+        self.version += 1
+        old_role: Optional[Role] = self.comingout_map.get(agent)
+        if old_role is not None:
+            self.claimants[old_role] = self.claimants[old_role].without_agent(agent)
+        self.comingout_map[agent] = role
+        self.claimants[role] = self.get_claimants(role).with_agent(agent)
+        self.comingout_agents = self.comingout_agents.with_agent(agent)
+
+    def add_divination_report(self, seer: Agent, day: int, target: Agent, result: Species) -> None:
+        """Record the divination report and update the seer and werewolf indexes.
+
+        Args:
+            seer: The agent that reported the divination result.
+            day: The day of the report.
+            target: The divined agent.
+            result: The reported species.
+        """
+        self.divination_reports.append(seer, day, target, result)
+        self.version += 1
+        self.seers = self.seers.with_agent(seer)
+        if result != Species.WEREWOLF:
+            return
+        targets: AgentSet = self.wolf_targets.get(seer, AGENT_SET_EMPTY)
+        if target in targets:  # Already reported.
+            return
+        self.wolf_targets[seer] = targets.with_agent(target)
+        self.wolf_accusers[target] = self.wolf_accusers.get(target, AGENT_SET_EMPTY).with_agent(seer)
+        if target == self.me:
+            if seer not in self.fake_seers:
+                # Withdraw the reports by the seer that turned out to be fake.
+                self.fake_seers = self.fake_seers.with_agent(seer)
+                for target in targets:
+                    self._discount_reported_wolf(target)
+        elif seer not in self.fake_seers:
+            self.reported_wolf_counts[target] = self.reported_wolf_counts.get(target, 0) + 1
+            self.reported_wolves = self.reported_wolves.with_agent(target)
+
+    def trace(self, action: int, branch: int, candidates: AgentSet = AGENT_SET_EMPTY,
+              choice: Agent = AGENT_NONE) -> None:
+        """Record the decision in the decision trace.
+
+        Args:
+            action: The code of the action in Action.
+            branch: The code of the rule in Branch.
+            candidates: The candidates the choice was made from.
+            choice: The chosen agent.
+        """
+        talks: list[Talk] = self.game_info.talk_list
+        self.decision_trace.record(action, branch, self.game_info.day, talks[-1].turn if talks else 0,
+                                   candidates.bits, choice.agent_idx)
+
+    def commit(self, action: str, agent: Agent) -> Agent:
+        """Adopt the final choice for the action and record it in the decision trace.
+
+        The rules leave the record to this method, since a search may replace their choices.
+
+        Args:
+            action: The action, which is "vote", "divine", "guard" or "attack".
+            agent: The final choice.
+
+        Returns:
+            agent.
+        """
+        if action == "vote" and agent != self.me:
+            self.vote_candidate = agent
+        code, branch, candidates = self.pending
+        self.trace(code, branch, candidates, agent)
+        return agent
+
+    def register_search(self, action: str, search: Search) -> None:
+        """Register the incremental search run while there is time left to choose the target of the action.
+
+        Args:
+            action: The action, which is "vote", "divine", "guard" or "attack".
+            search: The function starting the search.
+        """
+        self.searches[action] = search
+
+    def search_selection(self, action: str, deadline: float) -> Iterator[Agent]:
+        """Reconsider the latest choice of the rule for the action with more accurate probabilities.
+
+        Args:
+            action: The action.
+            deadline: The deadline in terms of time.perf_counter(). Each step of the search is short enough
+                for run_anytime() to keep it.
+
+        Returns:
+            The search yielding the candidate chosen with the probabilities refined so far.
+        """
+        selection: Optional[Selection] = self.selections.get(action)
+        if selection is None:
+            return iter(())
+        return self.belief.search(selection.candidates, selection.role, selection.most)
+
+    def get_opening(self, default: Opening) -> Opening:
+        """Return the opening for my role in the current regulation.
+
+        Args:
+            default: The opening used if the book has none.
+
+        Returns:
+            The opening chosen from the book, or default.
+        """
+        if self.opening_book is None:
+            return default
+        opening: Optional[Opening] = self.opening_book.choose(
+            len(self.game_info.agent_list), self.game_info.existing_role_list, self.game_info.my_role)
+        return opening if opening is not None else default
+
+    def get_agent_name(self, agent: Agent) -> Optional[str]:
+        """Return the name the profile of the agent is stored under.
+
+        The game information does not tell the names of the other agents, and a seat such as Agent[03]
+        is taken by different opponents from game to game. Thus the names must be given in agent_names
+        by a runner that seats the players itself, such as tournament.py.
+
+        Args:
+            agent: The agent.
+
+        Returns:
+            The name of agent, or None if it is unknown.
+        """
+        return self.agent_names.get(agent)
+
+    def get_profile(self, agent: Agent) -> Optional[OpponentProfile]:
+        """Return the profile of the agent loaded at the start of the game.
+
+        Args:
+            agent: The agent.
+
+        Returns:
+            The profile of agent, or None if the opponents are not profiled.
+        """
+        name: Optional[str] = self.get_agent_name(agent)
+        if self.profile_store is None or name is None:
+            return None
+        return self.profile_store.get(name)
+
+    def _discount_reported_wolf(self, agent: Agent) -> None:
+        count: int = self.reported_wolf_counts[agent] - 1
+        if count > 0:
+            self.reported_wolf_counts[agent] = count
+        else:
+            del self.reported_wolf_counts[agent]
+            self.reported_wolves = self.reported_wolves.without_agent(agent)
 
     def initialize(self, game_info: GameInfo, game_setting: GameSetting) -> None:
         self.game_info = game_info
         self.game_setting = game_setting
         self.me = game_info.me
+        self.contents = ContentTable.get(len(game_info.agent_list), game_info.existing_role_list)
+        self.others = AgentSet.of(game_info.agent_list).without_agent(self.me)
+        self.alive_agents = AGENT_SET_EMPTY  # Not to keep alive_others excluding myself of the last game.
+        self.update_status()
         # Clear fields not to bring in information from the last game.
         self.comingout_map.clear()
-        self.divination_reports.clear()
-        self.identification_reports.clear()
+        self.divination_reports.reset()
+        self.identification_reports.reset()
+        self.claimants.clear()
+        self.comingout_agents = AGENT_SET_EMPTY
+        self.seers = AGENT_SET_EMPTY
+        self.wolf_targets.clear()
+        self.wolf_accusers.clear()
+        self.fake_seers = AGENT_SET_EMPTY
+        self.reported_wolves = AGENT_SET_EMPTY
+        self.reported_wolf_counts.clear()
+        self.vote_log.clear()
+        self.vote_graph.reset(len(game_info.agent_list))
+        self.selections.clear()
+        self.decision_trace.reset()
+        self.events.reset()
+        self.belief.reset(game_setting.role_num_map, len(game_info.agent_list))
+        for agent, role in game_info.role_map.items():  # Myself and the allies if I am a werewolf.
+            self.belief.set_role(agent, role)
+        self.profiling = self.profile_store is not None and any(a in self.agent_names for a in self.others)
+        if self.profile_store is not None and self.profiling:
+            # Read the profiles now so that the lookups during the game do not touch the disk.
+            self.profile_store.load(n for n in map(self.get_agent_name, self.others) if n is not None)
+            for agent in self.others:
+                profile: Optional[OpponentProfile] = self.get_profile(agent)
+                if profile is not None and profile.claims > 0:
+                    # The smoothed rate is 0.5 without history, which leaves FAKE_CLAIM as it is.
+                    self.belief.set_fake_claim_weight(agent, 2 * profile.fake_claim_rate)
+
+    def on_talk(self, event: TalkReceived) -> None:
+        """Analyze the talk.
+
+        Args:
+            event: The event of the talk.
+        """
+        talker: Agent = event.talk.agent
+        if talker == self.me:  # Skip my talk.
+            return
+        content: Content = event.content
+        if content.topic == Topic.COMINGOUT:
+            self.add_comingout(talker, content.role)
+            self.claims.append((talker, content.role))
+        elif content.topic == Topic.DIVINED:
+            self.add_divination_report(talker, event.talk.day, content.target, content.result)
+            self.divinations.append((talker, content.target, content.result))
+        elif content.topic == Topic.IDENTIFIED:
+            self.identification_reports.append(talker, event.talk.day, content.target, content.result)
+            self.identifications.append((talker, content.target, content.result))
+        elif content.topic == Topic.VOTE:
+            self.vote_graph.declare(event.talk.day, talker, content.target)
+
+    def on_death(self, event: AgentDied) -> None:
+        """Record the agent killed by the werewolves.
+
+        Args:
+            event: The event of the death.
+        """
+        self.belief.add_attacked((event.agent,))
+
+    def on_execution(self, event: AgentExecuted) -> None:
+        """Record the agent executed on the previous day.
+
+        Args:
+            event: The event of the execution.
+        """
+        self.belief.add_executed(event.agent)
+
+    def on_vote(self, event: VoteCast) -> None:
+        """Record the vote in the vote graph and for the opponent profiles.
+
+        Args:
+            event: The event of the vote.
+        """
+        vote: Vote = event.vote
+        self.vote_graph.add_vote(vote.day, vote.agent, vote.target)
+        if self.profiling:
+            self.vote_log.append(vote)
+
+    def get_suspicion(self) -> npt.NDArray[np.int64]:
+        """Return the scores of the agents that break ties between the werewolf candidates.
+
+        An agent scores for each vote against me, who is human, and each vote against its own declaration.
+
+        Returns:
+            The scores indexed by agent_idx - 1.
+        """
+        return self.vote_graph.votes_against(AgentSet.of((self.me,))) + self.vote_graph.broken_declarations()
+
+    def summarize_profiles(self) -> dict[str, OpponentProfile]:
+        """Return what the other agents did in the finished game.
+
+        Returns:
+            Mapping between the name of an agent and its counts in the game, which omits the agents without names.
+        """
+        roles: dict[Agent, Role] = self.game_info.role_map  # All the roles are disclosed at the end.
+        results: dict[Agent, OpponentProfile] = {a: OpponentProfile(games=1) for a in self.others}
+        for agent, role in self.comingout_map.items():
+            if agent in results and role != Role.VILLAGER:
+                results[agent].claims += 1
+                if agent in roles and roles[agent] != role:
+                    results[agent].fake_claims += 1
+        # The day each agent reported each agent as human first.
+        human_reports: dict[tuple[Agent, Agent], int] = {}
+        for reports in (self.divination_reports, self.identification_reports):
+            for report in reports:
+                if report.result == Species.HUMAN:
+                    human_reports.setdefault((report.agent, report.target), report.day)
+        for report in self.divination_reports:
+            if report.agent in results and report.target in roles \
+                    and report.result in (Species.HUMAN, Species.WEREWOLF):
+                results[report.agent].divinations += 1
+                if (roles[report.target] == Role.WEREWOLF) == (report.result == Species.WEREWOLF):
+                    results[report.agent].correct_divinations += 1
+        for vote in self.vote_log:
+            if vote.agent in results:
+                results[vote.agent].votes += 1
+                if human_reports.get((vote.agent, vote.target), vote.day + 1) <= vote.day:
+                    results[vote.agent].contradicting_votes += 1
+        names: dict[Agent, Optional[str]] = {a: self.get_agent_name(a) for a in results}
+        return {n: results[a] for a, n in names.items() if n is not None}
+
+    def run_post_game(self, task: Task) -> None:
+        """Run the post-game work in the background if a worker is available.
+
+        The task must not refer to the state of this agent, which is reused by the next game.
+
+        Args:
+            task: The function doing the work.
+        """
+        if self.post_game is None:
+            task()
+        else:
+            self.post_game.submit(task)
 
     def day_start(self) -> None:
-        self.talk_list_head = 0
         self.vote_candidate = AGENT_NONE
+        self.selections.clear()
+        self.version += 1
 
     def update(self, game_info: GameInfo) -> None:
+        # The status map may be a new object with the same contents, since the stock client builds
+        # new game information for every packet. The alive agents are compared in update_status().
+        status_changed: bool = game_info.status_map is not self.game_info.status_map
         self.game_info = game_info  # Update game information.
-        for i in range(self.talk_list_head, len(game_info.talk_list)):  # Analyze talks that have not been analyzed yet.
-            tk: Talk = game_info.talk_list[i]  # The talk to be analyzed.
-            talker: Agent = tk.agent
-            if talker == self.me:  # Skip my talk.
-                continue
-            content: Content = Content.compile(tk.text)
-            if content.topic == Topic.COMINGOUT:
-                self.comingout_map[talker] = content.role
-            elif content.topic == Topic.DIVINED:
-                self.divination_reports.append(Judge(talker, game_info.day, content.target, content.result))
-            elif content.topic == Topic.IDENTIFIED:
-                self.identification_reports.append(Judge(talker, game_info.day, content.target, content.result))
-        self.talk_list_head = len(game_info.talk_list)  # All done.
+        if status_changed:
+            self.update_status()
+        self.events.dispatch(game_info)  # Analyze what has happened since the last update.
+        if self.claims or self.divinations or self.identifications:
+            self.belief.add_talks(self.me, self.claims, self.divinations, self.identifications)
+            self.claims.clear()
+            self.divinations.clear()
+            self.identifications.clear()
 
     def talk(self) -> Content:
         # Choose an agent to be voted for while talking.
         #
-        # The list of fake seers that reported me as a werewolf.
-        fake_seers: list[Agent] = [j.agent for j in self.divination_reports
-                                   if j.target == self.me and j.result == Species.WEREWOLF]
-        # Vote for one of the alive agents that were judged as werewolves by non-fake seers.
-        reported_wolves: list[Agent] = [j.target for j in self.divination_reports
-                                        if j.agent not in fake_seers and j.result == Species.WEREWOLF]
-        candidates: list[Agent] = self.get_alive_others(reported_wolves)
-        # Vote for one of the alive fake seers if there are no candidates.
-        if not candidates:
-            candidates = self.get_alive(fake_seers)
+        # Keep the vote candidate if nothing has changed since it was chosen.
+        if self.is_vote_candidate_fresh():
+            return CONTENT_SKIP
+        # Try the vote rules in the order of the parameters.
+        candidates: AgentSet = AGENT_SET_EMPTY
+        branch: int = Branch.ALIVE_OTHERS
+        for rule in self.params.vote_rules:
+            candidates = self.vote_rules[rule]()
+            if candidates:
+                branch = getattr(Branch, rule)
+                break
         # Vote for one of the alive agents if there are no candidates.
         if not candidates:
-            candidates = self.get_alive_others(self.game_info.agent_list)
+            candidates = self.alive_others
+            branch = Branch.ALIVE_OTHERS
+        self.vote_candidate_version = self.version
+        self.selections["vote"] = Selection(candidates, Role.WEREWOLF, True)
         # Declare which to vote for if not declare yet or the candidate is changed.
+        # Choose the candidate most likely to be a werewolf.
         if self.vote_candidate == AGENT_NONE or self.vote_candidate not in candidates:
-            self.vote_candidate = self.random_select(candidates)
+            self.vote_candidate = self.belief.select(candidates, Role.WEREWOLF, scores=self.get_suspicion)
+            self.trace(Action.TALK, branch, candidates, self.vote_candidate)
             if self.vote_candidate != AGENT_NONE:
-                return Content(VoteContentBuilder(self.vote_candidate))
+                return self.contents.vote(self.vote_candidate)
         return CONTENT_SKIP
 
+    def choose_vote(self) -> Agent:
+        """Return the agent to vote for chosen by the rules, to be passed to commit()."""
+        if self.vote_candidate != AGENT_NONE:
+            self.pending = (Action.VOTE, Branch.CANDIDATE, AGENT_SET_EMPTY)
+            return self.vote_candidate
+        self.pending = (Action.VOTE, Branch.MYSELF, AGENT_SET_EMPTY)
+        return self.me
+
+    def choose_attack(self) -> Agent:
+        """Return the agent to attack chosen by the rules, to be passed to commit()."""
+        raise NotImplementedError()
+
+    def choose_divine(self) -> Agent:
+        """Return the agent to divine chosen by the rules, to be passed to commit()."""
+        raise NotImplementedError()
+
+    def choose_guard(self) -> Agent:
+        """Return the agent to guard chosen by the rules, to be passed to commit()."""
+        raise NotImplementedError()
+
     def vote(self) -> Agent:
-        return self.vote_candidate if self.vote_candidate != AGENT_NONE else self.me
+        return self.commit("vote", self.choose_vote())
 
     def attack(self) -> Agent:
-        raise NotImplementedError()
+        return self.commit("attack", self.choose_attack())
 
     def divine(self) -> Agent:
-        raise NotImplementedError()
+        return self.commit("divine", self.choose_divine())
 
     def guard(self) -> Agent:
-        raise NotImplementedError()
+        return self.commit("guard", self.choose_guard())
 
     def whisper(self) -> Content:
         raise NotImplementedError()
 
     def finish(self) -> None:
-        pass
+        if self.trace_path is not None:
+            self.run_post_game(partial(append_trace, self.trace_path,
+                                       self.decision_trace.to_bytes(self.me.agent_idx, self.game_info.my_role)))
+        if self.profile_store is not None and self.profiling:
+            results: dict[str, OpponentProfile] = self.summarize_profiles()
+            if results:
+                self.run_post_game(partial(self.profile_store.record, results))
@@ -0,0 +1,133 @@
+#
+# votegraph.py
+#
+# Copyright 2022 OTSUKI Takashi
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import numpy.typing as npt
+
+from aiwolf import Agent
+
+from agentset import AgentSet
+
+
+class VoteGraph:
+    """Who voted for whom and who declared to vote for whom, as a matrix of voters × targets per day.
+
+    The row n-1 and the column n-1 are for Agent[n]. A voter's row of a day holds a one
+    at its latest target, so that a revote or a new declaration replaces the old one.
+    Votes and declarations involving agents out of the game, such as VOTE ANY, are ignored.
+    """
+
+    def __init__(self) -> None:
+        """Initialize a new instance of VoteGraph."""
+        self.agent_num: int = 0
+        """The number of agents."""
+        self.days: int = 0
+        """The number of the days having votes or declarations."""
+        self.votes: npt.NDArray[np.int8] = np.zeros((0, 0, 0), dtype=np.int8)
+        """Votes of days × voters × targets."""
+        self.declared: npt.NDArray[np.int8] = np.zeros((0, 0, 0), dtype=np.int8)
+        """Declarations of days × talkers × targets."""
+
+    def reset(self, agent_num: int, days: int = 16) -> None:
+        """Forget the votes for a new game.
+
+        Args:
+            agent_num: The number of agents.
+            days: The number of days the storage is allocated for at first.
+        """
+        self.agent_num = agent_num
+        self.days = 0
+        if self.votes.shape[1:] != (agent_num, agent_num):
+            self.votes = np.zeros((days, agent_num, agent_num), dtype=np.int8)
+            self.declared = np.zeros((days, agent_num, agent_num), dtype=np.int8)
+        else:  # Reuse the storage of the last game.
+            self.votes.fill(0)
+            self.declared.fill(0)
+
+    def _set(self, matrices: npt.NDArray[np.int8], day: int, agent: Agent, target: Agent) -> npt.NDArray[np.int8]:
+        # Ignore the agents out of the game such as ANY, which would index another row or column.
+        if day < 0 or not (0 < agent.agent_idx <= self.agent_num and 0 < target.agent_idx <= self.agent_num):
+            return matrices
+        if day >= len(matrices):  # Double the storage.
+            grown: npt.NDArray[np.int8] = np.zeros((max(2 * len(matrices), day + 1),) + matrices.shape[1:],
+                                                   dtype=np.int8)
+            grown[:len(matrices)] = matrices
+            matrices = grown
+        row: npt.NDArray[np.int8] = matrices[day, agent.agent_idx - 1]
+        row.fill(0)
+        row[target.agent_idx - 1] = 1
+        self.days = max(self.days, day + 1)
+        return matrices
+
+    def add_vote(self, day: int, voter: Agent, target: Agent) -> None:
+        """Record the vote of the day."""
+        self.votes = self._set(self.votes, day, voter, target)
+        if len(self.declared) < len(self.votes):
+            self.declared = np.concatenate((self.declared, np.zeros_like(self.votes[len(self.declared):])))
+
+    def declare(self, day: int, talker: Agent, target: Agent) -> None:
+        """Record the declaration of the vote of the day."""
+        self.declared = self._set(self.declared, day, talker, target)
+        if len(self.votes) < len(self.declared):
+            self.votes = np.concatenate((self.votes, np.zeros_like(self.declared[len(self.votes):])))
+
+    def mask(self, agents: AgentSet) -> npt.NDArray[np.bool_]:
+        """Return the boolean vector of the agents."""
+        return (agents.bits >> np.arange(1, self.agent_num + 1)) & 1 == 1
+
+    @property
+    def total(self) -> npt.NDArray[np.int64]:
+        """Numbers of the votes of voters × targets over the days."""
+        return self.votes[:self.days].sum(axis=0, dtype=np.int64)
+
+    def votes_against(self, agents: AgentSet) -> npt.NDArray[np.int64]:
+        """Return the number of the votes each agent cast against the given agents, such as accused werewolves."""
+        return self.total[:, self.mask(agents)].sum(axis=1)
+
+    def broken_declarations(self) -> npt.NDArray[np.int64]:
+        """Return the number of the days each agent voted for another agent than it declared last."""
+        votes: npt.NDArray[np.int8] = self.votes[:self.days]
+        declared: npt.NDArray[np.int8] = self.declared[:self.days]
+        broken: npt.NDArray[np.bool_] = (votes != declared).any(axis=2) & votes.any(axis=2) & declared.any(axis=2)
+        return broken.sum(axis=0, dtype=np.int64)
+
+    def similarity(self) -> npt.NDArray[np.float64]:
+        """Return the ratio of the days two agents voted for the same target to the days both voted."""
+        votes: npt.NDArray[np.float64] = self.votes[:self.days].astype(np.float64)
+        voted: npt.NDArray[np.float64] = votes.sum(axis=2)
+        same: npt.NDArray[np.float64] = np.einsum("dij,dkj->ik", votes, votes)
+        both: npt.NDArray[np.float64] = voted.T @ voted
+        return np.divide(same, both, out=np.zeros_like(same), where=both > 0)
+
+    def blocs(self, threshold: float = 0.75) -> list[AgentSet]:
+        """Return the groups of agents linked by voting together, each of which has two or more agents.
+
+        Args:
+            threshold: The similarity over which two agents are linked.
+
+        Returns:
+            The connected components of the links.
+        """
+        reach: npt.NDArray[np.bool_] = (self.similarity() >= threshold) | np.eye(self.agent_num, dtype=np.bool_)
+        # Square the reachability until it covers the paths of any length.
+        for _ in range(max(self.agent_num - 1, 1).bit_length()):
+            reach = (reach.astype(np.int64) @ reach.astype(np.int64)) > 0
+        groups: dict[bytes, AgentSet] = {}
+        for row in reach:
+            if row.sum() > 1:
+                groups.setdefault(row.tobytes(), AgentSet.of(Agent(j + 1) for j in np.flatnonzero(row)))
+        return list(groups.values())
@@ -16,37 +16,50 @@
 # limitations under the License.
 
 import random
+import time
+from typing import Iterator, Optional
 
-from aiwolf import (Agent, AttackContentBuilder, ComingoutContentBuilder,
-                    Content, GameInfo, GameSetting, Judge, Role, Species)
+from aiwolf import Agent, Content, GameInfo, GameSetting, Judge, Role, Species
 from aiwolf.constant import AGENT_NONE
 
-from const import CONTENT_SKIP, JUDGE_EMPTY
+from agentset import AgentSet
+from anytime import Selection, get_deadline, run_anytime
+from belief import SAMPLE_BATCH
+from const import AGENT_SET_EMPTY, CONTENT_SKIP, JUDGE_EMPTY
+from openingbook import Opening
 from possessed import SamplePossessed
+from rollout import RolloutSearch
+from tracing import Action, Branch
 
 
 class SampleWerewolf(SamplePossessed):
     """Sample werewolf agent."""
 
+    rollout_search: Optional[RolloutSearch] = None
+    """Monte Carlo search of the attack target shared by all the werewolves, or None to choose by the rules."""
+
     def __init__(self) -> None:
         """Initialize a new instance of SampleWerewolf."""
         super().__init__()
-        self.allies: list[Agent] = []
+        self.allies: AgentSet = AGENT_SET_EMPTY
         """Allies."""
-        self.humans: list[Agent] = []
+        self.humans: AgentSet = AGENT_SET_EMPTY
         """Humans."""
         self.attack_vote_candidate: Agent = AGENT_NONE
         """The candidate for the attack voting."""
+        self.register_search("attack", self.search_attack)
 
     def initialize(self, game_info: GameInfo, game_setting: GameSetting) -> None:
         super().initialize(game_info, game_setting)
-        self.allies = list(self.game_info.role_map.keys())
-        self.humans = [a for a in self.game_info.agent_list if a not in self.allies]
-        # Do comingout on the day that randomly selected from the 1st, 2nd and 3rd day.
-        self.co_date = random.randint(1, 3)
+        self.allies = AgentSet.of(self.game_info.role_map.keys())
+        self.humans = AgentSet.of(self.game_info.agent_list) - self.allies
+        # Do comingout on the day that randomly selected from the 1st, 2nd and 3rd day by default.
+        co_date: int = random.randint(self.params.werewolf_co_date_min, self.params.werewolf_co_date_max)
         # Choose fake role randomly.
-        self.fake_role = random.choice([r for r in [Role.VILLAGER, Role.SEER, Role.MEDIUM]
-                                        if r in self.game_info.existing_role_list])
+        fake_role: Role = random.choice([r for r in [Role.VILLAGER, Role.SEER, Role.MEDIUM]
+                                         if r in self.game_info.existing_role_list])
+        # Follow the opening book if it has the opening.
+        self.fake_role, self.co_date = self.get_opening(Opening(fake_role, co_date))
 
     def get_fake_judge(self) -> Judge:
         """Generate a fake judgement."""
@@ -54,7 +67,7 @@ class SampleWerewolf(SamplePossessed):
         target: Agent = AGENT_NONE
         if self.fake_role == Role.SEER:  # Fake seer chooses a target randomly.
             if self.game_info.day != 0:
-                target = self.random_select(self.get_alive(self.not_judged_agents))
+                target = self.random_select(self.not_judged_agents & self.alive_agents)
         elif self.fake_role == Role.MEDIUM:
             target = self.game_info.executed_agent if self.game_info.executed_agent is not None \
                 else AGENT_NONE
@@ -63,12 +76,30 @@ class SampleWerewolf(SamplePossessed):
         # Determine a fake result.
         # If the target is a human
         # and the number of werewolves found is less than the total number of werewolves,
-        # judge as a werewolf with a probability of 0.3.
+        # judge as a werewolf with a probability of werewolf_fake_wolf_prob.
         result: Species = Species.WEREWOLF if target in self.humans \
-            and len(self.werewolves) < self.num_wolves and random.random() < 0.3 \
+            and len(self.werewolves) < self.num_wolves and random.random() < self.params.werewolf_fake_wolf_prob \
             else Species.HUMAN
         return Judge(self.me, self.game_info.day, target, result)
 
+    def search_attack(self, deadline: float) -> Iterator[Agent]:
+        """Search the attack target by the rollouts if enabled, otherwise by the probabilities.
+
+        Args:
+            deadline: The deadline in terms of time.perf_counter().
+
+        Returns:
+            The search yielding the best target found so far.
+        """
+        if self.rollout_search is None:
+            return self.search_selection("attack", deadline)
+        selection: Optional[Selection] = self.selections.get("attack")
+        if selection is None:
+            return iter(())
+        dead: list[int] = [a.agent_idx for a in self.game_info.agent_list if a not in self.alive_agents]
+        return self.rollout_search.search(self.belief.sample_roles(SAMPLE_BATCH), self.game_info.day, dead,
+                                          selection.candidates.to_list(), deadline)
+
     def day_start(self) -> None:
         super().day_start()
         self.attack_vote_candidate = AGENT_NONE
@@ -77,19 +108,39 @@ class SampleWerewolf(SamplePossessed):
         # Declare the fake role on the 1st day,
         # and declare the target of attack vote after that.
         if self.game_info.day == 0:
-            return Content(ComingoutContentBuilder(self.me, self.fake_role))
+            self.trace(Action.WHISPER, Branch.COMINGOUT)
+            return self.contents.comingout(self.me, self.fake_role)
         # Choose the target of attack vote.
         # Vote for one of the agent that did comingout.
-        candidates = [a for a in self.get_alive(self.humans) if a in self.comingout_map]
+        candidates: AgentSet = self.humans & self.alive_agents & self.comingout_agents
+        branch: int = Branch.COMINGOUT_HUMANS
         # Vote for one of the alive human agents if there are no candidates.
         if not candidates:
-            candidates = self.get_alive(self.humans)
+            candidates = self.humans & self.alive_agents
+            branch = Branch.HUMANS
+        # A search may prefer the candidate most likely to be the seer given more time.
+        self.selections["attack"] = Selection(candidates, Role.SEER, True)
         # Declare which to vote for if not declare yet or the candidate is changed.
         if self.attack_vote_candidate == AGENT_NONE or self.attack_vote_candidate not in candidates:
             self.attack_vote_candidate = self.random_select(candidates)
+            if self.rollout_search is not None:
+                deadline: float = get_deadline(time.perf_counter(), self.game_setting.time_limit,
+                                               self.rollout_search.fraction)
+                self.attack_vote_candidate = run_anytime(self.search_attack(deadline), self.attack_vote_candidate,
+                                                         deadline)
+            self.trace(Action.WHISPER, branch, candidates, self.attack_vote_candidate)
             if self.attack_vote_candidate != AGENT_NONE:
-                return Content(AttackContentBuilder(self.attack_vote_candidate))
+                return self.contents.attack(self.attack_vote_candidate)
         return CONTENT_SKIP
 
-    def attack(self) -> Agent:
-        return self.attack_vote_candidate if self.attack_vote_candidate != AGENT_NONE else self.me
+    def commit(self, action: str, agent: Agent) -> Agent:
+        if action == "attack" and agent != self.me:
+            self.attack_vote_candidate = agent
+        return super().commit(action, agent)
+
+    def choose_attack(self) -> Agent:
+        if self.attack_vote_candidate != AGENT_NONE:
+            self.pending = (Action.ATTACK, Branch.CANDIDATE, AGENT_SET_EMPTY)
+            return self.attack_vote_candidate
+        self.pending = (Action.ATTACK, Branch.MYSELF, AGENT_SET_EMPTY)
+        return self.me